@@ -1,12 +1,61 @@
 import os
+import json
+import asyncio
 import cv2
 import numpy as np
-from typing import Optional
+from typing import List, Optional
 
 from fastapi import FastAPI, UploadFile, File, Header, HTTPException, Depends, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from pydantic import BaseModel
 
-from src.pipeline import run_anpr
+from src.config import (
+    INFERENCE_EXECUTOR,
+    INFERENCE_WORKERS,
+    INFERENCE_MAX_QUEUE,
+    WORKER_TORCH_THREADS,
+    WORKER_STALE_S,
+    RETRY_AFTER_SECONDS,
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    BATCH_MAX_PENDING,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL_S,
+    RESULT_CACHE_DISK,
+    RESULT_CACHE_DISK_SIZE,
+    BATCH_API_MAX_ITEMS,
+    BATCH_API_MAX_BYTES,
+    BATCH_API_CHUNK,
+    VEHICLE_REGISTRY,
+    VEHICLE_REGISTRY_TOP_K,
+    VERIFY_BULK_MAX_PAIRS,
+    TILED_DETECTION,
+    CAMERA_PROFILES_PATH,
+    VERIFY_FIRST,
+)
+from src.archive import BatchLimitError, read_archive
+from src.buffers import buffer_pool
+from src.cache import ResultCache
+from src.decode import decode_for_detection, decode_policy
+from src.executor import InferenceExecutor, QueueFullError
+from src.metrics import (
+    CONTENT_TYPE_LATEST,
+    timed,
+    observe_verdict,
+    observe_error,
+    render_metrics,
+)
+from src.models import registry
+from src.pipeline import (
+    pipeline_fingerprint,
+    recognize_plates_batch,
+    verify_plates,
+    verify_first,
+)
+from src.postprocess import VERDICT_CODES, verify_plates_bulk
+from src.scheduler import MicroBatcher
+from src.vehicles import VehicleIndex
+from src.workers import WorkerPool
 
 # ============================================================
 # API KEY CONFIG
@@ -36,6 +85,78 @@ app = FastAPI(
     version="v2"
 )
 
+# ============================================================
+# MODEL LIFECYCLE + INFERENCE EXECUTOR
+# ============================================================
+
+def warmup_models():
+    try:
+        registry.warmup()
+    except Exception:
+        pass  # reported through /ready
+    return registry.ready, registry.error
+
+
+# "pool": N inference processes fed through shared memory; the
+# executor threads only decode uploads and wait on the pool
+worker_pool = WorkerPool(
+    num_workers=INFERENCE_WORKERS,
+    torch_threads=WORKER_TORCH_THREADS,
+    stale_s=WORKER_STALE_S,
+) if INFERENCE_EXECUTOR == "pool" else None
+
+executor = InferenceExecutor(
+    kind="thread" if worker_pool is not None else INFERENCE_EXECUTOR,
+    max_workers=INFERENCE_WORKERS,
+    max_queue=INFERENCE_MAX_QUEUE,
+    # process workers each load + warm up their own models
+    initializer=warmup_models if INFERENCE_EXECUTOR == "process" else None,
+)
+
+model_state = {"ready": False, "error": None}
+
+
+def _record_warmup(future):
+    try:
+        model_state["ready"], model_state["error"] = future.result()
+    except Exception as e:
+        model_state["error"] = str(e)
+
+
+def models_ready():
+    if worker_pool is not None:
+        return worker_pool.ready, worker_pool.error
+    return model_state["ready"], model_state["error"]
+
+
+@app.on_event("startup")
+async def start_model_warmup():
+    if worker_pool is not None:
+        worker_pool.start()
+    else:
+        # Warm up on the executor so the server listens immediately
+        executor.submit_unbounded(warmup_models).add_done_callback(
+            _record_warmup
+        )
+    if batcher is not None:
+        batcher.start()
+    if VEHICLE_REGISTRY:
+        # Default thread pool: the index stays in this process
+        asyncio.get_running_loop().run_in_executor(
+            None, VehicleIndex.load, VEHICLE_REGISTRY
+        ).add_done_callback(_record_vehicle_index)
+
+
+@app.on_event("shutdown")
+async def stop_executor():
+    if batcher is not None:
+        await batcher.stop()
+    executor.shutdown(wait=False)
+    if worker_pool is not None:
+        worker_pool.shutdown()
+    if cache is not None:
+        cache.close()
+
 # ============================================================
 # HEALTH CHECK
 # ============================================================
@@ -47,6 +168,57 @@ def health():
         "service": "vnpr"
     }
 
+
+@app.get("/ready")
+def ready():
+    is_ready, error = models_ready()
+    if not is_ready:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "ready": False,
+                "error": error
+            }
+        )
+    return {"ready": True}
+
+
+@app.get("/stats")
+def stats():
+    out = executor.stats()
+    if batcher is not None:
+        out["batching"] = batcher.stats()
+    if worker_pool is not None:
+        out["pool"] = worker_pool.stats()
+    if cache is not None:
+        out["cache"] = {**cache.stats(), "fingerprint": pipeline_fingerprint()}
+    if registry.quantize:
+        out["quantization"] = registry.quantization
+    # this process; pool workers report theirs under pool.workers
+    out["buffers"] = buffer_pool.stats()
+    out["decode"] = decode_policy.stats()
+    return out
+
+
+def buffer_stats():
+    """
+    {process: buffer pool stats}: this process, plus each pool worker's
+    as of its last heartbeat
+    """
+    out = {"api": buffer_pool.stats()}
+    if worker_pool is not None:
+        for w in worker_pool.stats()["workers"]:
+            out[f"worker-{w['worker']}"] = w["buffers"]
+    return out
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(
+        render_metrics(executor.stats(), buffer_stats()),
+        media_type=CONTENT_TYPE_LATEST
+    )
+
 # ============================================================
 # CONFIDENCE LABEL LOGIC
 # ============================================================
@@ -59,6 +231,216 @@ def get_confidence_level(similarity: float):
     else:
         return "LOW"
 
+# ============================================================
+# INFERENCE JOB (RUNS ON THE EXECUTOR)
+# ============================================================
+
+def decode_upload(contents, tiled=False):
+    """
+    Upload bytes -> image for the pipeline: a full decode, or a
+    reduced-resolution ReducedImage for large JPEGs while decode_policy
+    sees few uploads with plates. Pool mode (workers take full arrays
+    over shared memory) and tiled detection (needs the full frame) always
+    decode in full.
+    """
+    with timed("decode"):
+        if worker_pool is None and not tiled:
+            return decode_for_detection(contents)
+        np_img = np.frombuffer(contents, np.uint8)
+        return cv2.imdecode(np_img, cv2.IMREAD_COLOR)
+
+
+def run_pipeline(images, tiled=False):
+    if worker_pool is not None:
+        return worker_pool.submit(images, tiled).result()
+
+    results = recognize_plates_batch(images, tiled)
+    for plate_texts in results:
+        decode_policy.observe(bool(plate_texts))
+    return results
+
+
+def process_upload(contents, tiled=False):
+    """
+    Upload bytes -> post-grammar plate strings
+    """
+    img = decode_upload(contents, tiled)
+
+    if img is None:
+        raise ValueError("Invalid image file")
+
+    return run_pipeline([img], tiled)[0]
+
+
+def process_upload_verify_first(contents, assigned_vehicle_number, tiled=False):
+    """
+    Upload bytes -> (run_anpr results, plates_skipped), stopping at the
+    first plate that matches assigned_vehicle_number
+    """
+    img = decode_upload(contents, tiled)
+
+    if img is None:
+        raise ValueError("Invalid image file")
+
+    return verify_first(img, assigned_vehicle_number, tiled)
+
+
+def process_uploads(uploads, tiled=False):
+    """
+    [contents, ...] -> plate strings per upload, or a ValueError for
+    uploads that do not decode
+    """
+    results = [None] * len(uploads)
+    index, images = [], []
+
+    for i, contents in enumerate(uploads):
+        img = decode_upload(contents, tiled)
+        if img is None:
+            results[i] = ValueError("Invalid image file")
+            continue
+        index.append(i)
+        images.append(img)
+
+    for i, res in zip(index, run_pipeline(images, tiled) if images else []):
+        results[i] = res
+
+    return results
+
+
+# Post-grammar plate strings per upload hash; verification is re-run
+# against each request's own assigned number
+cache = ResultCache(
+    max_items=RESULT_CACHE_SIZE,
+    ttl_s=RESULT_CACHE_TTL_S,
+    disk_path=RESULT_CACHE_DISK,
+    disk_max_items=RESULT_CACHE_DISK_SIZE,
+) if RESULT_CACHE_SIZE > 0 else None
+
+def cache_key(contents, tiled=False):
+    # results of other weights / grammar / settings (e.g. from before a
+    # redeploy, in the SQLite tier) never match; tiled and single-pass
+    # detection may find different plates
+    key = f"{pipeline_fingerprint()}:{cache.key(contents)}"
+    return f"{key}:tiled" if tiled else key
+
+
+def _cache_lookup(uploads, tiled):
+    keys = [cache_key(contents, tiled) for contents in uploads]
+    return keys, [cache.get(key) for key in keys]
+
+
+def _cache_store(entries):
+    for key, plate_texts in entries:
+        cache.put(key, plate_texts)
+
+
+async def cache_lookup(uploads, tiled=False):
+    """
+    Uploads -> (keys, cached plate strings or None). Hashing multi-MB
+    uploads and the SQLite tier run on a thread, off the event loop
+    """
+    if cache is None:
+        return [None] * len(uploads), [None] * len(uploads)
+    return await asyncio.to_thread(_cache_lookup, uploads, tiled)
+
+
+async def cache_store(entries):
+    """
+    [(key, plate strings)] -> cache, off the event loop
+    """
+    if cache is not None and entries:
+        await asyncio.to_thread(_cache_store, entries)
+
+
+# Group concurrent requests into shared pipeline batches
+batcher = MicroBatcher(
+    executor,
+    process_uploads,
+    max_batch=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS,
+    max_pending=BATCH_MAX_PENDING,
+) if BATCH_MAX_SIZE > 1 else None
+
+
+def busy_response():
+    return JSONResponse(
+        status_code=503,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+        content={
+            "matched": False,
+            "error": "Server busy, retry later"
+        }
+    )
+
+# ============================================================
+# CAMERA PROFILES
+# ============================================================
+
+def load_camera_profiles(path):
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+camera_profiles = load_camera_profiles(CAMERA_PROFILES_PATH)
+
+
+def use_tiling(tiled=None, camera=None):
+    """
+    Request flag, else the camera profile's, else VNPR_TILED
+    """
+    if tiled is not None:
+        return tiled
+    return camera_profiles.get(camera or "", {}).get("tiled", TILED_DETECTION)
+
+# ============================================================
+# RESPONSE SHAPE
+# ============================================================
+
+def build_response(results, assigned_vehicle_number, plates_skipped=0):
+    """
+    run_anpr results -> /anpr response body.
+    plates_skipped: detected plates never read (verification-first mode)
+    """
+    # If nothing detected
+    if not results or len(results) == 0:
+        return {
+            "matched": False,
+            "assigned_vehicle_number": assigned_vehicle_number,
+            "recognized_vehicle_number": None,
+            "similarity": 0.0,
+            "verdict": "NO_PLATE_DETECTED",
+            "confidence_level": "LOW",
+            "plates_skipped": plates_skipped
+        }
+
+    # Take best result
+    best = results[0]
+
+    # Extract detected plate text safely
+    recognized = (
+        best.get("final_vehicle_number")
+        or best.get("recognized")
+        or best.get("plate")
+        or best.get("recognized_vehicle_number")
+    )
+
+    similarity = float(best.get("similarity", 0))
+    verdict = best.get("verdict", "UNKNOWN")
+
+    matched = verdict == "MATCH"
+
+    return {
+        "matched": matched,
+        "assigned_vehicle_number": assigned_vehicle_number,
+        "recognized_vehicle_number": recognized,
+        "similarity": similarity,
+        "verdict": verdict,
+        "confidence_level": get_confidence_level(similarity),
+        "plates_skipped": plates_skipped
+    }
+
 # ============================================================
 # MAIN ANPR ENDPOINT
 # ============================================================
@@ -67,60 +449,56 @@ def get_confidence_level(similarity: float):
 async def anpr_api(
     image: UploadFile = File(...),
     assigned_vehicle_number: Optional[str] = Form(None),  # <-- IMPORTANT FIX
+    tiled: Optional[bool] = Form(None),
+    camera: Optional[str] = Form(None),
+    verify_first: Optional[bool] = Form(None),
     _: None = Depends(verify_api_key)
 ):
     try:
         # Read uploaded image
         contents = await image.read()
-        np_img = np.frombuffer(contents, np.uint8)
-        img = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
+        tiled = use_tiling(tiled, camera)
 
-        if img is None:
-            raise ValueError("Invalid image file")
+        (key,), (plate_texts,) = await cache_lookup([contents], tiled)
 
-        # Run pipeline
-        results = run_anpr(
-            image=img,
-            assigned_vehicle_number=assigned_vehicle_number
-        )
+        # Verification-first: read plates one at a time, stop at the first
+        # MATCH. Partial reads are not cached; pool workers only run the
+        # full batch pipeline
+        if verify_first is None:
+            verify_first = VERIFY_FIRST
+        if (verify_first and assigned_vehicle_number and plate_texts is None
+                and worker_pool is None):
+            results, skipped = await executor.run(
+                process_upload_verify_first, contents, assigned_vehicle_number, tiled
+            )
+            # best reading first (the MATCH, when one was found)
+            results.sort(key=lambda r: r.get("similarity", 0), reverse=True)
+            response = build_response(results, assigned_vehicle_number, skipped)
+            observe_verdict(response["verdict"])
+            return JSONResponse(content=response)
 
-        # If nothing detected
-        if not results or len(results) == 0:
-            return JSONResponse(content={
-                "matched": False,
-                "assigned_vehicle_number": assigned_vehicle_number,
-                "recognized_vehicle_number": None,
-                "similarity": 0.0,
-                "verdict": "NO_PLATE_DETECTED",
-                "confidence_level": "LOW"
-            })
+        # Decode + run pipeline off the event loop. Tiled requests are a
+        # batch of their own (all tiles in one call), so they skip the batcher
+        if plate_texts is None:
+            if batcher is not None and not tiled:
+                plate_texts = await batcher.submit(contents)
+            else:
+                plate_texts = await executor.run(process_upload, contents, tiled)
 
-        # Take best result
-        best = results[0]
-
-        # Extract detected plate text safely
-        recognized = (
-            best.get("final_vehicle_number")
-            or best.get("recognized")
-            or best.get("plate")
-            or best.get("recognized_vehicle_number")
-        )
+            await cache_store([(key, plate_texts)])
 
-        similarity = float(best.get("similarity", 0))
-        verdict = best.get("verdict", "UNKNOWN")
+        results = verify_plates(plate_texts, assigned_vehicle_number)
+        response = build_response(results, assigned_vehicle_number)
+        observe_verdict(response["verdict"])
 
-        matched = verdict == "MATCH"
+        return JSONResponse(content=response)
 
-        return JSONResponse(content={
-            "matched": matched,
-            "assigned_vehicle_number": assigned_vehicle_number,
-            "recognized_vehicle_number": recognized,
-            "similarity": similarity,
-            "verdict": verdict,
-            "confidence_level": get_confidence_level(similarity)
-        })
+    except QueueFullError:
+        observe_error("busy")
+        return busy_response()
 
     except Exception as e:
+        observe_error("invalid_image" if isinstance(e, ValueError) else "internal")
         return JSONResponse(
             status_code=500,
             content={
@@ -128,3 +506,235 @@ async def anpr_api(
                 "error": str(e)
             }
         )
+
+# ============================================================
+# BATCH ENDPOINT (NDJSON STREAM)
+# ============================================================
+
+async def collect_batch_items(images, archive, assigned_vehicle_numbers):
+    """
+    Multipart images and / or one zip / tar archive -> batch items
+    """
+    assigned = [a or None for a in (assigned_vehicle_numbers or [])]
+    items, total = [], 0
+
+    for upload in images or []:
+        contents = await upload.read()
+        total += len(contents)
+        if len(items) >= BATCH_API_MAX_ITEMS or total > BATCH_API_MAX_BYTES:
+            raise BatchLimitError(
+                f"Batch exceeds {BATCH_API_MAX_ITEMS} images "
+                f"or {BATCH_API_MAX_BYTES} bytes"
+            )
+        i = len(items)
+        items.append({
+            "index": i,
+            "filename": upload.filename,
+            "contents": contents,
+            "assigned": assigned[i] if i < len(assigned) else None,
+        })
+
+    if archive is not None:
+        data = await archive.read()
+        if len(data) > BATCH_API_MAX_BYTES:
+            raise BatchLimitError(f"Batch exceeds {BATCH_API_MAX_BYTES} bytes")
+
+        # up to BATCH_API_MAX_BYTES of decompression: keep it off the loop
+        members, manifest = await asyncio.to_thread(
+            read_archive,
+            data,
+            max_items=BATCH_API_MAX_ITEMS - len(items),
+            max_bytes=BATCH_API_MAX_BYTES - total,
+        )
+        for name, contents in members:
+            items.append({
+                "index": len(items),
+                "filename": name,
+                "contents": contents,
+                "assigned": manifest.get(name)
+                            or manifest.get(os.path.basename(name)),
+            })
+
+    if not items:
+        raise ValueError("No images in batch")
+
+    return items
+
+
+async def run_batch_chunk(chunk, tiled=False):
+    """
+    Batch items -> result lines (same fields as /anpr + index, filename)
+    """
+    keys, texts = await cache_lookup([item["contents"] for item in chunk], tiled)
+    todo = [i for i, t in enumerate(texts) if t is None]
+
+    if todo:
+        try:
+            while True:
+                try:
+                    out = await executor.run(
+                        process_uploads,
+                        [chunk[i]["contents"] for i in todo],
+                        tiled
+                    )
+                    break
+                except QueueFullError:
+                    # batch clients wait for capacity instead of failing
+                    await asyncio.sleep(RETRY_AFTER_SECONDS)
+        except Exception as e:
+            out = [e] * len(todo)
+
+        for i, res in zip(todo, out):
+            texts[i] = res
+        await cache_store([
+            (keys[i], res) for i, res in zip(todo, out)
+            if not isinstance(res, Exception)
+        ])
+
+    lines = []
+    for item, res in zip(chunk, texts):
+        if isinstance(res, Exception):
+            observe_error(
+                "invalid_image" if isinstance(res, ValueError) else "internal"
+            )
+            body = {"matched": False, "error": str(res)}
+        else:
+            body = build_response(
+                verify_plates(res, item["assigned"]),
+                item["assigned"]
+            )
+            observe_verdict(body["verdict"])
+        lines.append({
+            "index": item["index"],
+            "filename": item["filename"],
+            **body
+        })
+
+    return lines
+
+
+async def stream_batch(items, tiled=False):
+    chunks = [
+        items[i:i + BATCH_API_CHUNK]
+        for i in range(0, len(items), BATCH_API_CHUNK)
+    ]
+    pending = set()
+    next_chunk = 0
+
+    try:
+        while next_chunk < len(chunks) or pending:
+            while next_chunk < len(chunks) and len(pending) < executor.max_workers:
+                pending.add(asyncio.ensure_future(
+                    run_batch_chunk(chunks[next_chunk], tiled)
+                ))
+                next_chunk += 1
+
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                for line in task.result():
+                    yield json.dumps(line) + "\n"
+    finally:
+        # client went away: stop feeding the executor
+        for task in pending:
+            task.cancel()
+
+
+@app.post("/anpr/batch")
+async def anpr_batch_api(
+    images: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    assigned_vehicle_numbers: Optional[List[str]] = Form(None),
+    tiled: Optional[bool] = Form(None),
+    camera: Optional[str] = Form(None),
+    _: None = Depends(verify_api_key)
+):
+    try:
+        items = await collect_batch_items(
+            images, archive, assigned_vehicle_numbers
+        )
+    except BatchLimitError as e:
+        return JSONResponse(status_code=413, content={"error": str(e)})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return StreamingResponse(
+        stream_batch(items, use_tiling(tiled, camera)),
+        media_type="application/x-ndjson"
+    )
+
+# ============================================================
+# VEHICLE REGISTRY LOOKUP
+# ============================================================
+
+vehicle_index = {"index": None, "error": None}
+
+
+def _record_vehicle_index(future):
+    try:
+        vehicle_index["index"] = future.result()
+    except Exception as e:
+        vehicle_index["error"] = str(e)
+
+
+@app.get("/vehicles/match")
+def vehicles_match(
+    plate: str,
+    k: int = VEHICLE_REGISTRY_TOP_K,
+    _: None = Depends(verify_api_key)
+):
+    if not VEHICLE_REGISTRY:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "No vehicle registry configured"}
+        )
+
+    index = vehicle_index["index"]
+    if index is None:
+        return JSONResponse(
+            status_code=503,
+            content={"error": vehicle_index["error"] or "Vehicle registry loading"}
+        )
+
+    return {
+        "recognized": plate,
+        "matches": index.match(plate, k=max(1, min(k, 100))),
+    }
+
+# ============================================================
+# BULK VERIFICATION (NO IMAGES)
+# ============================================================
+
+class BulkVerifyRequest(BaseModel):
+    recognized: List[str]
+    assigned: List[Optional[str]]
+
+
+@app.post("/verify/bulk")
+def verify_bulk_api(
+    body: BulkVerifyRequest,
+    _: None = Depends(verify_api_key)
+):
+    if len(body.recognized) > VERIFY_BULK_MAX_PAIRS:
+        return JSONResponse(
+            status_code=413,
+            content={"error": f"More than {VERIFY_BULK_MAX_PAIRS} pairs"}
+        )
+
+    try:
+        with timed("verify"):
+            similarity, verdict = verify_plates_bulk(
+                body.recognized, body.assigned
+            )
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+
+    return {
+        # NaN (no reference) -> null
+        "similarity": np.where(
+            np.isnan(similarity), None, similarity
+        ).tolist(),
+        "verdict": verdict.tolist(),
+        "verdict_codes": VERDICT_CODES,
+    }
@@ -0,0 +1,121 @@
+# bench/backends.py
+#
+# python -m src.export
+# python -m bench.backends --images 40 --out bench_backends.json
+
+import json
+import argparse
+
+from bench.synth import make_dataset
+from bench.run import time_calls, chunks, plate_crops, char_crops
+from src.models import BACKENDS, registry
+
+# ============================================================
+# PER-BACKEND RUN
+# ============================================================
+
+def run_backend(backend, dataset, seed, batch_size):
+    """
+    Switch the registry to backend, then collect OCR top-1 labels,
+    plate strings and timings on the bench set
+    """
+    from src.ocr import ocr_crops_with_conf
+    from src.pipeline import (
+        detect_plates,
+        recognize_plates_batch,
+        recognize_plate_text,
+    )
+
+    registry.use_backend(backend)
+    registry.warmup()
+
+    images = [img for img, _ in dataset]
+    plates = plate_crops(dataset)
+    chars = char_crops(dataset, seed)
+
+    top1 = [topk[0][0] for topk in ocr_crops_with_conf(chars)]
+    texts = recognize_plates_batch(images)
+
+    timings = {
+        "detect_plates": time_calls(detect_plates, images),
+        "recognize_plate_text": time_calls(recognize_plate_text, plates),
+        "ocr_crops_with_conf[64]": time_calls(
+            ocr_crops_with_conf, chunks(chars, 64), units=len(chars)
+        ),
+        f"recognize_plates_batch[{batch_size}]": time_calls(
+            recognize_plates_batch, chunks(images, batch_size),
+            units=len(images)
+        ),
+    }
+    return top1, texts, timings
+
+# ============================================================
+# AGREEMENT + SPEEDUP
+# ============================================================
+
+def agreement(ref, out):
+    return sum(a == b for a, b in zip(ref, out)) / len(ref) if ref else 1.0
+
+
+def compare_backends(results):
+    """
+    results: {backend: (top1, texts, timings)}, must contain "eager".
+    Agreement is against eager; speedup is throughput over eager.
+    """
+    ref_top1, ref_texts, ref_times = results["eager"]
+    report = {}
+
+    for backend, (top1, texts, timings) in results.items():
+        report[backend] = {
+            "char_top1_agreement": agreement(ref_top1, top1),
+            "plate_string_agreement": agreement(ref_texts, texts),
+            "timings": timings,
+            "speedup": {
+                name: s["throughput_per_s"] / ref_times[name]["throughput_per_s"]
+                for name, s in timings.items()
+                if ref_times[name]["throughput_per_s"]
+            },
+        }
+    return report
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare inference backends")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS,
+                        default=list(BACKENDS))
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plates", type=int, default=4)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--out", default="bench_backends.json")
+    args = parser.parse_args(argv)
+
+    dataset = make_dataset(
+        args.images, seed=args.seed, n_plates=(1, args.max_plates)
+    )
+
+    backends = ["eager"] + [b for b in args.backends if b != "eager"]
+    results = {
+        b: run_backend(b, dataset, args.seed, args.batch_size)
+        for b in backends
+    }
+    report = compare_backends(results)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for backend, r in report.items():
+        print(f"{backend:12} top-1 agree {r['char_top1_agreement']:.4f}  "
+              f"plate agree {r['plate_string_agreement']:.4f}")
+        for name, s in r["timings"].items():
+            print(f"  {name:28} p50 {s['p50_ms']:8.2f} ms  "
+                  f"{s['throughput_per_s']:8.1f}/s  "
+                  f"{r['speedup'].get(name, float('nan')):5.2f}x")
+    print(f"\nwritten: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench/cascade.py
+#
+# python -m bench.cascade --images 40 --min-conf 0 0.5 0.7 0.9 --out bench_cascade.json
+
+import json
+import argparse
+
+from prometheus_client import REGISTRY
+
+from bench.run import plate_crops, time_calls
+from bench.synth import make_dataset
+
+# ============================================================
+# ONE THRESHOLD
+# ============================================================
+
+def crops_read(reader):
+    return REGISTRY.get_sample_value("vnpr_ocr_crops_total", {"reader": reader}) or 0.0
+
+
+def run_threshold(plates, texts, min_conf):
+    """
+    Recognize every ground-truth plate crop with CASCADE_MIN_CONF set to
+    min_conf. Returns latency stats, the share of crops MobileNet skipped
+    and the exact plate-string match rate.
+    """
+    import src.pipeline as pipeline
+
+    pipeline.CASCADE_MIN_CONF = min_conf
+    stats = time_calls(lambda p: pipeline.recognize_plates_text([p]), plates)
+
+    before = {r: crops_read(r) for r in ("detector", "classifier")}
+    preds = pipeline.recognize_plates_text(plates)
+    skipped = crops_read("detector") - before["detector"]
+    total = skipped + crops_read("classifier") - before["classifier"]
+
+    stats["classifier_skip_rate"] = skipped / total if total else 0.0
+    stats["exact_match_rate"] = (
+        sum(p == t for p, t in zip(preds, texts)) / len(texts) if texts else 0.0
+    )
+    return stats
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Char YOLO -> MobileNet cascade thresholds")
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-conf", type=float, nargs="+", default=[0, 0.5, 0.7, 0.9])
+    parser.add_argument("--out", default="bench_cascade.json")
+    args = parser.parse_args(argv)
+
+    from src.models import registry
+    registry.warmup()
+
+    dataset = make_dataset(args.images, seed=args.seed, n_plates=(1, 3))
+    plates = plate_crops(dataset)
+    texts = [t["text"] for _, truth in dataset for t in truth]
+
+    report = {
+        f"min_conf={m:g}": run_threshold(plates, texts, m)
+        for m in args.min_conf
+    }
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, s in report.items():
+        print(f"{name:14} p50 {s['p50_ms']:8.2f} ms  p99 {s['p99_ms']:8.2f} ms  "
+              f"skipped {s['classifier_skip_rate']:.3f}  exact {s['exact_match_rate']:.3f}")
+    print(f"\nwritten: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# bench/compare.py
+#
+# python -m bench.compare base.json new.json
+
+import sys
+import json
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(base, new):
+    rows = []
+    for section in ("stages", "end_to_end", "api"):
+        for name, b in base.get(section, {}).items():
+            n = new.get(section, {}).get(name)
+            if n is None:
+                continue
+            rows.append((
+                name,
+                b["p50_ms"], n["p50_ms"],
+                b["throughput_per_s"], n["throughput_per_s"],
+            ))
+    return rows
+
+
+def main(argv=None):
+    argv = argv if argv is not None else sys.argv[1:]
+    if len(argv) != 2:
+        raise SystemExit("usage: python -m bench.compare base.json new.json")
+
+    base, new = load(argv[0]), load(argv[1])
+
+    print(f"{'benchmark':28} {'p50 base':>10} {'p50 new':>10} "
+          f"{'thr base':>10} {'thr new':>10} {'speedup':>8}")
+    for name, bp, np_, bt, nt in compare(base, new):
+        speedup = nt / bt if bt else float("nan")
+        print(f"{name:28} {bp:10.2f} {np_:10.2f} {bt:10.1f} {nt:10.1f} {speedup:8.2f}x")
+
+    for key in ("plate_recall", "exact_match_rate"):
+        b = base.get("accuracy", {}).get(key)
+        n = new.get("accuracy", {}).get(key)
+        if b is not None and n is not None:
+            print(f"{key:28} {b:10.3f} {n:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
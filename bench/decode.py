@@ -0,0 +1,108 @@
+# bench/decode.py
+#
+# python -m bench.decode --images 20 --size 3840x2160 --out bench_decode.json
+
+import json
+import time
+import argparse
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from bench.run import summarize
+from bench.synth import make_dataset
+
+# ============================================================
+# ONE MODE (FULL vs REDUCED DECODE)
+# ============================================================
+
+def run_mode(jpegs, truth, min_side, iou_thr=0.5):
+    """
+    Decode + recognize every upload one by one, as /anpr does.
+    Returns latency stats, peak traced memory and plate recall.
+    """
+    from src.decode import decode_for_detection
+    from src.pipeline import detect_plate_boxes_batch, recognize_plates_batch
+    from src.utils import iou_matrix
+
+    def one(jpg):
+        return recognize_plates_batch([decode_for_detection(jpg, min_side, reduced=min_side > 0)])
+
+    for jpg in jpegs[:2]:
+        one(jpg)
+
+    decode_lat, lat, peaks = [], [], []
+    start = time.perf_counter()
+    for jpg in jpegs:
+        t = time.perf_counter()
+        decode_for_detection(jpg, min_side, reduced=min_side > 0)
+        decode_lat.append(time.perf_counter() - t)
+
+        tracemalloc.start()
+        t = time.perf_counter()
+        one(jpg)
+        lat.append(time.perf_counter() - t)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    wall = time.perf_counter() - start
+
+    found = total = 0
+    for jpg, gt in zip(jpegs, truth):
+        pred = detect_plate_boxes_batch([decode_for_detection(jpg, min_side, reduced=min_side > 0)])[0]
+        gt = np.array([t["box"] for t in gt], dtype=np.float64).reshape(-1, 4)
+        total += len(gt)
+        if len(pred) and len(gt):
+            found += int((iou_matrix(gt, pred.xyxy).max(1) >= iou_thr).sum())
+
+    stats = summarize(lat, wall, len(jpegs))
+    stats["decode_p50_ms"] = float(np.percentile(decode_lat, 50) * 1000)
+    stats["peak_mb_p50"] = float(np.percentile(peaks, 50) / 2**20)
+    stats["peak_mb_max"] = float(max(peaks) / 2**20)
+    stats["plate_recall"] = found / total if total else 0.0
+    return stats
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_size(text):
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Full vs reduced-resolution decode")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160))
+    parser.add_argument("--min-side", type=int, nargs="+", default=[960, 640])
+    parser.add_argument("--out", default="bench_decode.json")
+    args = parser.parse_args(argv)
+
+    from src.models import registry
+    registry.warmup()
+
+    w = args.size[0]
+    dataset = make_dataset(
+        args.images, seed=args.seed, size=args.size, n_plates=(1, 3),
+        plate_w=(w // 40, w // 12)
+    )
+    jpegs = [cv2.imencode(".jpg", img)[1].tobytes() for img, _ in dataset]
+    truth = [t for _, t in dataset]
+
+    report = {"full": run_mode(jpegs, truth, 0)}
+    for min_side in args.min_side:
+        report[f"reduced[{min_side}]"] = run_mode(jpegs, truth, min_side)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, s in report.items():
+        print(f"{name:14} p50 {s['p50_ms']:8.2f} ms  decode {s['decode_p50_ms']:7.2f} ms  "
+              f"peak {s['peak_mb_p50']:7.1f} MB  recall {s['plate_recall']:.3f}")
+    print(f"\nwritten: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,262 @@
+# bench/run.py
+#
+# python -m bench.run --images 40 --out bench_results.json
+# python -m bench.compare base.json new.json
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+from bench.synth import make_dataset, render_char, degrade
+
+# ============================================================
+# TIMING HELPERS
+# ============================================================
+
+def summarize(latencies, wall_s, units):
+    lat = np.asarray(latencies) * 1000.0
+    return {
+        "calls": len(lat),
+        "units": units,
+        "mean_ms": float(lat.mean()) if len(lat) else 0.0,
+        "p50_ms": float(np.percentile(lat, 50)) if len(lat) else 0.0,
+        "p90_ms": float(np.percentile(lat, 90)) if len(lat) else 0.0,
+        "p99_ms": float(np.percentile(lat, 99)) if len(lat) else 0.0,
+        "throughput_per_s": units / wall_s if wall_s > 0 else 0.0,
+    }
+
+
+def time_calls(fn, inputs, units=None, warmup=2):
+    """
+    Call fn once per input; latency per call, throughput in units/s
+    (units defaults to one per input)
+    """
+    for x in inputs[:warmup]:
+        fn(x)
+
+    latencies = []
+    start = time.perf_counter()
+    for x in inputs:
+        t = time.perf_counter()
+        fn(x)
+        latencies.append(time.perf_counter() - t)
+    wall = time.perf_counter() - start
+
+    return summarize(latencies, wall, units or len(inputs))
+
+
+def chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+# ============================================================
+# BENCHMARK INPUTS
+# ============================================================
+
+def plate_crops(dataset):
+    crops = []
+    for img, truth in dataset:
+        for t in truth:
+            x1, y1, x2, y2 = t["box"]
+            crops.append(img[y1:y2, x1:x2])
+    return crops
+
+
+def char_crops(dataset, seed):
+    rng = np.random.default_rng(seed)
+    return [
+        degrade(render_char(ch, size=int(rng.integers(24, 64))), rng)
+        for _, truth in dataset
+        for t in truth
+        for ch in t["text"]
+    ]
+
+# ============================================================
+# BENCHMARKS
+# ============================================================
+
+def bench_stages(dataset, seed):
+    from src.ocr import ocr_crop_with_conf, ocr_crops_with_conf
+    from src.pipeline import detect_plates, recognize_plate_text
+    from src.grammar import plate_grammar
+    from src.postprocess import apply_plate_grammar
+
+    images = [img for img, _ in dataset]
+    plates = plate_crops(dataset)
+    chars = char_crops(dataset, seed)
+    lines = [[list(t["text"])] for _, truth in dataset for t in truth]
+    topks = [[[(c, 1.0)] for c in line[0]] for line in lines]
+
+    return {
+        "detect_plates": time_calls(detect_plates, images),
+        "recognize_plate_text": time_calls(recognize_plate_text, plates),
+        "ocr_crop_with_conf": time_calls(ocr_crop_with_conf, chars),
+        "ocr_crops_with_conf[10]": time_calls(
+            ocr_crops_with_conf, chunks(chars, 10), units=len(chars)
+        ),
+        "apply_plate_grammar": time_calls(apply_plate_grammar, lines),
+        "plate_grammar.decode_batch[all]": time_calls(
+            plate_grammar.decode_batch, [topks], units=len(topks)
+        ),
+    }
+
+
+def bench_end_to_end(dataset, batch_sizes):
+    from src.pipeline import run_anpr_batch
+
+    images = [img for img, _ in dataset]
+    return {
+        f"run_anpr_batch[{bs}]": time_calls(
+            run_anpr_batch, chunks(images, bs), units=len(images)
+        )
+        for bs in batch_sizes
+    }
+
+
+def bench_api(dataset, concurrency_levels):
+    os.environ.setdefault("FACE_API_KEY", "bench")
+    from fastapi.testclient import TestClient
+    import api
+
+    jpegs = [cv2.imencode(".jpg", img)[1].tobytes() for img, _ in dataset]
+    headers = {"x-api-key": os.environ["FACE_API_KEY"]}
+    out = {}
+
+    with TestClient(api.app) as client:
+        for _ in range(600):
+            if client.get("/ready").status_code == 200:
+                break
+            time.sleep(0.1)
+
+        def post(jpg):
+            t = time.perf_counter()
+            r = client.post(
+                "/anpr",
+                files={"image": ("bench.jpg", jpg, "image/jpeg")},
+                headers=headers
+            )
+            return time.perf_counter() - t, r.status_code
+
+        for conc in concurrency_levels:
+            if api.cache is not None:
+                api.cache._items.clear()   # measure the pipeline, not the cache
+            start = time.perf_counter()
+            with ThreadPoolExecutor(conc) as pool:
+                res = list(pool.map(post, jpegs))
+            wall = time.perf_counter() - start
+
+            stats = summarize([r[0] for r in res], wall, len(jpegs))
+            stats["errors"] = sum(r[1] != 200 for r in res)
+            out[f"/anpr[c={conc}]"] = stats
+
+    return out
+
+
+def accuracy(dataset, iou_thr=0.5):
+    """
+    Plate detection recall (IoU >= iou_thr against ground truth) and
+    exact plate-string match rate over all ground-truth plates
+    """
+    from src.pipeline import detect_plate_boxes_batch, recognize_plates_batch
+    from src.utils import iou_matrix
+
+    images = [img for img, _ in dataset]
+    boxes = detect_plate_boxes_batch(images)
+    texts = recognize_plates_batch(images)
+
+    total = found = exact = 0
+    for (_, truth), pred_boxes, pred_texts in zip(dataset, boxes, texts):
+        gt = np.array([t["box"] for t in truth], dtype=np.float64).reshape(-1, 4)
+        total += len(gt)
+        if len(pred_boxes) and len(gt):
+            found += int((iou_matrix(gt, pred_boxes.xyxy).max(1) >= iou_thr).sum())
+        exact += len({t["text"] for t in truth} & set(pred_texts))
+
+    return {
+        "plates": total,
+        "plate_recall": found / total if total else 0.0,
+        "exact_match_rate": exact / total if total else 0.0,
+    }
+
+# ============================================================
+# RUN METADATA
+# ============================================================
+
+def metadata(args):
+    import torch
+    from src import config
+    from src.models import registry
+
+    try:
+        rev = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        rev = None
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_rev": rev,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "device": registry.device,
+        "ocr_preprocess": config.OCR_PREPROCESS,
+        "args": vars(args),
+    }
+
+# ============================================================
+# CLI
+# ============================================================
+
+def parse_int_list(text):
+    return [int(x) for x in text.split(",") if x]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="VNPR benchmark suite")
+    parser.add_argument("--images", type=int, default=40)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-plates", type=int, default=4)
+    parser.add_argument("--batch-sizes", type=parse_int_list, default=[1, 4, 8])
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4, 8])
+    parser.add_argument("--skip-api", action="store_true")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    from src.models import registry
+    registry.warmup()
+
+    dataset = make_dataset(
+        args.images, seed=args.seed, n_plates=(1, args.max_plates)
+    )
+
+    report = {"meta": metadata(args)}
+    report["stages"] = bench_stages(dataset, args.seed)
+    report["end_to_end"] = bench_end_to_end(dataset, args.batch_sizes)
+    if not args.skip_api:
+        report["api"] = bench_api(dataset, args.concurrency)
+    report["accuracy"] = accuracy(dataset)
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for section in ("stages", "end_to_end", "api"):
+        for name, s in report.get(section, {}).items():
+            print(f"{name:28} p50 {s['p50_ms']:8.2f} ms  "
+                  f"p99 {s['p99_ms']:8.2f} ms  {s['throughput_per_s']:8.1f}/s")
+    print(json.dumps(report["accuracy"]))
+    print(f"\nwritten: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
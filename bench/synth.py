@@ -0,0 +1,161 @@
+# bench/synth.py
+
+import string
+
+import cv2
+import numpy as np
+
+from src.config import VALID_STATES
+
+# ============================================================
+# PLATE TEXT (STATE / DISTRICT / SERIES / NUMBER)
+# ============================================================
+
+LETTERS = string.ascii_uppercase
+DIGITS = string.digits
+STATES = sorted(VALID_STATES)
+
+
+def random_plate_text(rng):
+    """
+    e.g. KA03AN6757: state (2 letters), district (2 digits),
+    series (2 letters), number (4 digits)
+    """
+    return (
+        str(rng.choice(STATES))
+        + "".join(rng.choice(list(DIGITS), 2))
+        + "".join(rng.choice(list(LETTERS), 2))
+        + "".join(rng.choice(list(DIGITS), 4))
+    )
+
+# ============================================================
+# PLATE RENDERING
+# ============================================================
+
+FONT = cv2.FONT_HERSHEY_DUPLEX
+
+
+def _put_centered(img, text, cy, scale, thickness):
+    (tw, th), _ = cv2.getTextSize(text, FONT, scale, thickness)
+    x = (img.shape[1] - tw) // 2
+    cv2.putText(img, text, (x, cy + th // 2), FONT, scale,
+                (20, 20, 20), thickness, cv2.LINE_AA)
+
+
+def render_plate(text, two_line=False, char_h=48):
+    """
+    Plate text -> clean BGR plate image (white plate, black border/text)
+    """
+    scale = char_h / 22.0
+    thickness = max(2, char_h // 12)
+
+    if two_line:
+        top, bottom = text[:4], text[4:]
+        (tw, _), _ = cv2.getTextSize(bottom, FONT, scale, thickness)
+        w, h = tw + char_h, int(char_h * 3.2)
+        img = np.full((h, w, 3), 245, dtype=np.uint8)
+        _put_centered(img, top, int(h * 0.3), scale, thickness)
+        _put_centered(img, bottom, int(h * 0.72), scale, thickness)
+    else:
+        (tw, _), _ = cv2.getTextSize(text, FONT, scale, thickness)
+        w, h = tw + char_h, int(char_h * 1.8)
+        img = np.full((h, w, 3), 245, dtype=np.uint8)
+        _put_centered(img, text, h // 2, scale, thickness)
+
+    cv2.rectangle(img, (2, 2), (w - 3, h - 3), (20, 20, 20), 2)
+    return img
+
+
+def render_char(ch, size=48):
+    """
+    Single glyph crop, for OCR-only benchmarks
+    """
+    img = np.full((size, int(size * 0.7), 3), 245, dtype=np.uint8)
+    _put_centered(img, ch, size // 2, size / 30.0, max(2, size // 16))
+    return img
+
+# ============================================================
+# DEGRADATIONS
+# ============================================================
+
+def degrade(img, rng, noise=8.0, blur=1.0):
+    """
+    Gaussian blur + sensor noise; sigmas are randomized up to the limits
+    """
+    k = int(rng.uniform(0, blur) * 2) * 2 + 1
+    if k > 1:
+        img = cv2.GaussianBlur(img, (k, k), 0)
+    if noise > 0:
+        n = rng.normal(0, rng.uniform(0, noise), img.shape)
+        img = np.clip(img.astype(np.float32) + n, 0, 255).astype(np.uint8)
+    return img
+
+
+def perspective(img, rng, max_skew=0.08):
+    """
+    Random perspective warp of a plate; returns the warped plate on a
+    transparent-free (edge replicated) canvas of the same size
+    """
+    h, w = img.shape[:2]
+    src = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+    jitter = rng.uniform(-max_skew, max_skew, (4, 2)) * [w, h]
+    dst = np.float32(src + jitter)
+    m = cv2.getPerspectiveTransform(src, dst)
+    return cv2.warpPerspective(img, m, (w, h), borderMode=cv2.BORDER_REPLICATE)
+
+# ============================================================
+# SCENES (PLATES PLACED ON A BACKGROUND)
+# ============================================================
+
+def render_scene(rng, size=(1280, 720), n_plates=1, two_line_p=0.3,
+                 plate_w=(140, 320), noise=8.0, blur=1.0, skew=0.08):
+    """
+    Returns (BGR image, [{"text", "two_line", "box"}, ...]).
+    Plates never overlap; boxes are (x1, y1, x2, y2) in image pixels.
+    n_plates may be an int or an inclusive (min, max) range.
+    """
+    W, H = size
+    if isinstance(n_plates, tuple):
+        n_plates = int(rng.integers(n_plates[0], n_plates[1] + 1))
+    base = rng.integers(60, 160, 3)
+    img = np.clip(
+        base + rng.normal(0, 20, (H, W, 3)), 0, 255
+    ).astype(np.uint8)
+    img = cv2.GaussianBlur(img, (9, 9), 0)
+
+    truth = []
+    for _ in range(n_plates):
+        text = random_plate_text(rng)
+        two_line = bool(rng.random() < two_line_p)
+        plate = perspective(render_plate(text, two_line), rng, skew)
+
+        target_w = int(rng.uniform(*plate_w))
+        scale = target_w / plate.shape[1]
+        plate = cv2.resize(plate, None, fx=scale, fy=scale,
+                           interpolation=cv2.INTER_AREA)
+        ph, pw = plate.shape[:2]
+
+        for _ in range(50):
+            x, y = int(rng.integers(0, W - pw)), int(rng.integers(0, H - ph))
+            box = (x, y, x + pw, y + ph)
+            if all(
+                box[2] <= t["box"][0] or box[0] >= t["box"][2]
+                or box[3] <= t["box"][1] or box[1] >= t["box"][3]
+                for t in truth
+            ):
+                break
+        else:
+            continue
+
+        img[y:y + ph, x:x + pw] = plate
+        truth.append({"text": text, "two_line": two_line, "box": box})
+
+    return degrade(img, rng, noise, blur), truth
+
+
+def make_dataset(n_images, seed=0, **scene_kwargs):
+    """
+    Deterministic list of (image, truth) scenes
+    """
+    rng = np.random.default_rng(seed)
+    return [render_scene(rng, **scene_kwargs) for _ in range(n_images)]
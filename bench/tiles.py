@@ -0,0 +1,91 @@
+# bench/tiles.py
+#
+# python -m bench.tiles --images 20 --size 3840x2160 --out bench_tiles.json
+
+import json
+import argparse
+
+import numpy as np
+
+from bench.decode import parse_size
+from bench.run import time_calls
+from bench.synth import make_dataset
+
+# ============================================================
+# RECALL
+# ============================================================
+
+def recall(dataset, tiled, iou_thr=0.5):
+    """
+    Fraction of ground-truth plates matched (IoU >= iou_thr), overall
+    and for plates narrower than 80 px
+    """
+    from src.pipeline import detect_plate_boxes_batch
+    from src.utils import iou_matrix
+
+    found = total = small_found = small_total = 0
+    for img, truth in dataset:
+        pred = detect_plate_boxes_batch([img], tiled)[0]
+        gt = np.array([t["box"] for t in truth], dtype=np.float64).reshape(-1, 4)
+        hit = np.zeros(len(gt), dtype=bool)
+        if len(pred) and len(gt):
+            hit = iou_matrix(gt, pred.xyxy).max(1) >= iou_thr
+        small = (gt[:, 2] - gt[:, 0]) < 80
+
+        total += len(gt)
+        found += int(hit.sum())
+        small_total += int(small.sum())
+        small_found += int((hit & small).sum())
+
+    return {
+        "plates": total,
+        "plate_recall": found / total if total else 0.0,
+        "small_plates": small_total,
+        "small_plate_recall": small_found / small_total if small_total else 0.0,
+    }
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-pass vs tiled plate detection")
+    parser.add_argument("--images", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--size", type=parse_size, default=(3840, 2160))
+    parser.add_argument("--plate-w", type=int, nargs=2, default=[40, 160])
+    parser.add_argument("--out", default="bench_tiles.json")
+    args = parser.parse_args(argv)
+
+    from src.models import registry
+    from src.pipeline import detect_plates, recognize_plates_batch
+    registry.warmup()
+
+    dataset = make_dataset(
+        args.images, seed=args.seed, size=args.size, n_plates=(1, 4),
+        plate_w=tuple(args.plate_w)
+    )
+    images = [img for img, _ in dataset]
+
+    report = {}
+    for name, tiled in (("single", False), ("tiled", True)):
+        report[name] = {
+            "detect_plates": time_calls(lambda img: detect_plates(img, tiled), images),
+            "recognize_plates_batch[1]": time_calls(
+                lambda img: recognize_plates_batch([img], tiled), images
+            ),
+            **recall(dataset, tiled),
+        }
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for name, r in report.items():
+        d = r["detect_plates"]
+        print(f"{name:8} detect p50 {d['p50_ms']:8.2f} ms  p99 {d['p99_ms']:8.2f} ms  "
+              f"recall {r['plate_recall']:.3f}  small {r['small_plate_recall']:.3f}")
+    print(f"\nwritten: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
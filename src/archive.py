@@ -0,0 +1,121 @@
+# src/archive.py
+
+import io
+import os
+import csv
+import zlib
+import tarfile
+import zipfile
+
+# ============================================================
+# CONFIG
+# ============================================================
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+MANIFEST_NAME = "manifest.csv"
+
+# ============================================================
+# ERRORS
+# ============================================================
+
+class BatchLimitError(ValueError):
+    """
+    Raised when a batch exceeds the item-count or size limit
+    """
+
+# ============================================================
+# MANIFEST (image, assigned vehicle number)
+# ============================================================
+
+def manifest_rows(lines):
+    """
+    CSV lines of (image name / path, assigned number) -> (name, assigned
+    or None) pairs, streamed. A header row and a missing / empty number
+    are both allowed.
+    """
+    for i, row in enumerate(csv.reader(lines)):
+        if not row or not row[0].strip():
+            continue
+        name = row[0].strip()
+        if i == 0 and name.lower() in ("filename", "image", "image_path", "path"):
+            continue
+        assigned = row[1].strip() if len(row) > 1 else ""
+        yield name, assigned or None
+
+
+def parse_manifest(text):
+    """
+    Manifest CSV text -> {name: assigned number or None}
+    """
+    return dict(manifest_rows(io.StringIO(text)))
+
+# ============================================================
+# ARCHIVE READING (ZIP / TAR)
+# ============================================================
+
+def is_image_name(name):
+    base = os.path.basename(name)
+    return (
+        not base.startswith(".")
+        and not name.startswith("__MACOSX")
+        and os.path.splitext(base)[1].lower() in IMAGE_EXTENSIONS
+    )
+
+
+def _check_limits(count, total, max_items, max_bytes):
+    if count > max_items:
+        raise BatchLimitError(f"Batch exceeds {max_items} images")
+    if total > max_bytes:
+        raise BatchLimitError(f"Batch exceeds {max_bytes} bytes")
+
+
+def _zip_members(data, max_items, max_bytes):
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+        images = [i for i in infos if is_image_name(i.filename)]
+        # sizes come from the central directory, checked before inflating
+        _check_limits(len(images), sum(i.file_size for i in images),
+                      max_items, max_bytes)
+
+        manifest = None
+        for info in infos:
+            if os.path.basename(info.filename) == MANIFEST_NAME:
+                manifest = zf.read(info).decode("utf-8-sig")
+
+        return [(i.filename, zf.read(i)) for i in images], manifest
+
+
+def _tar_members(data, max_items, max_bytes):
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:*") as tf:
+        infos = [m for m in tf.getmembers() if m.isfile()]
+        images = [m for m in infos if is_image_name(m.name)]
+        _check_limits(len(images), sum(m.size for m in images),
+                      max_items, max_bytes)
+
+        manifest = None
+        for info in infos:
+            if os.path.basename(info.name) == MANIFEST_NAME:
+                manifest = tf.extractfile(info).read().decode("utf-8-sig")
+
+        return [(m.name, tf.extractfile(m).read()) for m in images], manifest
+
+
+def read_archive(data, max_items, max_bytes):
+    """
+    Zip / tar(.gz) bytes -> ([(name, contents), ...], manifest dict).
+    An optional manifest.csv inside the archive pairs image names with
+    assigned vehicle numbers. Unreadable archives raise ValueError.
+    """
+    try:
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            members, manifest = _zip_members(data, max_items, max_bytes)
+        else:
+            members, manifest = _tar_members(data, max_items, max_bytes)
+    except tarfile.TarError:
+        raise ValueError("Archive must be a zip or tar file")
+    except (zipfile.BadZipFile, zlib.error, EOFError, NotImplementedError) as e:
+        # corrupt / truncated members, unsupported compression
+        raise ValueError(f"Corrupt archive: {e}")
+
+    manifest = parse_manifest(manifest) if manifest else {}
+    return members, manifest
@@ -0,0 +1,515 @@
+# src/batch.py
+#
+# python vnpr.py --batch /archive/2025 --out results.jsonl --workers 4
+# python vnpr.py --batch "cams/**/*.jpg" --out results.csv
+# python vnpr.py --batch manifest.csv --out results.parquet --resume
+
+import io
+import os
+import csv
+import glob
+import json
+import time
+import shutil
+import tempfile
+import itertools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from prometheus_client import REGISTRY, CollectorRegistry
+
+from src.archive import is_image_name, manifest_rows
+from src.config import WORKER_STALE_S
+from src.decode import decode_for_detection, decode_policy
+from src.metrics import STAGES, timed
+from src.pipeline import recognize_plates_batch, verify_plates
+
+FORMATS = {".jsonl": "jsonl", ".json": "jsonl", ".csv": "csv", ".parquet": "parquet"}
+
+class BatchFailedError(RuntimeError):
+    """
+    An inference batch failed as a whole (e.g. its worker crashed)
+    """
+
+
+FIELDS = (
+    "image",
+    "assigned_vehicle_number",
+    "recognized_vehicle_number",
+    "similarity",
+    "verdict",
+    "matched",
+    "plates",
+    "error",
+)
+
+# ============================================================
+# INPUTS (DIRECTORY / GLOB / CSV MANIFEST)
+# ============================================================
+
+def iter_inputs(source):
+    """
+    Directory (recursive), glob pattern or CSV manifest of (image path,
+    assigned number) -> iterator of (path, assigned or None) pairs. The
+    order is stable, so an interrupted run resumes by count. A missing
+    manifest raises FileNotFoundError here rather than matching nothing.
+    """
+    if os.path.isdir(source):
+        return _walk_images(source)
+
+    if source.lower().endswith(".csv") and not glob.has_magic(source):
+        if not os.path.isfile(source):
+            raise FileNotFoundError(f"Manifest not found: {source}")
+        return _manifest_images(source)
+
+    return _glob_images(source)
+
+
+def _walk_images(source):
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if is_image_name(name):
+                yield os.path.join(root, name), None
+
+
+def _manifest_images(source):
+    # relative image paths are relative to the manifest
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="", encoding="utf-8-sig") as f:
+        for name, assigned in manifest_rows(f):
+            yield os.path.join(base, name), assigned
+
+
+def _glob_images(source):
+    for path in sorted(glob.glob(source, recursive=True)):
+        if os.path.isfile(path) and is_image_name(path):
+            yield path, None
+
+
+def load_image(path, reduced=False):
+    """
+    Image file -> (image, None) or (None, error). reduced: large JPEGs
+    may come back as a ReducedImage, as decode_policy decides
+    (in-process inference only)
+    """
+    try:
+        with timed("read"):
+            with open(path, "rb") as f:
+                contents = f.read()
+    except OSError as e:
+        return None, str(e)
+
+    with timed("decode"):
+        if reduced:
+            img = decode_for_detection(contents)
+        else:
+            img = cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
+
+    return (img, None) if img is not None else (None, "Invalid image file")
+
+
+def prefetch(pool, fn, items, depth):
+    """
+    (item, fn(item)) in input order, with fn running on pool at most
+    depth items ahead of the consumer
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, pool.submit(fn, item)))
+        if len(pending) >= depth:
+            item, future = pending.popleft()
+            yield item, future.result()
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+
+
+def chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+# ============================================================
+# RESULT ROWS
+# ============================================================
+
+def result_row(path, assigned, plate_texts=None, error=None):
+    """
+    One image -> output row; the best plate is picked as /anpr does
+    """
+    row = dict.fromkeys(FIELDS)
+    row.update(image=path, assigned_vehicle_number=assigned, plates=[], error=error)
+    if error is not None:
+        return row
+
+    results = verify_plates(plate_texts, assigned)
+    row["plates"] = list(plate_texts)
+    if not results:
+        row.update(similarity=0.0, verdict="NO_PLATE_DETECTED", matched=False)
+        return row
+
+    best = results[0]
+    row.update(
+        recognized_vehicle_number=best["recognized"],
+        similarity=float(best.get("similarity", 0.0)),
+        verdict=best["verdict"],
+        matched=best["verdict"] == "MATCH",
+    )
+    return row
+
+# ============================================================
+# OUTPUT WRITERS (APPEND + CHECKPOINT POSITION)
+# ============================================================
+
+class _FileWriter:
+    """
+    Appends encoded rows to one file. position is a byte offset: on
+    resume, anything written after the last checkpoint is cut off.
+    """
+
+    def __init__(self, path, position=0):
+        self._f = open(path, "r+b" if position else "wb")
+        self._f.truncate(position)
+        self._f.seek(position)
+        if not position:
+            self._f.write(self.header())
+
+    def header(self):
+        return b""
+
+    def write(self, rows):
+        self._f.write(b"".join(self.encode(row) for row in rows))
+
+    def checkpoint(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        return self._f.tell()
+
+    def close(self):
+        self._f.close()
+
+
+class JsonlWriter(_FileWriter):
+    def encode(self, row):
+        return (json.dumps(row) + "\n").encode("utf-8")
+
+
+class CsvWriter(_FileWriter):
+    def _line(self, values):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(values)
+        return buf.getvalue().encode("utf-8")
+
+    def header(self):
+        return self._line(FIELDS)
+
+    def encode(self, row):
+        row = {**row, "plates": " ".join(row["plates"])}
+        return self._line(["" if row[k] is None else row[k] for k in FIELDS])
+
+
+class ParquetWriter:
+    """
+    Parquet files cannot be appended to, so the output is a directory of
+    part files, one per checkpoint; position is the part count
+    """
+
+    def __init__(self, path, position=0):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow)")
+
+        self._pa, self._pq = pa, pq
+        self._schema = pa.schema([
+            ("image", pa.string()),
+            ("assigned_vehicle_number", pa.string()),
+            ("recognized_vehicle_number", pa.string()),
+            ("similarity", pa.float64()),
+            ("verdict", pa.string()),
+            ("matched", pa.bool_()),
+            ("plates", pa.list_(pa.string())),
+            ("error", pa.string()),
+        ])
+        self.path = path
+        self.parts = position
+        self._rows = []
+
+        os.makedirs(path, exist_ok=True)
+        for name in os.listdir(path):
+            if name.startswith("part-") and int(name[5:11]) >= position:
+                os.remove(os.path.join(path, name))
+
+    def write(self, rows):
+        self._rows.extend(rows)
+
+    def checkpoint(self):
+        if self._rows:
+            table = self._pa.Table.from_pylist(self._rows, schema=self._schema)
+            self._pq.write_table(
+                table, os.path.join(self.path, f"part-{self.parts:06d}.parquet")
+            )
+            self.parts += 1
+            self._rows = []
+        return self.parts
+
+    def close(self):
+        pass
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+
+
+def output_format(path, fmt=None):
+    fmt = fmt or FORMATS.get(os.path.splitext(path)[1].lower())
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown output format for {path}; use --format jsonl|csv|parquet")
+    return fmt
+
+# ============================================================
+# CHECKPOINT
+# ============================================================
+
+def checkpoint_path(out):
+    return out.rstrip("/\\") + ".ckpt.json"
+
+
+def load_checkpoint(out, source, fmt, resume):
+    """
+    Saved progress for out when resuming, else a fresh state. Refuses to
+    overwrite an existing output without --resume.
+    """
+    path = checkpoint_path(out)
+    if resume and os.path.exists(path):
+        with open(path) as f:
+            state = json.load(f)
+        if state["source"] != source or state["format"] != fmt:
+            raise ValueError(f"{path} belongs to a run over {state['source']} ({state['format']})")
+        return state
+
+    if os.path.exists(out):
+        raise FileExistsError(f"{out} exists: pass --resume to continue it, or remove it")
+
+    return {"source": source, "format": fmt, "done": 0, "position": 0,
+            "errors": 0, "plates": 0, "complete": False}
+
+
+def save_checkpoint(out, state):
+    path = checkpoint_path(out)
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+# ============================================================
+# INFERENCE ENGINES
+# ============================================================
+
+class InProcessEngine:
+    """
+    WorkerPool's submit() interface, run synchronously in this process
+    """
+
+    def submit(self, images, tiled=False):
+        future = Future()
+        try:
+            future.set_result(recognize_plates_batch(images, tiled))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def shutdown(self):
+        pass
+
+
+def start_engine(workers, torch_threads):
+    if workers <= 0:
+        return InProcessEngine()
+
+    from src.workers import WorkerPool
+
+    pool = WorkerPool(
+        num_workers=workers, torch_threads=torch_threads, stale_s=WORKER_STALE_S
+    )
+    pool.start()
+    return pool
+
+# ============================================================
+# STAGE TIMING SUMMARY
+# ============================================================
+
+def stage_totals(multiproc_dir=None, registry_too=True):
+    """
+    vnpr_stage_seconds -> {stage: (calls, seconds)}, from this process
+    and / or the worker processes' multiprocess directory
+    """
+    registries = [REGISTRY] if registry_too else []
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+        registries.append(registry)
+
+    totals = {}
+    for registry in registries:
+        for metric in registry.collect():
+            if metric.name != "vnpr_stage_seconds":
+                continue
+            for sample in metric.samples:
+                calls, seconds = totals.get(sample.labels.get("stage"), (0, 0.0))
+                if sample.name.endswith("_count"):
+                    calls += int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    seconds += sample.value
+                else:
+                    continue
+                totals[sample.labels["stage"]] = (calls, seconds)
+    return totals
+
+
+def print_summary(summary):
+    print(f"\nimages {summary['images']}  errors {summary['errors']}  "
+          f"plates {summary['plates']}  in {summary['wall_s']:.1f} s  "
+          f"-> {summary['images_per_s']:.2f} images/s")
+    if summary["interrupted"]:
+        print(f"interrupted: {summary['done']} done, rerun with --resume")
+    if summary["failed"]:
+        print(f"stopped: {summary['failed']}\n{summary['done']} done, rerun with --resume")
+
+    print(f"\n{'stage':14}{'calls':>10}{'total s':>12}{'mean ms':>10}")
+    for stage, (calls, seconds) in summary["stages"].items():
+        mean = seconds / calls * 1000 if calls else 0.0
+        print(f"{stage:14}{calls:>10}{seconds:>12.2f}{mean:>10.2f}")
+    print("(stage totals add up across reader threads and workers, not wall time)")
+
+# ============================================================
+# BATCH RUN
+# ============================================================
+
+def run_batch(source, out, fmt=None, workers=0, readers=4, batch_size=8,
+              tiled=False, checkpoint_every=1000, resume=False, torch_threads=1):
+    """
+    Recognize every image of source, writing one row per image to out
+    in input order. Progress is checkpointed every checkpoint_every
+    images (and on Ctrl-C, or when a whole batch fails: the run stops
+    before it); resume=True continues from the checkpoint.
+    Returns the run summary.
+    """
+    fmt = output_format(out, fmt)
+    inputs = iter_inputs(source)
+    state = load_checkpoint(out, source, fmt, resume)
+    start_done = state["done"]
+
+    # worker processes record stage timings into a multiprocess directory
+    preset_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    metrics_dir = None
+    if workers > 0 and not preset_dir:
+        metrics_dir = tempfile.mkdtemp(prefix="vnpr-metrics-")
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = metrics_dir
+
+    engine = start_engine(workers, torch_threads)
+    writer = WRITERS[fmt](out, state["position"])
+    reader = ThreadPoolExecutor(max(1, readers), thread_name_prefix="vnpr-read")
+
+    # ReducedImage decodes only in-process; workers take full arrays
+    reduced = workers <= 0 and not tiled
+    in_flight = max(1, workers) * 2
+    since_checkpoint = 0
+    interrupted = False
+    failed = None
+
+    def checkpoint():
+        nonlocal since_checkpoint
+        with timed("write"):
+            state["position"] = writer.checkpoint()
+        save_checkpoint(out, state)
+        since_checkpoint = 0
+
+    def submit(chunk):
+        images = [img for _, (img, _) in chunk if img is not None]
+        return chunk, engine.submit(images, tiled) if images else None
+
+    def finish(chunk, future):
+        nonlocal since_checkpoint
+        try:
+            texts = iter(future.result() if future is not None else ())
+        except Exception as e:
+            # nothing of this batch is written, so --resume retries it
+            raise BatchFailedError(f"batch from {chunk[0][0][0]} failed: {e}") from e
+
+        rows = []
+        for (path, assigned), (img, error) in chunk:
+            if img is None:
+                rows.append(result_row(path, assigned, error=error))
+            else:
+                rows.append(result_row(path, assigned, next(texts)))
+                if reduced:
+                    decode_policy.observe(bool(rows[-1]["plates"]))
+
+        with timed("write"):
+            writer.write(rows)
+        state["done"] += len(rows)
+        state["errors"] += sum(r["error"] is not None for r in rows)
+        state["plates"] += sum(len(r["plates"]) for r in rows)
+        since_checkpoint += len(rows)
+        if since_checkpoint >= checkpoint_every:
+            checkpoint()
+
+    start = time.perf_counter()
+    try:
+        inputs = itertools.islice(inputs, state["done"], None)
+        loaded = prefetch(
+            reader, lambda item: load_image(item[0], reduced), inputs,
+            depth=max(1, readers) * batch_size * 2
+        )
+
+        pending = deque()
+        for chunk in chunks(loaded, batch_size):
+            pending.append(submit(chunk))
+            if len(pending) >= in_flight:
+                finish(*pending.popleft())
+        while pending:
+            finish(*pending.popleft())
+        state["complete"] = True
+    except KeyboardInterrupt:
+        interrupted = True
+    except BatchFailedError as e:
+        # stop at the failed batch; the checkpoint keeps everything before it
+        failed = str(e)
+    finally:
+        checkpoint()
+        writer.close()
+        reader.shutdown(wait=False, cancel_futures=True)
+        engine.shutdown()
+
+    wall = time.perf_counter() - start
+    done = state["done"] - start_done
+
+    if preset_dir:
+        stages = stage_totals(preset_dir, registry_too=False)
+    else:
+        stages = stage_totals(metrics_dir)
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        del os.environ["PROMETHEUS_MULTIPROC_DIR"]
+
+    return {
+        "output": out,
+        "format": fmt,
+        "images": done,
+        "done": state["done"],
+        "errors": state["errors"],
+        "plates": state["plates"],
+        "wall_s": wall,
+        "images_per_s": done / wall if wall else 0.0,
+        "interrupted": interrupted,
+        "failed": failed,
+        "stages": {s: stages[s] for s in STAGES if s in stages},
+    }
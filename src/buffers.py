@@ -0,0 +1,198 @@
+# src/buffers.py
+
+import os
+import sys
+import resource
+import threading
+from contextlib import contextmanager
+
+import torch
+
+from src.config import BUFFER_MAX_IDLE, BUFFER_SHRINK_AFTER
+
+# ============================================================
+# PROCESS MEMORY
+# ============================================================
+
+def rss_bytes():
+    """
+    Current resident set size (Linux), else None
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss_bytes():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+# ============================================================
+# BUFFER POOL
+# ============================================================
+
+class _Buffers:
+    """
+    Idle tensors of one registered input, and its counters
+    """
+
+    def __init__(self, row_shape, rows, dtype, device, pin):
+        self.row_shape = row_shape
+        self.min_rows = self.rows = rows
+        self.dtype = dtype
+        self.device = device
+        self.pin = pin
+
+        self.idle = []
+        self.in_use = 0
+        self.bytes = 0
+        self.leases = self.hits = self.misses = 0
+        self.grows = self.shrinks = 0
+
+        # since the last shrink check
+        self.window_leases = self.window_in_use = self.window_rows = 0
+
+    def allocate(self):
+        buf = torch.empty(
+            (self.rows, *self.row_shape),
+            dtype=self.dtype,
+            device=self.device,
+            pin_memory=self.pin
+        )
+        self.bytes += buf.nelement() * buf.element_size()
+        return buf
+
+    def drop(self, buf):
+        self.bytes -= buf.nelement() * buf.element_size()
+
+
+class BufferPool:
+    """
+    Preallocated model input tensors, leased for one batch and then
+    reused by later requests instead of being reallocated per call.
+    Each registered input keeps up to max_idle buffers (one per batch in
+    flight). Policy:
+      grow   : a batch larger than the buffer size raises the size for
+               every later allocation (the old buffer is dropped)
+      shrink : every shrink_after leases, idle buffers are cut to the
+               peak number in use at once, and the size falls back to
+               the largest batch seen (never below the registered size)
+    """
+
+    def __init__(self, max_idle=BUFFER_MAX_IDLE, shrink_after=BUFFER_SHRINK_AFTER):
+        self.max_idle = max_idle
+        self.shrink_after = shrink_after
+        self._lock = threading.Lock()
+        self._buffers = {}
+
+    def register(self, name, row_shape, rows, dtype=torch.float32, device="cpu", pin=False):
+        """
+        Declare an input of (rows, *row_shape). pin: page-locked host
+        memory, for non_blocking copies to a GPU (ignored without CUDA)
+        """
+        device = torch.device(device)
+        pin = pin and device.type == "cpu" and torch.cuda.is_available()
+
+        with self._lock:
+            if name not in self._buffers:
+                self._buffers[name] = _Buffers(tuple(row_shape), rows, dtype, device, pin)
+
+    def __contains__(self, name):
+        return name in self._buffers
+
+    def reserve(self, name, count=1):
+        """
+        Allocate idle buffers up front (e.g. at warmup)
+        """
+        with self._lock:
+            b = self._buffers[name]
+            while len(b.idle) < min(count, self.max_idle):
+                b.idle.append(b.allocate())
+
+    @contextmanager
+    def lease(self, name, n):
+        """
+        (n, *row_shape) view of a pooled buffer; the buffer goes back to
+        the pool on exit, so the view must not be used afterwards
+        """
+        with self._lock:
+            b = self._buffers[name]
+            b.leases += 1
+            b.window_leases += 1
+
+            if n > b.rows:
+                b.rows = n
+                b.grows += 1
+
+            fits = [buf for buf in b.idle if len(buf) >= n]
+            if fits:
+                buf = min(fits, key=len)
+                b.idle.remove(buf)
+                b.hits += 1
+            else:
+                buf = b.allocate()
+                b.misses += 1
+
+            b.in_use += 1
+            b.window_in_use = max(b.window_in_use, b.in_use)
+            b.window_rows = max(b.window_rows, n)
+
+        try:
+            yield buf[:n]
+        finally:
+            with self._lock:
+                b.in_use -= 1
+                if len(buf) == b.rows and len(b.idle) < self.max_idle:
+                    b.idle.append(buf)
+                else:
+                    b.drop(buf)
+                if b.window_leases >= self.shrink_after:
+                    self._shrink(b)
+
+    def _shrink(self, b):
+        rows = max(b.min_rows, b.window_rows)
+        keep = min(self.max_idle, max(1, b.window_in_use))
+
+        if rows < b.rows:
+            b.rows = rows
+            b.shrinks += 1
+
+        idle = []
+        for buf in b.idle:
+            if len(buf) == b.rows and len(idle) < keep:
+                idle.append(buf)
+            else:
+                b.drop(buf)
+        b.idle = idle
+        b.window_leases = b.window_in_use = b.window_rows = 0
+
+    def stats(self):
+        with self._lock:
+            out = {
+                name: {
+                    "rows": b.rows,
+                    "pinned": b.pin,
+                    "device": str(b.device),
+                    "leases": b.leases,
+                    "hits": b.hits,
+                    "misses": b.misses,
+                    "hit_rate": b.hits / b.leases if b.leases else 0.0,
+                    "grows": b.grows,
+                    "shrinks": b.shrinks,
+                    "in_use": b.in_use,
+                    "idle": len(b.idle),
+                    "bytes": b.bytes,
+                }
+                for name, b in self._buffers.items()
+            }
+        out["process"] = {
+            "rss_bytes": rss_bytes(),
+            "peak_rss_bytes": peak_rss_bytes(),
+        }
+        return out
+
+
+# Owned by the inference code (src/ocr.py); one per process
+buffer_pool = BufferPool()
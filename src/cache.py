@@ -0,0 +1,140 @@
+# src/cache.py
+
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# ============================================================
+# CONTENT-ADDRESSED RESULT CACHE
+# ============================================================
+
+class ResultCache:
+    """
+    Upload hash -> post-grammar plate strings.
+    In-memory LRU with TTL, plus an optional SQLite tier on disk that
+    survives worker restarts and is shared by workers on one host.
+    """
+
+    def __init__(self, max_items=1024, ttl_s=3600.0, disk_path=None,
+                 disk_max_items=100_000):
+        self.max_items = max_items
+        self.ttl_s = ttl_s
+        self.disk_path = disk_path
+        self.disk_max_items = disk_max_items
+
+        self._items = OrderedDict()   # key -> (expires_at, plate_texts)
+        self._lock = threading.Lock()
+        self._db = None
+        self._disk_puts = 0
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if disk_path:
+            self._db = sqlite3.connect(
+                disk_path, timeout=5.0, check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " key TEXT PRIMARY KEY,"
+                " expires_at REAL NOT NULL,"
+                " plate_texts TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(contents):
+        return hashlib.sha256(contents).hexdigest()
+
+    # ---------------- lookup ----------------
+
+    def get(self, key):
+        now = time.time()
+
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._items.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[1])
+                del self._items[key]
+
+            plate_texts = self._disk_get(key, now)
+            if plate_texts is not None:
+                self.disk_hits += 1
+                self._remember(key, plate_texts, now)
+                return list(plate_texts)
+
+            self.misses += 1
+            return None
+
+    def put(self, key, plate_texts):
+        now = time.time()
+        plate_texts = list(plate_texts)
+
+        with self._lock:
+            self._remember(key, plate_texts, now)
+            self._disk_put(key, plate_texts, now)
+
+    def _remember(self, key, plate_texts, now):
+        # caller holds self._lock
+        self._items[key] = (now + self.ttl_s, plate_texts)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    # ---------------- disk tier ----------------
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        row = self._db.execute(
+            "SELECT plate_texts FROM results WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _disk_put(self, key, plate_texts, now):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+            (key, now + self.ttl_s, json.dumps(plate_texts))
+        )
+        self._disk_puts += 1
+        if self._disk_puts % 256 == 0:
+            self._db.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM results WHERE key IN ("
+                " SELECT key FROM results ORDER BY expires_at DESC"
+                " LIMIT -1 OFFSET ?)",
+                (self.disk_max_items,)
+            )
+        self._db.commit()
+
+    # ---------------- monitoring ----------------
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "items": len(self._items),
+            "max_items": self.max_items,
+            "ttl_s": self.ttl_s,
+            "disk": self.disk_path,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (
+                (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            ),
+        }
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
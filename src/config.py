@@ -1,5 +1,7 @@
 # src/config.py
 
+import os
+
 # ============================================================
 # MODEL PATHS
 # ============================================================
@@ -8,12 +10,86 @@ PLATE_YOLO_MODEL = "models/best_plate_finetuned_final.pt"
 CHAR_YOLO_MODEL  = "models/best_char_yolo_finetuned.pt"
 OCR_MODEL_PATH   = "models/mobilenet_char_classifier_final.pth"
 
+# Exported weights (python -m src.export) live here as
+# plate_yolo.{onnx,torchscript}, char_yolo.{onnx,torchscript}, ocr.{onnx,ts}
+EXPORT_DIR = os.getenv("VNPR_EXPORT_DIR", "models/export")
+
+# "eager" (PyTorch / Ultralytics .pt) | "torchscript" | "onnx" (ONNX Runtime)
+INFERENCE_BACKEND = os.getenv("VNPR_BACKEND", "eager")
+
+# "" (fp32) | "dynamic" | "static": INT8 ONNX models from python -m src.quantize,
+# used with the onnx backend. A quantized model is only activated when its
+# recorded agreement with fp32 (plate strings; OCR top-1 too) is
+# >= QUANT_MIN_AGREEMENT.
+QUANTIZE            = os.getenv("VNPR_QUANTIZE", "")
+QUANT_MIN_AGREEMENT = float(os.getenv("VNPR_QUANT_MIN_AGREEMENT", "0.98"))
+QUANT_REPORT        = os.path.join(EXPORT_DIR, "quant_report.json")
+
+# Large JPEG uploads may be decoded at 1/2, 1/4 or 1/8 scale for plate
+# detection (largest reduction keeping the long side >= this); plates
+# are cropped from a full-resolution decode. 0 always decodes in full.
+DETECT_DECODE_MIN_SIDE = int(os.getenv("VNPR_DETECT_MIN_SIDE", "960"))
+
+# A frame with plates needs the full decode anyway, so the reduced decode
+# (~0.65-0.75x a full one) only pays off on frames without plates. It is
+# used while the recent share of uploads with a plate (moving average)
+# is below this; gate cameras stay on a single full decode.
+REDUCED_DECODE_MAX_PLATE_RATE = float(os.getenv("VNPR_REDUCED_DECODE_MAX_PLATE_RATE", "0.3"))
+
+PLATE_YOLO_BATCH_SIZE = 8   # max images per plate YOLO call
+CHAR_YOLO_BATCH_SIZE  = 16  # max padded plates per char YOLO call
+
 # ============================================================
 # OCR CONFIG
 # ============================================================
 
 CLASSES = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789")
 TOP_K = 3
+OCR_BATCH_SIZE = 64   # max character crops per MobileNet forward
+OCR_INPUT_SIZE = 64
+
+# Cascade: accept char YOLO's own class for a crop when its confidence is
+# >= this and it fits the plate grammar slot (letter / digit); only the
+# other crops go through MobileNet. 0 disables (MobileNet reads every crop).
+CASCADE_MIN_CONF = float(os.getenv("VNPR_CASCADE_MIN_CONF", "0"))
+
+# "numpy": cv2 gray + resize straight into one float32 batch array
+# "pil"  : original PIL + torchvision transform chain
+OCR_PREPROCESS = "numpy"
+
+# OCR input batches are written into pooled, preallocated tensors
+# (src/buffers.py; "numpy" preprocessing only). Host buffers are pinned
+# when the model runs on CUDA and VNPR_BUFFER_PIN=1.
+BUFFER_POOL         = os.getenv("VNPR_BUFFER_POOL", "1") == "1"
+BUFFER_PIN          = os.getenv("VNPR_BUFFER_PIN", "1") == "1"
+BUFFER_MAX_IDLE     = int(os.getenv("VNPR_BUFFER_MAX_IDLE", "4"))   # per input
+BUFFER_SHRINK_AFTER = int(os.getenv("VNPR_BUFFER_SHRINK_AFTER", "1000"))  # leases
+
+# ============================================================
+# TILED PLATE DETECTION (SMALL / DISTANT PLATES)
+# ============================================================
+
+# Default for requests that set neither `tiled` nor a camera profile
+TILED_DETECTION = os.getenv("VNPR_TILED", "0") == "1"
+
+# Tiles are resized to plate YOLO's 640 input: TILE_SIZE 640 is native
+# resolution (4K frame: 40 tiles), 1280 is half (4K frame: 8 tiles)
+TILE_SIZE    = int(os.getenv("VNPR_TILE_SIZE", "1280"))
+TILE_OVERLAP = 0.25   # fraction of TILE_SIZE shared by neighbouring tiles
+TILE_EDGE_PX = 2      # boxes this close to an inner tile edge are cut plates
+
+# Per-camera settings, JSON file: {"lot-east-2": {"tiled": true}, ...}
+CAMERA_PROFILES_PATH = os.getenv("VNPR_CAMERA_PROFILES") or None
+
+# ============================================================
+# VIDEO MODE
+# ============================================================
+
+VIDEO_FRAME_STRIDE     = 3     # run plate detection on every Nth frame
+VIDEO_TRACK_IOU        = 0.3   # min IoU to continue a track
+VIDEO_TRACK_MAX_MISSED = 5     # sampled frames without a match before a track ends
+VIDEO_TRACK_MIN_HITS   = 2     # drop tracks seen on fewer sampled frames
+VIDEO_READS_PER_TRACK  = 3     # sharpest crops OCR'd and voted per track
 
 # ============================================================
 # OCR CONFUSION MAP
@@ -55,3 +131,109 @@ VALID_STATES = {
     "HR","PB","CH","OD","BR","CG","JK","HP","UK","GA","AS",
     "MN","ML","MZ","NL","TR","SK","AR","AN","DN","DD","LD","PY"
 }
+
+# Plate formats read by src/grammar.py: name -> (prior, pattern).
+# Pattern tokens, space separated:
+#   S       state code (2 letters, VALID_STATES preferred)
+#   L2 D4   2 letters / 4 digits; L1-2 = 1 or 2 letters, L0-2 = up to 2
+#   =BH     literal text; =CD|CC|UN = one of several
+# The prior multiplies a format's score, so it breaks ties in favour of
+# the common layouts
+PLATE_FORMATS = {
+    "standard":      (1.00, "S D2 L2 D4"),       # KA03AN6757
+    "single_series": (0.95, "S D2 L1 D4"),       # KA03N6757
+    "bh_series":     (0.90, "D2 =BH D4 L1-2"),   # 22BH1234AB
+    "temporary":     (0.80, "=T D4 S D4 L0-2"),  # T0524KA1234A
+    "diplomatic":    (0.80, "D2-3 =CD|CC|UN D1-4"),  # 77CD12
+}
+
+# Reading OCR character a as b to fit a format slot scores p(a) times
+# the weight below (identity 1.0, no entry = not allowed). Direct maps
+# (DIGIT_TO_LETTER / LETTER_TO_DIGIT) weigh GRAMMAR_SWAP_WEIGHT, the
+# fallbacks GRAMMAR_SWAP_WEIGHT * their own weight. Swaps never chain
+# (K -> X -> 7 is not a K -> 7 entry): list any chain you need directly.
+GRAMMAR_SWAP_WEIGHT = 0.5
+
+LETTER_FALLBACK = {
+    "0": {"O": 0.40, "D": 0.35, "Q": 0.25},
+    "1": {"I": 0.60, "L": 0.40},
+    "2": {"Z": 1.00},
+    "5": {"S": 1.00},
+    "6": {"G": 1.00},
+    "7": {"Z": 1.00},
+    "8": {"B": 1.00},
+    "V": {"W": 1.00},
+    "U": {"V": 1.00},
+    "K": {"X": 0.50, "R": 0.50},
+    "P": {"R": 1.00},
+    "C": {"G": 1.00},
+}
+
+DIGIT_FALLBACK = {
+    "O": {"0": 1.00},
+    "Q": {"0": 1.00},
+    "D": {"0": 1.00},
+    "I": {"1": 1.00},
+    "L": {"1": 1.00},
+    "S": {"5": 1.00},
+    "Z": {"7": 0.70, "2": 0.30},
+    "A": {"4": 0.80, "7": 0.20},
+    "B": {"8": 1.00},
+    "G": {"6": 0.60, "0": 0.40},
+    "T": {"1": 0.60, "7": 0.40},
+    "Y": {"7": 1.00},
+    "X": {"7": 1.00},
+    "R": {"7": 1.00},
+}
+
+# State slot holding a letter pair that is not in VALID_STATES
+STATE_MISS_WEIGHT = 0.1
+
+# Slot of the chosen format that no top-K character can be read as: it
+# keeps its raw character, and the format scores this weight there
+SLOT_MISS_WEIGHT = 1e-3
+
+# ============================================================
+# VERIFICATION
+# ============================================================
+
+MATCH_SIMILARITY          = 92   # fuzz.ratio >= this -> MATCH
+POSSIBLE_MATCH_SIMILARITY = 80   # >= this -> POSSIBLE_MATCH, else NOT_MATCH
+
+# /anpr with an assigned number: OCR plates one at a time, most likely
+# first, and stop at the first MATCH (per request: verify_first form field)
+VERIFY_FIRST = os.getenv("VNPR_VERIFY_FIRST", "0") == "1"
+
+# ============================================================
+# SERVING (overridable per deployment via environment)
+# ============================================================
+
+INFERENCE_EXECUTOR  = os.getenv("VNPR_EXECUTOR", "thread")   # "thread" | "process" | "pool"
+INFERENCE_WORKERS   = int(os.getenv("VNPR_WORKERS", "1"))
+WORKER_TORCH_THREADS = int(os.getenv("VNPR_TORCH_THREADS", "1"))  # per pool worker
+WORKER_STALE_S      = float(os.getenv("VNPR_WORKER_STALE_S", "30"))  # no heartbeat -> restart
+INFERENCE_MAX_QUEUE = int(os.getenv("VNPR_MAX_QUEUE", "8"))   # waiting jobs beyond workers
+RETRY_AFTER_SECONDS = int(os.getenv("VNPR_RETRY_AFTER", "1"))
+
+# Cross-request micro-batching (VNPR_BATCH_MAX_SIZE=1 disables it)
+BATCH_MAX_SIZE    = int(os.getenv("VNPR_BATCH_MAX_SIZE", "1"))
+BATCH_MAX_WAIT_MS = float(os.getenv("VNPR_BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_PENDING = int(os.getenv("VNPR_BATCH_MAX_PENDING", "64"))
+
+# Result cache keyed by a hash of the upload bytes (VNPR_CACHE_SIZE=0 disables)
+RESULT_CACHE_SIZE      = int(os.getenv("VNPR_CACHE_SIZE", "1024"))
+RESULT_CACHE_TTL_S     = float(os.getenv("VNPR_CACHE_TTL_S", "3600"))
+RESULT_CACHE_DISK      = os.getenv("VNPR_CACHE_DISK") or None   # SQLite file path
+RESULT_CACHE_DISK_SIZE = int(os.getenv("VNPR_CACHE_DISK_SIZE", "100000"))
+
+# /anpr/batch limits
+BATCH_API_MAX_ITEMS = int(os.getenv("VNPR_BATCH_API_MAX_ITEMS", "1000"))
+BATCH_API_MAX_BYTES = int(os.getenv("VNPR_BATCH_API_MAX_MB", "256")) * 1024 * 1024
+BATCH_API_CHUNK     = int(os.getenv("VNPR_BATCH_API_CHUNK", "8"))   # images per pipeline call
+
+# /verify/bulk limit (recognized / assigned pairs per request)
+VERIFY_BULK_MAX_PAIRS = int(os.getenv("VNPR_VERIFY_BULK_MAX_PAIRS", "1000000"))
+
+# Registered vehicles for /vehicles/match: CSV or SQLite file (unset disables)
+VEHICLE_REGISTRY       = os.getenv("VNPR_VEHICLE_REGISTRY") or None
+VEHICLE_REGISTRY_TOP_K = int(os.getenv("VNPR_VEHICLE_REGISTRY_TOP_K", "5"))
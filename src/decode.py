@@ -0,0 +1,114 @@
+# src/decode.py
+
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from src.config import DETECT_DECODE_MIN_SIDE, REDUCED_DECODE_MAX_PLATE_RATE
+from src.utils import Detections
+
+# ============================================================
+# REDUCED-RESOLUTION DECODE
+# ============================================================
+
+REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+
+class ReducedImage:
+    """
+    JPEG upload decoded at 1/2, 1/4 or 1/8 scale for plate detection.
+    The full-resolution image is decoded only when plates have to be
+    cropped from it (a second decode), and is not kept afterwards.
+    """
+
+    def __init__(self, contents, preview, size):
+        self.contents = contents
+        self.preview = preview
+
+        # header size is before EXIF rotation; the decoders apply it
+        w, h = size
+        ph, pw = preview.shape[:2]
+        if (pw > ph) != (w > h):
+            w, h = h, w
+        self.shape = (h, w, 3)
+        self.scale = (w / pw, h / ph)
+
+    def boxes_to_full(self, dets):
+        """
+        Preview Detections -> full-resolution Detections (clipped to the
+        image; boxes grow outwards to whole pixels)
+        """
+        sx, sy = self.scale
+        h, w = self.shape[:2]
+        xyxy = dets.xyxy * [sx, sy, sx, sy]
+        xyxy[:, :2] = np.maximum(0, np.floor(xyxy[:, :2]))
+        xyxy[:, 2] = np.minimum(w, np.ceil(xyxy[:, 2]))
+        xyxy[:, 3] = np.minimum(h, np.ceil(xyxy[:, 3]))
+        return Detections(xyxy, dets.conf, dets.cls)
+
+    def decode_full(self):
+        return cv2.imdecode(
+            np.frombuffer(self.contents, np.uint8), cv2.IMREAD_COLOR
+        )
+
+
+class DecodePolicy:
+    """
+    Moving average of the share of uploads with at least one plate. The
+    reduced decode is chosen only while it is below max_plate_rate: a
+    frame with plates would pay the reduced decode on top of the full
+    one. Starts at 1.0 (single full decode).
+    """
+
+    def __init__(self, max_plate_rate=REDUCED_DECODE_MAX_PLATE_RATE, alpha=0.05):
+        self.max_plate_rate = max_plate_rate
+        self.alpha = alpha
+        self.plate_rate = 1.0
+
+    def use_reduced(self):
+        return self.plate_rate < self.max_plate_rate
+
+    def observe(self, has_plate):
+        self.plate_rate += self.alpha * (float(has_plate) - self.plate_rate)
+
+    def stats(self):
+        return {
+            "plate_rate": round(self.plate_rate, 4),
+            "reduced_decode": self.use_reduced(),
+        }
+
+
+# Per process; fed by the code that decodes uploads (api, batch CLI)
+decode_policy = DecodePolicy()
+
+
+def decode_for_detection(contents, min_side=DETECT_DECODE_MIN_SIDE, reduced=None):
+    """
+    Upload bytes -> ReducedImage when reduced decoding is on and the
+    upload is a JPEG whose long side is at least 2 * min_side, else the
+    full-resolution array. reduced=None leaves it to decode_policy.
+    None if the bytes do not decode.
+    """
+    if reduced is None:
+        reduced = decode_policy.use_reduced()
+
+    if reduced and min_side and contents[:2] == b"\xff\xd8":
+        try:
+            size = Image.open(io.BytesIO(contents)).size   # header only
+        except Exception:
+            size = None
+
+        for factor, flag in REDUCED_FLAGS if size else ():
+            if max(size) // factor >= min_side:
+                preview = cv2.imdecode(np.frombuffer(contents, np.uint8), flag)
+                if preview is None:
+                    return None
+                return ReducedImage(contents, preview, size)
+
+    return cv2.imdecode(np.frombuffer(contents, np.uint8), cv2.IMREAD_COLOR)
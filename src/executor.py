@@ -0,0 +1,109 @@
+# src/executor.py
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# ============================================================
+# ERRORS
+# ============================================================
+
+class QueueFullError(RuntimeError):
+    """
+    Raised when the executor already holds its maximum in-flight jobs
+    """
+
+# ============================================================
+# BOUNDED INFERENCE EXECUTOR
+# ============================================================
+
+class InferenceExecutor:
+    """
+    Runs blocking inference on a thread or process pool.
+    At most max_workers jobs run and max_queue more wait; anything
+    beyond that is rejected with QueueFullError instead of queueing.
+    """
+
+    def __init__(self, kind="thread", max_workers=1, max_queue=8,
+                 initializer=None):
+        if kind == "process":
+            self._pool = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=initializer
+            )
+        elif kind == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="anpr",
+                initializer=initializer
+            )
+        else:
+            raise ValueError(f"Unknown executor kind: {kind}")
+
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+            self.completed += 1
+
+    def submit(self, fn, *args):
+        """
+        Bounded submit -> concurrent.futures.Future.
+        The slot is held until the job itself finishes, even if the
+        caller stops waiting.
+        """
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise QueueFullError("Inference queue is full")
+            self._in_flight += 1
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn, *args):
+        """
+        Bounded submit, awaited from the event loop
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    def submit_unbounded(self, fn, *args):
+        """
+        Submit outside the in-flight limit (startup / maintenance jobs)
+        """
+        return self._pool.submit(fn, *args)
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def stats(self):
+        in_flight = self._in_flight
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": in_flight,
+            "running": min(in_flight, self.max_workers),
+            "queued": max(0, in_flight - self.max_workers),
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,130 @@
+# src/export.py
+#
+# python -m src.export --formats onnx torchscript
+# VNPR_BACKEND=onnx uvicorn api:app
+
+import os
+import shutil
+import inspect
+import argparse
+
+import numpy as np
+
+from src.config import OCR_INPUT_SIZE, EXPORT_DIR
+from src.models import (
+    backend_paths,
+    load_yolo,
+    load_ocr_model,
+)
+
+FORMATS = ("onnx", "torchscript")
+
+# Input size each detector was trained / served at (see src/pipeline.py)
+YOLO_IMGSZ = {"plate_yolo": 640, "char_yolo": 512}
+
+# ============================================================
+# YOLO EXPORT (ULTRALYTICS)
+# ============================================================
+
+def export_yolo(name, fmt, out_dir):
+    """
+    Export one detector with Ultralytics and move it to its backend path.
+    ONNX is exported with a dynamic batch axis so list batches still work.
+    """
+    src = backend_paths("eager")[name]
+    dst = os.path.join(out_dir, os.path.basename(backend_paths(fmt)[name]))
+
+    kwargs = {"dynamic": True, "simplify": True} if fmt == "onnx" else {}
+    exported = load_yolo(src).export(
+        format=fmt, imgsz=YOLO_IMGSZ[name], device="cpu", **kwargs
+    )
+
+    shutil.move(str(exported), dst)
+    return dst
+
+# ============================================================
+# OCR EXPORT (MobileNetV2)
+# ============================================================
+
+def export_ocr(fmt, out_dir):
+    import torch
+
+    model = load_ocr_model("cpu")
+    dummy = torch.zeros((1, 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE))
+    dst = os.path.join(out_dir, os.path.basename(backend_paths(fmt)["ocr_model"]))
+
+    if fmt == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.freeze(torch.jit.trace(model, dummy))
+        traced.save(dst)
+        return dst
+
+    kwargs = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        kwargs["dynamo"] = False   # legacy tracer: stable dynamic_axes
+
+    torch.onnx.export(
+        model, dummy, dst,
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=17,
+        **kwargs
+    )
+    return dst
+
+# ============================================================
+# PARITY CHECK
+# ============================================================
+
+def ocr_parity(fmt, n=64, seed=0):
+    """
+    Top-1 agreement and max |logit| difference between the exported OCR
+    model and eager PyTorch on random crops
+    """
+    import torch
+
+    x = torch.from_numpy(
+        np.random.default_rng(seed)
+        .uniform(-1, 1, (n, 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE))
+        .astype(np.float32)
+    )
+
+    with torch.no_grad():
+        ref = load_ocr_model("cpu")(x)
+        out = load_ocr_model("cpu", fmt, backend_paths(fmt)["ocr_model"])(x)
+
+    return {
+        "top1_agreement": float((ref.argmax(1) == out.argmax(1)).float().mean()),
+        "max_abs_diff": float((ref - out).abs().max()),
+    }
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export VNPR models")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS,
+                        default=list(FORMATS))
+    parser.add_argument("--models", nargs="+",
+                        choices=("plate_yolo", "char_yolo", "ocr_model"),
+                        default=["plate_yolo", "char_yolo", "ocr_model"])
+    args = parser.parse_args(argv)
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+
+    for fmt in args.formats:
+        for name in args.models:
+            if name == "ocr_model":
+                path = export_ocr(fmt, EXPORT_DIR)
+                print(f"{fmt:12} {name:10} -> {path}  {ocr_parity(fmt)}")
+            else:
+                path = export_yolo(name, fmt, EXPORT_DIR)
+                print(f"{fmt:12} {name:10} -> {path}")
+
+    print("\nbackend parity on the bench set: python -m bench.backends")
+
+
+if __name__ == "__main__":
+    main()
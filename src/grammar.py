@@ -0,0 +1,259 @@
+# src/grammar.py
+
+import json
+import hashlib
+import itertools
+
+import numpy as np
+
+from src.config import (
+    CLASSES,
+    DIGIT_TO_LETTER,
+    LETTER_TO_DIGIT,
+    LETTER_FALLBACK,
+    DIGIT_FALLBACK,
+    GRAMMAR_SWAP_WEIGHT,
+    SLOT_MISS_WEIGHT,
+    STATE_MISS_WEIGHT,
+    VALID_STATES,
+    PLATE_FORMATS,
+)
+
+# ============================================================
+# CHARACTER TABLES (BUILT ONCE)
+# ============================================================
+
+CLASS_INDEX = {c: i for i, c in enumerate(CLASSES)}
+CLASS_CHARS = np.array(CLASSES)
+LETTERS = np.array([c.isalpha() for c in CLASSES])
+DIGITS = ~LETTERS
+
+
+def char_mask(chars):
+    mask = np.zeros(len(CLASSES), dtype=bool)
+    mask[[CLASS_INDEX[c] for c in chars]] = True
+    return mask
+
+
+def swap_matrix():
+    """
+    (C, C) weight of reading OCR class a as class b: 1 on the diagonal,
+    GRAMMAR_SWAP_WEIGHT for the direct maps and scaled fallbacks. Only
+    listed substitutions: swaps never chain through another class
+    """
+    w = np.eye(len(CLASSES))
+
+    def put(a, b, weight):
+        if a in CLASS_INDEX and b in CLASS_INDEX:
+            i, j = CLASS_INDEX[a], CLASS_INDEX[b]
+            w[i, j] = max(w[i, j], weight)
+
+    for table in (DIGIT_TO_LETTER, LETTER_TO_DIGIT):
+        for a, b in table.items():
+            put(a, b, GRAMMAR_SWAP_WEIGHT)
+    for table in (LETTER_FALLBACK, DIGIT_FALLBACK):
+        for a, targets in table.items():
+            for b, weight in targets.items():
+                put(a, b, GRAMMAR_SWAP_WEIGHT * weight)
+
+    return w
+
+
+def state_matrix():
+    """
+    (26, 26) weight of a letter pair in a state slot: 1 for VALID_STATES,
+    STATE_MISS_WEIGHT for any other pair
+    """
+    letters = CLASS_CHARS[LETTERS].tolist()
+    w = np.full((len(letters), len(letters)), STATE_MISS_WEIGHT)
+    for state in VALID_STATES:
+        w[letters.index(state[0]), letters.index(state[1])] = 1.0
+    return w
+
+
+SWAP = swap_matrix()
+STATE = state_matrix()
+LETTER_IDS = np.flatnonzero(LETTERS)
+
+# ============================================================
+# FORMAT COMPILATION
+# ============================================================
+
+def _token_alternatives(token):
+    """
+    One pattern token -> alternatives, each (slot masks, state offsets)
+    """
+    if token == "S":
+        return [([LETTERS, LETTERS], [0])]
+
+    if token.startswith("="):
+        return [([char_mask(c) for c in text], []) for text in token[1:].split("|")]
+
+    kind, counts = token[0], token[1:]
+    lo, _, hi = counts.partition("-")
+    mask = {"L": LETTERS, "D": DIGITS}[kind]
+    return [([mask] * n, []) for n in range(int(lo), int(hi or lo) + 1)]
+
+
+def compile_format(pattern):
+    """
+    Pattern string -> fixed-length templates, each (masks, state start
+    or -1). Repeat ranges expand to one template per length.
+    """
+    templates = []
+    for parts in itertools.product(*map(_token_alternatives, pattern.split())):
+        masks, state = [], -1
+        for part_masks, states in parts:
+            if states:
+                state = len(masks) + states[0]
+            masks.extend(part_masks)
+        if masks:
+            templates.append((np.array(masks), state))
+    return templates
+
+
+class _LengthGroup:
+    """
+    Every template of one plate length, stacked for vectorized scoring
+    """
+
+    def __init__(self, entries):
+        self.names = [name for name, _, _, _ in entries]
+        self.log_priors = np.log([prior for _, prior, _, _ in entries])
+        self.masks = np.stack([masks for _, _, masks, _ in entries])   # (T, n, C)
+        self.states = np.array([state for _, _, _, state in entries])  # (T,)
+
+    def score(self, s):
+        """
+        s: (N, n, C) per-position class scores -> best template per plate:
+        (template index (N,), log score (N,), class ids (N, n), missed
+        (N, n)). A position no allowed class can be read as is missed:
+        it scores SLOT_MISS_WEIGHT, and the caller keeps its raw read.
+        """
+        masked = s[:, None] * self.masks[None]          # (N, T, n, C)
+        ids = masked.argmax(-1)                         # (N, T, n)
+        val = np.take_along_axis(masked, ids[..., None], -1)[..., 0]
+
+        for j in np.unique(self.states[self.states >= 0]):
+            # best state pair jointly: (N, 26, 26)
+            first = s[:, j][:, LETTER_IDS]
+            second = s[:, j + 1][:, LETTER_IDS]
+            pair = (first[:, :, None] * second[:, None, :] * STATE).reshape(len(s), -1)
+            best = pair.argmax(1)
+            t = self.states == j
+            pair_val = pair[np.arange(len(s)), best]
+            val[:, t, j] = pair_val[:, None]
+            val[:, t, j + 1] = (pair_val > 0)[:, None]
+            ids[:, t, j] = LETTER_IDS[best // len(LETTER_IDS)][:, None]
+            ids[:, t, j + 1] = LETTER_IDS[best % len(LETTER_IDS)][:, None]
+
+        missed = val <= 0
+        val[missed] = SLOT_MISS_WEIGHT
+        scores = np.log(val).sum(-1) + self.log_priors   # (N, T)
+        best = scores.argmax(1)
+        rows = np.arange(len(s))
+        return best, scores[rows, best], ids[rows, best], missed[rows, best]
+
+# ============================================================
+# GRAMMAR ENGINE
+# ============================================================
+
+class PlateGrammar:
+    """
+    PLATE_FORMATS compiled once into per-length slot masks. Decoding
+    scores the OCR top-K of every character against every format of the
+    plate's length in one pass and keeps the best reading. Positions the
+    best format cannot fill keep their top-1 character; the rest are
+    still corrected.
+    """
+
+    def __init__(self, formats=PLATE_FORMATS):
+        # changes with the formats, swap / state tables or weights
+        self.fingerprint = hashlib.sha256(
+            json.dumps(formats, sort_keys=True).encode()
+            + SWAP.tobytes() + STATE.tobytes() + repr(SLOT_MISS_WEIGHT).encode()
+        ).hexdigest()[:16]
+
+        entries = {}
+        for name, (prior, pattern) in formats.items():
+            for masks, state in compile_format(pattern):
+                entries.setdefault(len(masks), []).append((name, prior, masks, state))
+        self.groups = {n: _LengthGroup(e) for n, e in entries.items()}
+
+    def _score_groups(self, plates):
+        """
+        Score plates against the formats of their length. Yields, per
+        length with formats: (group, plate indices, best template (N,),
+        log score (N,), class ids (N, n), missed positions (N, n))
+        """
+        by_length = {}
+        for i, plate in enumerate(plates):
+            if len(plate) in self.groups:
+                by_length.setdefault(len(plate), []).append(i)
+
+        for n, index in by_length.items():
+            # (N, n, k, 2) rows of (class id, prob); short top-K lists are
+            # padded, characters outside CLASSES get probability 0
+            k = max(len(topk) for i in index for topk in plates[i])
+            table = np.array([
+                [
+                    [(CLASS_INDEX.get(ch, -1), p) for ch, p in topk]
+                    + [(-1, 0.0)] * (k - len(topk))
+                    for topk in plates[i]
+                ]
+                for i in index
+            ])
+            ids = table[..., 0].astype(np.int64)
+            probs = np.where(ids >= 0, table[..., 1], 0.0)
+            ids[ids < 0] = 0
+
+            # best way to read each position as each class, via SWAP
+            s = (probs[..., None] * SWAP[ids]).max(2)   # (N, n, C)
+
+            group = self.groups[n]
+            yield (group, index, *group.score(s))
+
+    def decode_batch(self, plates):
+        """
+        Input:
+            plates: per plate, one top-K [(char, prob), ...] list per
+                character, in reading order
+        Output:
+            (plate strings, format names (None unless a format fits
+            every position))
+        """
+        texts = ["".join(topk[0][0] for topk in plate) for plate in plates]
+        formats = [None] * len(plates)
+
+        for group, index, best, _, chars, missed in self._score_groups(plates):
+            for row, i in enumerate(index):
+                texts[i] = "".join(
+                    topk[0][0] if miss else ch
+                    for topk, ch, miss in zip(plates[i], CLASS_CHARS[chars[row]], missed[row])
+                )
+                if not missed[row].any():
+                    formats[i] = group.names[best[row]]
+
+        return texts, formats
+
+    def best_masks(self, plates):
+        """
+        Same input as decode_batch -> per plate, the (n, C) class masks
+        of its best-scoring template (which classes each position
+        allows), or None where no format has the plate's length
+        """
+        masks = [None] * len(plates)
+        for group, index, best, *_ in self._score_groups(plates):
+            for row, i in enumerate(index):
+                masks[i] = group.masks[best[row]]
+        return masks
+
+    def decode(self, plate):
+        """
+        One plate's per-character top-K lists -> (plate string, format name)
+        """
+        texts, formats = self.decode_batch([plate])
+        return texts[0], formats[0]
+
+
+plate_grammar = PlateGrammar()
@@ -0,0 +1,147 @@
+# src/metrics.py
+
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# ============================================================
+# METRICS
+# ============================================================
+
+STAGES = (
+    "read",
+    "decode",
+    "plate_detect",
+    "char_detect",
+    "ocr",
+    "grammar",
+    "verify",
+    "write",
+)
+
+VERDICTS = (
+    "MATCH",
+    "POSSIBLE_MATCH",
+    "NOT_MATCH",
+    "NO_REFERENCE",
+    "NO_PLATE_DETECTED",
+)
+
+STAGE_SECONDS = Histogram(
+    "vnpr_stage_seconds",
+    "Wall time per pipeline stage call (one call may cover a batch)",
+    ["stage"],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10),
+)
+
+PLATES_PER_IMAGE = Histogram(
+    "vnpr_plates_per_image",
+    "Plates detected per image",
+    buckets=(0, 1, 2, 3, 4, 6, 8, 12),
+)
+
+CHARS_PER_PLATE = Histogram(
+    "vnpr_chars_per_plate",
+    "Characters read per plate",
+    buckets=(0, 4, 6, 8, 9, 10, 11, 12, 16),
+)
+
+VERDICT_TOTAL = Counter(
+    "vnpr_verdicts_total",
+    "Response verdicts",
+    ["verdict"],
+)
+
+ERROR_TOTAL = Counter(
+    "vnpr_errors_total",
+    "Failed requests / batch items by kind",
+    ["kind"],
+)
+
+OCR_CROPS_TOTAL = Counter(
+    "vnpr_ocr_crops_total",
+    "Character crops by reader: classifier (MobileNet) or detector (cascade)",
+    ["reader"],
+)
+
+EXECUTOR_GAUGE = Gauge(
+    "vnpr_executor",
+    "Inference executor state (refreshed on scrape)",
+    ["field"],
+    multiprocess_mode="livesum",
+)
+
+BUFFER_GAUGE = Gauge(
+    "vnpr_buffer_pool",
+    "Pooled input buffers per input, and process (RSS) memory, per process: "
+    "api or a pool worker (refreshed on scrape)",
+    ["process", "buffer", "field"],
+    multiprocess_mode="livesum",
+)
+
+# Resolve label children once; observing is then a lock + add
+_stage = {name: STAGE_SECONDS.labels(name) for name in STAGES}
+_verdict = {name: VERDICT_TOTAL.labels(name) for name in VERDICTS}
+
+# ============================================================
+# RECORDING
+# ============================================================
+
+@contextmanager
+def timed(stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _stage[stage].observe(time.perf_counter() - start)
+
+
+def observe_verdict(verdict):
+    child = _verdict.get(verdict)
+    if child is None:
+        child = _verdict[verdict] = VERDICT_TOTAL.labels(verdict)
+    child.inc()
+
+
+def observe_error(kind):
+    ERROR_TOTAL.labels(kind).inc()
+
+# ============================================================
+# EXPOSITION
+# ============================================================
+
+def render_metrics(executor_stats=None, buffer_stats=None):
+    """
+    Prometheus text format. buffer_stats: {process: BufferPool.stats()},
+    e.g. "api" plus one "worker-N" per pool worker. With
+    PROMETHEUS_MULTIPROC_DIR set, samples written by every worker
+    process are merged.
+    """
+    for field, value in (executor_stats or {}).items():
+        if isinstance(value, (int, float)):
+            EXECUTOR_GAUGE.labels(field).set(value)
+
+    for process, pool in (buffer_stats or {}).items():
+        for name, fields in (pool or {}).items():
+            for field, value in fields.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    BUFFER_GAUGE.labels(process, name, field).set(value)
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+
+    return generate_latest(REGISTRY)
+
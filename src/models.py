@@ -1,35 +1,142 @@
 # src/models.py
 
-import torch
-import torch.nn as nn
-from ultralytics import YOLO
-from torchvision.models import mobilenet_v2
+import os
+import json
+import hashlib
+import threading
 
 from src.config import (
     CLASSES,
     PLATE_YOLO_MODEL,
     CHAR_YOLO_MODEL,
     OCR_MODEL_PATH,
+    OCR_INPUT_SIZE,
+    EXPORT_DIR,
+    INFERENCE_BACKEND,
+    QUANTIZE,
+    QUANT_MIN_AGREEMENT,
+    QUANT_REPORT,
 )
 
 # ============================================================
-# DEVICE
+# BACKENDS + WEIGHT PATHS
 # ============================================================
 
-device = "cuda" if torch.cuda.is_available() else "cpu"
+BACKENDS = ("eager", "torchscript", "onnx")
+
+
+def backend_paths(backend):
+    """
+    Weight files for plate YOLO, char YOLO and OCR under a backend
+    """
+    if backend == "eager":
+        return {
+            "plate_yolo": PLATE_YOLO_MODEL,
+            "char_yolo": CHAR_YOLO_MODEL,
+            "ocr_model": OCR_MODEL_PATH,
+        }
+    if backend == "torchscript":
+        return {
+            "plate_yolo": os.path.join(EXPORT_DIR, "plate_yolo.torchscript"),
+            "char_yolo": os.path.join(EXPORT_DIR, "char_yolo.torchscript"),
+            "ocr_model": os.path.join(EXPORT_DIR, "ocr.ts"),
+        }
+    if backend == "onnx":
+        return {
+            "plate_yolo": os.path.join(EXPORT_DIR, "plate_yolo.onnx"),
+            "char_yolo": os.path.join(EXPORT_DIR, "char_yolo.onnx"),
+            "ocr_model": os.path.join(EXPORT_DIR, "ocr.onnx"),
+        }
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+
+def quantized_path(name, mode):
+    """
+    INT8 ONNX file for a model, e.g. models/export/ocr.int8-static.onnx
+    """
+    stem, _ = os.path.splitext(backend_paths("onnx")[name])
+    return f"{stem}.int8-{mode}.onnx"
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def agreement_score(entry):
+    """
+    What an INT8 report entry is judged on: the lower of plate-string
+    agreement and (OCR model) top-1 agreement; None if never measured
+    """
+    scores = [entry[k] for k in ("agreement", "top1_agreement") if k in entry]
+    return min(scores) if scores else None
+
+
+def quant_status(name, mode, report_path=QUANT_REPORT):
+    """
+    Whether the INT8 file of a model may be served, from the report of
+    python -m src.quantize. Both its solo entry and the "all" entry (every
+    INT8 model swapped in together, as served) must clear
+    QUANT_MIN_AGREEMENT, and the file on disk must be the one evaluated.
+    """
+    status = {"agreement": None, "all_agreement": None, "ok": False, "reason": None}
+    try:
+        with open(report_path) as f:
+            report = json.load(f).get(mode, {})
+    except (OSError, ValueError):
+        report = {}
+
+    solo, combined = report.get(name), report.get("all", {})
+    if solo is None:
+        status["reason"] = "not evaluated"
+        return status
+
+    status["agreement"] = agreement_score(solo)
+    status["all_agreement"] = agreement_score(combined)
+    if name not in combined.get("files", {}):
+        status["reason"] = "not evaluated together with the other INT8 models"
+        return status
+
+    try:
+        digest = file_sha256(quantized_path(name, mode))
+    except OSError:
+        status["reason"] = "INT8 file missing"
+        return status
+    if solo.get("sha256") != digest or combined["files"][name] != digest:
+        status["reason"] = "INT8 file changed since it was evaluated"
+        return status
+
+    scores = [status["agreement"], status["all_agreement"]]
+    if None in scores or min(scores) < QUANT_MIN_AGREEMENT:
+        status["reason"] = f"agreement below {QUANT_MIN_AGREEMENT}"
+        return status
+
+    status["ok"] = True
+    return status
 
 # ============================================================
 # YOLO MODELS
 # ============================================================
 
-plate_yolo = YOLO(PLATE_YOLO_MODEL)
-char_yolo  = YOLO(CHAR_YOLO_MODEL)
+def load_yolo(path):
+    from ultralytics import YOLO
+
+    # Ultralytics picks ONNX Runtime / TorchScript from the file suffix
+    if path.endswith(".pt"):
+        return YOLO(path)
+    return YOLO(path, task="detect")
 
 # ============================================================
 # OCR MODEL (MobileNetV2)
 # ============================================================
 
 def build_ocr_model():
+    import torch.nn as nn
+    from torchvision.models import mobilenet_v2
+
     model = mobilenet_v2(weights=None)
 
     # Change first conv to accept 1-channel (grayscale)
@@ -50,8 +157,228 @@ def build_ocr_model():
     return model
 
 
-ocr_model = build_ocr_model().to(device)
-ocr_model.load_state_dict(
-    torch.load(OCR_MODEL_PATH, map_location=device)
-)
-ocr_model.eval()
+class OnnxOcrModel:
+    """
+    ONNX Runtime session with the eager model's call signature:
+    (N, 1, S, S) float tensor in, (N, len(CLASSES)) logits tensor out
+    """
+
+    def __init__(self, path, device="cpu"):
+        import onnxruntime as ort
+
+        providers = ["CPUExecutionProvider"]
+        if device == "cuda" and "CUDAExecutionProvider" in ort.get_available_providers():
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.session = ort.InferenceSession(path, providers=providers)
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x):
+        import torch
+
+        logits = self.session.run(
+            None, {self.input_name: x.detach().cpu().numpy()}
+        )[0]
+        return torch.from_numpy(logits).to(x.device)
+
+
+def load_ocr_model(device, backend="eager", path=OCR_MODEL_PATH):
+    import torch
+
+    if backend == "onnx":
+        return OnnxOcrModel(path, device)
+
+    if backend == "torchscript":
+        model = torch.jit.load(path, map_location=device)
+        model.eval()
+        return model
+
+    model = build_ocr_model().to(device)
+    model.load_state_dict(
+        torch.load(path, map_location=device)
+    )
+    model.eval()
+    return model
+
+# ============================================================
+# MODEL REGISTRY (LAZY LOADING)
+# ============================================================
+
+class ModelRegistry:
+    """
+    Holds the plate YOLO, char YOLO and OCR models.
+    Each model is loaded on first access, or all at once via load().
+    backend selects eager PyTorch, TorchScript or ONNX Runtime weights;
+    quantize ("dynamic" / "static") swaps in INT8 ONNX models that passed
+    the agreement check.
+    """
+
+    def __init__(self, backend=INFERENCE_BACKEND, quantize=QUANTIZE):
+        self._lock = threading.RLock()
+        self._models = {}
+        self._device = None
+        self.warmed_up = False
+        self.error = None
+        self.backend = backend
+        self.quantize = quantize
+        self.paths = backend_paths(backend)
+        self.quantization = {}
+        self._fingerprint = None
+
+    def use_backend(self, backend, quantize=""):
+        """
+        Switch backend; models reload lazily on next access
+        """
+        with self._lock:
+            self.paths = backend_paths(backend)
+            self.backend = backend
+            self.quantize = quantize
+            self.quantization = {}
+            self._models = {}
+            self._fingerprint = None
+            self.warmed_up = False
+            self.error = None
+
+    def swap(self, name, path):
+        """
+        Load one model from another file on next access
+        """
+        with self._lock:
+            self.paths[name] = path
+            self._models.pop(name, None)
+            self._fingerprint = None
+            self.warmed_up = False
+
+    def _weights(self, name):
+        """
+        Weight file for name: the INT8 model when quantization is on, the
+        backend is onnx and quant_status() clears it; the fp32 model
+        otherwise
+        """
+        if not self.quantize:
+            return self.paths[name]
+
+        status = quant_status(name, self.quantize)
+        active = self.backend == "onnx" and status["ok"]
+        if self.backend != "onnx":
+            status["reason"] = "backend is not onnx"
+        self.quantization[name] = {
+            "mode": self.quantize,
+            "agreement": status["agreement"],
+            "all_agreement": status["all_agreement"],
+            "active": active,
+            "reason": None if active else status["reason"],
+        }
+
+        if active:
+            return quantized_path(name, self.quantize)
+        return self.paths[name]
+
+    def fingerprint(self):
+        """
+        Short hash of the backend, INT8 mode and every weight file in use
+        (path and contents). Weights are hashed once per process, and
+        again after use_backend() / swap()
+        """
+        with self._lock:
+            if self._fingerprint is None:
+                h = hashlib.sha256(f"{self.backend}|{self.quantize}".encode())
+                for name in sorted(self.paths):
+                    path = self._weights(name)
+                    try:
+                        digest = file_sha256(path)
+                    except OSError:
+                        digest = None
+                    h.update(f"|{name}={path}:{digest}".encode())
+                self._fingerprint = h.hexdigest()[:16]
+            return self._fingerprint
+
+    @property
+    def device(self):
+        if self._device is None:
+            import torch
+            self._device = "cuda" if torch.cuda.is_available() else "cpu"
+        return self._device
+
+    def _get(self, name, loader):
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = loader()
+                    self._models[name] = model
+        return model
+
+    @property
+    def plate_yolo(self):
+        return self._get(
+            "plate_yolo", lambda: load_yolo(self._weights("plate_yolo"))
+        )
+
+    @property
+    def char_yolo(self):
+        return self._get(
+            "char_yolo", lambda: load_yolo(self._weights("char_yolo"))
+        )
+
+    @property
+    def ocr_model(self):
+        return self._get(
+            "ocr_model",
+            lambda: load_ocr_model(
+                self.device, self.backend, self._weights("ocr_model")
+            )
+        )
+
+    @property
+    def loaded(self):
+        return len(self._models) == 3
+
+    @property
+    def ready(self):
+        return self.loaded and self.warmed_up
+
+    def load(self):
+        """
+        Load every model that is not loaded yet
+        """
+        self.plate_yolo
+        self.char_yolo
+        self.ocr_model
+        return self
+
+    def warmup(self):
+        """
+        Load all models and run one dummy inference through each
+        """
+        import numpy as np
+        import torch
+
+        try:
+            self.load()
+
+            blank = np.full((640, 640, 3), 255, dtype=np.uint8)
+            self.plate_yolo.predict(blank, imgsz=640, verbose=False)
+            self.char_yolo.predict(blank[:160], imgsz=512, verbose=False)
+
+            dummy = torch.zeros(
+                (1, 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE),
+                device=self.device
+            )
+            with torch.no_grad():
+                self.ocr_model(dummy)
+
+            # preallocate the pooled OCR input buffers
+            from src.ocr import reserve_ocr_buffers
+            reserve_ocr_buffers()
+        except Exception as e:
+            self.error = str(e)
+            raise
+
+        self.error = None
+        self.warmed_up = True
+        return self
+
+
+registry = ModelRegistry()
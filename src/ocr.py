@@ -1,12 +1,27 @@
 # src/ocr.py
 
+from functools import lru_cache
+from contextlib import contextmanager
+
 import cv2
+import numpy as np
 import torch
 from PIL import Image
 from torchvision import transforms
 
-from src.models import ocr_model, device
-from src.config import CLASSES, TOP_K
+from src.buffers import buffer_pool
+from src.models import registry
+from src.config import (
+    CLASSES,
+    TOP_K,
+    OCR_BATCH_SIZE,
+    OCR_INPUT_SIZE,
+    OCR_PREPROCESS,
+    LETTER_FALLBACK,
+    DIGIT_FALLBACK,
+    BUFFER_POOL,
+    BUFFER_PIN,
+)
 
 # ============================================================
 # OCR TRANSFORMS
@@ -14,34 +29,165 @@ from src.config import CLASSES, TOP_K
 
 transform = transforms.Compose([
     transforms.Grayscale(1),
-    transforms.Resize((64, 64)),
+    transforms.Resize((OCR_INPUT_SIZE, OCR_INPUT_SIZE)),
     transforms.ToTensor(),
     transforms.Normalize([0.5], [0.5]),
 ])
 
+# ============================================================
+# OCR PREPROCESSING (NUMPY / OPENCV)
+# ============================================================
+
+@lru_cache(maxsize=512)
+def _resize_weights(in_size, out_size):
+    """
+    (out_size, in_size) weights of PIL's antialiased bilinear resize: a
+    triangle filter widened by the shrink factor, normalized per row
+    """
+    scale = in_size / out_size
+    support = max(scale, 1.0)
+    centers = (np.arange(out_size) + 0.5) * scale
+    pixels = np.arange(in_size) + 0.5
+    w = np.clip(1.0 - np.abs(pixels[None, :] - centers[:, None]) / support, 0.0, None)
+    return (w / w.sum(1, keepdims=True)).astype(np.float32)
+
+
+def _round_u8(x):
+    return np.clip(np.floor(x + 0.5), 0, 255)
+
+
+def _resize_gray(gray, size):
+    """
+    Resize to size x size the way PIL does (horizontal pass, rounded to
+    uint8, then vertical pass), so the output matches `transform`
+    """
+    h, w = gray.shape
+    out = gray.astype(np.float32)
+    if w != size:
+        out = _round_u8(out @ _resize_weights(w, size).T)
+    if h != size:
+        out = _round_u8(_resize_weights(h, size) @ out)
+    return out
+
+
+def preprocess_crops(crops, out=None):
+    """
+    Input:
+        crops (list[np.ndarray]): BGR images of single characters
+        out (np.ndarray, optional): float32 buffer of at least
+            (len(crops), 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE)
+    Output:
+        float32 array (N, 1, S, S), normalized like `transform`
+    """
+    size = OCR_INPUT_SIZE
+
+    if out is None:
+        out = np.empty((len(crops), 1, size, size), dtype=np.float32)
+    else:
+        out = out[:len(crops)]
+
+    for i, crop in enumerate(crops):
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+        out[i, 0] = _resize_gray(gray, size)
+
+    # ToTensor + Normalize([0.5], [0.5])  ==  x / 127.5 - 1
+    out *= 1.0 / 127.5
+    out -= 1.0
+
+    return out
+
+
+def _to_input_tensor(crops):
+    if OCR_PREPROCESS == "pil":
+        return torch.stack([
+            transform(Image.fromarray(cv2.cvtColor(c, cv2.COLOR_BGR2RGB)))
+            for c in crops
+        ])
+    return torch.from_numpy(preprocess_crops(crops))
+
+# ============================================================
+# POOLED INPUT BUFFERS
+# ============================================================
+
+def reserve_ocr_buffers():
+    """
+    Register the OCR input buffers (host, plus device when the model is
+    on a GPU), sized for OCR_BATCH_SIZE, and allocate one of each
+    """
+    device = torch.device(registry.device)
+    row = (1, OCR_INPUT_SIZE, OCR_INPUT_SIZE)
+
+    buffer_pool.register(
+        "ocr_host", row, OCR_BATCH_SIZE, pin=BUFFER_PIN and device.type == "cuda"
+    )
+    buffer_pool.reserve("ocr_host")
+    if device.type != "cpu":
+        buffer_pool.register("ocr_device", row, OCR_BATCH_SIZE, device=device)
+        buffer_pool.reserve("ocr_device")
+
+
+@contextmanager
+def ocr_input(crops):
+    """
+    Crops -> model input on registry.device. With BUFFER_POOL the batch
+    is preprocessed straight into a pooled host buffer (and copied into a
+    pooled device buffer); both go back to the pool on exit.
+    """
+    if not BUFFER_POOL or OCR_PREPROCESS == "pil":
+        yield _to_input_tensor(crops).to(registry.device)
+        return
+
+    if "ocr_host" not in buffer_pool:
+        reserve_ocr_buffers()
+
+    with buffer_pool.lease("ocr_host", len(crops)) as host:
+        preprocess_crops(crops, out=host.numpy())
+        if "ocr_device" not in buffer_pool:
+            yield host
+            return
+        with buffer_pool.lease("ocr_device", len(crops)) as inp:
+            inp.copy_(host, non_blocking=True)
+            yield inp
+
 # ============================================================
 # OCR INFERENCE (CHAR LEVEL)
 # ============================================================
 
-def ocr_crop_with_conf(crop):
+def ocr_crops_with_conf(crops):
     """
     Input:
-        crop (np.ndarray): BGR image of a single character
+        crops (list[np.ndarray]): BGR images of single characters
     Output:
-        List of (char, probability), top-K
+        List of top-K (char, probability) lists, one per crop
     """
-    pil = Image.fromarray(cv2.cvtColor(crop, cv2.COLOR_BGR2RGB))
-    inp = transform(pil).unsqueeze(0).to(device)
+    results = []
+
+    for start in range(0, len(crops), OCR_BATCH_SIZE):
+        batch = crops[start:start + OCR_BATCH_SIZE]
 
-    with torch.no_grad():
-        probs = torch.softmax(ocr_model(inp), dim=1)[0]
+        # .tolist() waits for the model, so the input buffers are free to reuse
+        with ocr_input(batch) as inp, torch.no_grad():
+            probs = torch.softmax(registry.ocr_model(inp), dim=1)
+            topk = torch.topk(probs, TOP_K, dim=1)
+            indices, values = topk.indices.tolist(), topk.values.tolist()
 
-    topk = torch.topk(probs, TOP_K)
+        for crop_indices, crop_values in zip(indices, values):
+            results.append([
+                (CLASSES[i], float(p))
+                for i, p in zip(crop_indices, crop_values)
+            ])
 
-    return [
-        (CLASSES[i], float(p))
-        for i, p in zip(topk.indices, topk.values)
-    ]
+    return results
+
+
+def ocr_crop_with_conf(crop):
+    """
+    Input:
+        crop (np.ndarray): BGR image of a single character
+    Output:
+        List of (char, probability), top-K
+    """
+    return ocr_crops_with_conf([crop])[0]
 
 # ============================================================
 # CONTEXT-AWARE CHARACTER FIXING
@@ -72,24 +218,9 @@ def snap_char_with_context(topk, expected, allow_7_to_1=False):
         if ch0 == "M":
             return "M"
 
-        letter_fallback = {
-            "0": {"O": 0.40, "D": 0.35, "Q": 0.25},
-            "1": {"I": 0.60, "L": 0.40},
-            "2": {"Z": 1.00},
-            "5": {"S": 1.00},
-            "6": {"G": 1.00},
-            "7": {"Z": 1.00},
-            "8": {"B": 1.00},
-            "V": {"W": 1.00},
-            "U": {"V": 1.00},
-            "K": {"X": 0.50, "R": 0.50},
-            "P": {"R": 1.00},
-            "C": {"G": 1.00},
-        }
-
         scores = {}
-        if ch0 in letter_fallback:
-            for tgt, w in letter_fallback[ch0].items():
+        if ch0 in LETTER_FALLBACK:
+            for tgt, w in LETTER_FALLBACK[ch0].items():
                 for ch, p in topk:
                     if ch == tgt and p > 0.20:
                         scores[tgt] = max(scores.get(tgt, 0), p * w)
@@ -107,26 +238,9 @@ def snap_char_with_context(topk, expected, allow_7_to_1=False):
                 if ch in ("1", "I") and p > 0.20:
                     return "1"
 
-        digit_fallback = {
-            "O": {"0": 1.00},
-            "Q": {"0": 1.00},
-            "D": {"0": 1.00},
-            "I": {"1": 1.00},
-            "L": {"1": 1.00},
-            "S": {"5": 1.00},
-            "Z": {"7": 0.70, "2": 0.30},
-            "A": {"4": 0.80, "7": 0.20},
-            "B": {"8": 1.00},
-            "G": {"6": 0.60, "0": 0.40},
-            "T": {"1": 0.60, "7": 0.40},
-            "Y": {"7": 1.00},
-            "X": {"7": 1.00},
-            "R": {"7": 1.00},
-        }
-
         scores = {}
-        if ch0 in digit_fallback:
-            for tgt, w in digit_fallback[ch0].items():
+        if ch0 in DIGIT_FALLBACK:
+            for tgt, w in DIGIT_FALLBACK[ch0].items():
                 for ch, p in topk:
                     if ch == tgt and p > 0.20:
                         scores[tgt] = max(scores.get(tgt, 0), p * w)
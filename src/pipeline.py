@@ -1,111 +1,459 @@
 # src/pipeline.py
 
-import cv2
+import hashlib
 
-from src.models import plate_yolo, char_yolo
-from src.ocr import ocr_crop_with_conf
+import numpy as np
+
+from src.config import (
+    CLASSES,
+    CASCADE_MIN_CONF,
+    TOP_K,
+    OCR_PREPROCESS,
+    MATCH_SIMILARITY,
+    PLATE_YOLO_BATCH_SIZE,
+    CHAR_YOLO_BATCH_SIZE,
+    TILE_SIZE,
+    TILE_OVERLAP,
+    TILE_EDGE_PX,
+)
+from src.metrics import timed, PLATES_PER_IMAGE, CHARS_PER_PLATE, OCR_CROPS_TOTAL
+from src.decode import ReducedImage
+from src.models import registry
+from src.ocr import ocr_crops_with_conf
 from src.utils import (
+    Detections,
     pad_plate,
     remove_duplicate_boxes,
     group_boxes_into_lines,
+    tile_windows,
+    merge_boxes,
 )
-from src.postprocess import apply_plate_grammar, verify_plate
+from src.grammar import CLASS_INDEX, plate_grammar
+from src.postprocess import verify_plate
 
 
+# ============================================================
+# FINGERPRINT
+# ============================================================
+
+def pipeline_fingerprint():
+    """
+    Short hash of everything that shapes the plate strings: models
+    (registry.fingerprint()), grammar tables, OCR top-K / preprocessing,
+    cascade threshold and tiling. Namespaces cached results
+    """
+    return hashlib.sha256("|".join(map(str, (
+        registry.fingerprint(),
+        plate_grammar.fingerprint,
+        TOP_K,
+        OCR_PREPROCESS,
+        CASCADE_MIN_CONF,
+        TILE_SIZE,
+        TILE_OVERLAP,
+        TILE_EDGE_PX,
+    ))).encode()).hexdigest()[:16]
+
 # ============================================================
 # PLATE DETECTION
 # ============================================================
 
-def detect_plates(image):
+def _plate_boxes(result):
     """
-    Detect number plates in an image.
-    Returns list of cropped plate images.
+    Plate YOLO result -> de-duplicated plate Detections
+    """
+    return remove_duplicate_boxes(Detections.from_result(result))
+
+
+def _crop_plates(image, dets):
+    if isinstance(image, ReducedImage):
+        if not len(dets):
+            return []
+        # copies, so the full-resolution frame is freed right away
+        full = image.decode_full()
+        return [crop.copy() for crop in _crop_plates(full, dets)]
+
+    return dets.crops(image)
+
+
+def _full_resolution(images):
+    return [
+        img.decode_full() if isinstance(img, ReducedImage) else img
+        for img in images
+    ]
+
+
+def detect_plate_boxes_tiled(image):
+    """
+    Plate boxes for one image from the whole frame plus overlapping
+    TILE_SIZE tiles at native resolution, all in one plate YOLO call.
+    Tile boxes cut by an inner tile edge are dropped (a neighbouring
+    tile or the whole-frame pass holds the full plate), then everything
+    is merged with NMS in confidence order.
     """
-    result = plate_yolo.predict(
-        image,
-        imgsz=640,
-        conf=0.25,
-        verbose=False
-    )[0]
+    h, w = image.shape[:2]
+    windows = np.concatenate([
+        [[0, 0, w, h]],
+        tile_windows(h, w, TILE_SIZE, TILE_OVERLAP),
+    ])
+
+    with timed("plate_detect"):
+        results = registry.plate_yolo.predict(
+            [image[y1:y2, x1:x2] for x1, y1, x2, y2 in windows],
+            imgsz=640,
+            conf=0.25,
+            verbose=False
+        )
+
+    parts = []
+    for k, ((x1, y1, x2, y2), result) in enumerate(zip(windows, results)):
+        dets = Detections.from_result(result)
+
+        if k > 0:
+            xyxy = dets.xyxy
+            tw, th = x2 - x1, y2 - y1
+            cut = (
+                ((xyxy[:, 0] <= TILE_EDGE_PX) & (x1 > 0))
+                | ((xyxy[:, 1] <= TILE_EDGE_PX) & (y1 > 0))
+                | ((xyxy[:, 2] >= tw - TILE_EDGE_PX) & (x2 < w))
+                | ((xyxy[:, 3] >= th - TILE_EDGE_PX) & (y2 < h))
+            )
+            dets = dets[~cut]
+
+        parts.append(dets.shifted(x1, y1))
+
+    dets = Detections.concat(parts)
+    return dets[merge_boxes(dets.xyxy, dets.conf)]
 
+
+def detect_plate_boxes_batch(images, tiled=False):
+    """
+    Plate boxes for several images, with batched plate YOLO calls.
+    Returns one Detections per input image.
+    ReducedImage inputs are detected on their preview; their boxes are
+    returned in full-resolution coordinates.
+    tiled: one tiled call per image instead (see detect_plate_boxes_tiled)
+    """
+    if tiled:
+        return [
+            detect_plate_boxes_tiled(img)
+            for img in _full_resolution(images)
+        ]
+
+    previews = [
+        img.preview if isinstance(img, ReducedImage) else img
+        for img in images
+    ]
     boxes = []
-    for box in result.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-        boxes.append({
-            "x1": x1, "y1": y1,
-            "x2": x2, "y2": y2
-        })
-
-    boxes = remove_duplicate_boxes(boxes)
-
-    plates = [
-        image[b["y1"]:b["y2"], b["x1"]:b["x2"]]
-        for b in boxes
-        if image[b["y1"]:b["y2"], b["x1"]:b["x2"]].size
+
+    for start in range(0, len(previews), PLATE_YOLO_BATCH_SIZE):
+        batch = previews[start:start + PLATE_YOLO_BATCH_SIZE]
+
+        with timed("plate_detect"):
+            results = registry.plate_yolo.predict(
+                batch,
+                imgsz=640,
+                conf=0.25,
+                verbose=False
+            )
+
+        boxes.extend(_plate_boxes(result) for result in results)
+
+    return [
+        img.boxes_to_full(b) if isinstance(img, ReducedImage) else b
+        for img, b in zip(images, boxes)
     ]
 
-    return plates
 
+def detect_plates_batch(images, tiled=False):
+    """
+    Detect number plates in several images with batched plate YOLO calls.
+    Returns one list of cropped plate images per input image.
+    """
+    if tiled:
+        images = _full_resolution(images)
+
+    return [
+        _crop_plates(image, boxes)
+        for image, boxes in zip(images, detect_plate_boxes_batch(images, tiled))
+    ]
+
+
+def detect_plates(image, tiled=False):
+    """
+    Detect number plates in an image.
+    Returns list of cropped plate images.
+    """
+    return detect_plates_batch([image], tiled)[0]
+
+
+# ============================================================
+# CHARACTER DETECTION ON PLATE
+# ============================================================
+
+def _char_classes():
+    """
+    Char YOLO class id -> OCR character, for classes named after one
+    """
+    return {
+        int(i): str(name).upper()
+        for i, name in (getattr(registry.char_yolo, "names", None) or {}).items()
+        if str(name).upper() in CLASSES
+    }
+
+
+def _char_boxes(result, pad):
+    """
+    Char YOLO result on a padded plate -> Detections in plate coordinates
+    """
+    dets = Detections.from_result(result)
+    dets.xyxy[:, [0, 2]] = np.maximum(0, dets.xyxy[:, [0, 2]] - pad)
+    return dets
+
+
+def detect_char_lines_batch(plate_imgs):
+    """
+    Plate images -> character boxes grouped into lines, per plate.
+    All padded plates go through char YOLO as one batch.
+    """
+    padded = [pad_plate(img) for img in plate_imgs]
+    plates_lines = []
+
+    for start in range(0, len(padded), CHAR_YOLO_BATCH_SIZE):
+        batch = padded[start:start + CHAR_YOLO_BATCH_SIZE]
+
+        with timed("char_detect"):
+            results = registry.char_yolo.predict(
+                [img for img, _ in batch],
+                imgsz=512,
+                conf=0.2,
+                verbose=False
+            )
+
+        for result, (_, pad) in zip(results, batch):
+            plates_lines.append(
+                group_boxes_into_lines(_char_boxes(result, pad))
+            )
+
+    return plates_lines
+
+
+def detect_char_lines(plate_img):
+    """
+    Plate image -> character boxes grouped into lines
+    """
+    return detect_char_lines_batch([plate_img])[0]
+
+
+def nonempty_char_lines(plate_img, lines):
+    """
+    Drop character boxes that crop to nothing (e.g. inside the padding)
+    """
+    return [line[line.nonempty(plate_img.shape)] for line in lines]
+
+
+def crop_char_lines(plate_img, lines):
+    """
+    Character lines -> per-line lists of non-empty character crops
+    """
+    return [line.crops(plate_img) for line in lines]
 
 # ============================================================
 # CHARACTER RECOGNITION ON PLATE
 # ============================================================
 
-def recognize_plate_text(plate_img):
+def _cascade_reads(plates_crop_lines, plates_char_lines):
     """
-    Plate image -> recognized plate string
+    Per plate, one entry per crop: char YOLO's character when it is at
+    least CASCADE_MIN_CONF confident and allowed at its position by the
+    plate's best-fitting format (scored on char YOLO's own reads), else
+    None
     """
-    padded, pad = pad_plate(plate_img)
+    if CASCADE_MIN_CONF <= 0 or plates_char_lines is None:
+        return [
+            [None] * sum(len(crops) for crops in crop_lines)
+            for crop_lines in plates_crop_lines
+        ]
 
-    result = char_yolo.predict(
-        padded,
-        imgsz=512,
-        conf=0.2,
-        verbose=False
-    )[0]
+    classes = _char_classes()
+    plates = []
+    for lines in plates_char_lines:
+        dets = Detections.concat(lines)
+        plates.append([
+            (classes.get(cls), conf)
+            for cls, conf in zip(dets.cls.tolist(), dets.conf.tolist())
+        ])
 
-    boxes = []
-    for box in result.boxes:
-        x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-        boxes.append({
-            "x1": max(0, x1 - pad),
-            "y1": y1,
-            "x2": max(0, x2 - pad),
-            "y2": y2
-        })
-
-    lines = group_boxes_into_lines(boxes)
-    clean_lines = []
-
-    for line in lines:
-        chars = []
-        for b in line:
-            crop = plate_img[b["y1"]:b["y2"], b["x1"]:b["x2"]]
-            if crop.size:
-                topk = ocr_crop_with_conf(crop)
-                chars.append(topk[0][0])
-        clean_lines.append(chars)
-
-    return apply_plate_grammar(clean_lines)
+    with timed("grammar"):
+        masks = plate_grammar.best_masks(
+            [[[(ch or "?", conf)] for ch, conf in plate] for plate in plates]
+        )
+
+    reads = []
+    for plate, plate_masks in zip(plates, masks):
+        plate_reads = []
+        for pos, (ch, conf) in enumerate(plate):
+            ok = (
+                ch is not None
+                and plate_masks is not None
+                and conf >= CASCADE_MIN_CONF
+                and plate_masks[pos, CLASS_INDEX[ch]]
+            )
+            plate_reads.append(ch if ok else None)
+        reads.append(plate_reads)
+    return reads
+
+
+def read_plates_text(plates_crop_lines, plates_char_lines=None):
+    """
+    Per-plate character crop lines -> plate strings.
+    Every crop of every plate goes through a single OCR batch, except
+    crops the cascade accepts from char YOLO (plates_char_lines: the
+    boxes behind the crops, see CASCADE_MIN_CONF).
+    """
+    reads = _cascade_reads(plates_crop_lines, plates_char_lines)
+    flat = [
+        crop
+        for crop_lines, plate_reads in zip(plates_crop_lines, reads)
+        for crop, ch in zip(
+            (crop for crops in crop_lines for crop in crops), plate_reads
+        )
+        if ch is None
+    ]
+    total = sum(len(plate_reads) for plate_reads in reads)
+    OCR_CROPS_TOTAL.labels("classifier").inc(len(flat))
+    OCR_CROPS_TOTAL.labels("detector").inc(total - len(flat))
+
+    with timed("ocr"):
+        topks = iter(ocr_crops_with_conf(flat))
+
+    # OCR top-K per character (cascade reads count as certain), scored
+    # against every plate format in one grammar pass
+    with timed("grammar"):
+        plates_topk = []
+        for plate_reads in reads:
+            plates_topk.append([
+                next(topks) if ch is None else [(ch, 1.0)]
+                for ch in plate_reads
+            ])
+            CHARS_PER_PLATE.observe(len(plate_reads))
+        texts, _ = plate_grammar.decode_batch(plates_topk)
+
+    return texts
+
+
+def recognize_plates_text(plate_imgs):
+    """
+    Plate images -> recognized plate strings, batched end to end
+    """
+    plates_lines = [
+        nonempty_char_lines(plate, lines)
+        for plate, lines in zip(plate_imgs, detect_char_lines_batch(plate_imgs))
+    ]
+    return read_plates_text(
+        [
+            crop_char_lines(plate, lines)
+            for plate, lines in zip(plate_imgs, plates_lines)
+        ],
+        plates_lines
+    )
+
+
+def recognize_plate_text(plate_img):
+    """
+    Plate image -> recognized plate string
+    """
+    return recognize_plates_text([plate_img])[0]
 
 
 # ============================================================
 # FULL PIPELINE (PUBLIC API)
 # ============================================================
 
-def run_anpr(image, assigned_vehicle_number=None):
+def recognize_plates_batch(images, tiled=False):
+    """
+    Images -> post-grammar plate strings, one list per image.
+    One plate YOLO batch, one char YOLO batch over every plate and one
+    OCR batch over every character.
+    """
+    images_plates = detect_plates_batch(images, tiled)
+    all_plates = [plate for plates in images_plates for plate in plates]
+
+    for plates in images_plates:
+        PLATES_PER_IMAGE.observe(len(plates))
+
+    plate_texts = iter(recognize_plates_text(all_plates))
+
+    return [
+        [next(plate_texts) for _ in plates]
+        for plates in images_plates
+    ]
+
+
+def verify_plates(plate_texts, assigned_vehicle_number=None):
+    """
+    Plate strings of one image -> run_anpr style verdicts
+    """
+    with timed("verify"):
+        return [
+            verify_plate(plate_text, assigned_vehicle_number)
+            for plate_text in plate_texts
+        ]
+
+
+def run_anpr_batch(images, assigned_vehicle_numbers=None, tiled=False):
+    """
+    Full ANPR pipeline over several images; run_anpr output per image.
+    """
+    if assigned_vehicle_numbers is None:
+        assigned_vehicle_numbers = [None] * len(images)
+
+    return [
+        verify_plates(plate_texts, assigned)
+        for plate_texts, assigned in zip(
+            recognize_plates_batch(images, tiled), assigned_vehicle_numbers
+        )
+    ]
+
+
+def run_anpr(image, assigned_vehicle_number=None, tiled=False):
     """
     Full ANPR pipeline.
+    tiled: also search overlapping full-resolution tiles for small plates
     """
-    plates = detect_plates(image)
-    results = []
+    return run_anpr_batch([image], [assigned_vehicle_number], tiled)[0]
+
+# ============================================================
+# VERIFICATION-FIRST (EARLY EXIT)
+# ============================================================
+
+def plate_priority(dets):
+    """
+    Order in which verify_first reads plates: detector confidence times
+    box area, so large, sure plates (the one at the gate) come first
+    """
+    return dets.conf * dets.areas
+
+
+def verify_first(image, assigned_vehicle_number, tiled=False):
+    """
+    One image + assigned number -> (run_anpr results, plates_skipped).
+    Plates are recognized one at a time in plate_priority order until
+    one reaches MATCH_SIMILARITY; the rest are never sent to char YOLO
+    or OCR. Results are in reading order, so a MATCH is the last one.
+    """
+    if tiled:
+        image = _full_resolution([image])[0]
+
+    dets = detect_plate_boxes_batch([image], tiled)[0]
+    dets = dets[dets.nonempty(image.shape)]
+    plates = _crop_plates(image, dets[np.argsort(-plate_priority(dets), kind="stable")])
+    PLATES_PER_IMAGE.observe(len(plates))
 
+    results = []
     for plate in plates:
-        plate_text = recognize_plate_text(plate)
-        verdict = verify_plate(
-            plate_text,
-            assigned_vehicle_number
-        )
-        results.append(verdict)
+        result = verify_plates(recognize_plates_text([plate]), assigned_vehicle_number)[0]
+        results.append(result)
+        if result.get("similarity", 0) >= MATCH_SIMILARITY:
+            break
 
-    return results
+    return results, len(plates) - len(results)
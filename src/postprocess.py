@@ -1,13 +1,14 @@
 # src/postprocess.py
 
-from rapidfuzz import fuzz
+import numpy as np
+from rapidfuzz import fuzz, process
 
 from src.config import (
     CONFUSION_MAP,
-    DIGIT_TO_LETTER,
-    LETTER_TO_DIGIT,
-    VALID_STATES,
+    MATCH_SIMILARITY,
+    POSSIBLE_MATCH_SIMILARITY,
 )
+from src.grammar import plate_grammar
 
 # ============================================================
 # NORMALIZATION
@@ -16,6 +17,21 @@ from src.config import (
 def normalize_plate(text: str) -> str:
     return "".join(CONFUSION_MAP.get(c, c) for c in text)
 
+
+# Same mapping as normalize_plate, precompiled for bulk normalization
+CONFUSION_TABLE = str.maketrans(CONFUSION_MAP)
+
+
+def normalize_plates(texts):
+    """
+    normalize_plate over many strings: one str.translate over the joined
+    texts instead of a call per plate
+    """
+    out = "\0".join(texts).translate(CONFUSION_TABLE).split("\0")
+    if len(out) != len(texts):   # empty input, or a text held the separator
+        out = [t.translate(CONFUSION_TABLE) for t in texts]
+    return out
+
 # ============================================================
 # PLATE GRAMMAR ENFORCEMENT (INDIA)
 # ============================================================
@@ -23,50 +39,25 @@ def normalize_plate(text: str) -> str:
 def apply_plate_grammar(clean_lines):
     """
     Input: list of character lists (lines)
-    Output: corrected plate string
+    Output: corrected plate string, read as the best-fitting
+            PLATE_FORMATS layout (see src/grammar.py)
     """
-    plate = "".join("".join(line) for line in clean_lines)
-
-    if len(plate) < 8:
-        return plate
-
-    chars = list(plate)
-
-    # STATE (0–1): letters only
-    for i in (0, 1):
-        if chars[i].isdigit():
-            chars[i] = DIGIT_TO_LETTER.get(chars[i], chars[i])
-
-    state = "".join(chars[0:2])
-    if state not in VALID_STATES:
-        for i in (0, 1):
-            if chars[i] in LETTER_TO_DIGIT:
-                chars[i] = LETTER_TO_DIGIT[chars[i]]
-        for i in (0, 1):
-            if chars[i].isdigit():
-                chars[i] = DIGIT_TO_LETTER.get(chars[i], chars[i])
-
-    # DISTRICT (2–3): digits only
-    for i in (2, 3):
-        if chars[i].isalpha():
-            chars[i] = LETTER_TO_DIGIT.get(chars[i], "0")
-
-    # SERIES (4–5): letters only
-    for i in (4, 5):
-        if chars[i].isdigit():
-            chars[i] = DIGIT_TO_LETTER.get(chars[i], chars[i])
-
-    # NUMBER (last 4): digits only
-    for i in range(len(chars) - 4, len(chars)):
-        if chars[i].isalpha():
-            chars[i] = LETTER_TO_DIGIT.get(chars[i], chars[i])
-
-    return "".join(chars)
+    return plate_grammar.decode(
+        [[(c, 1.0)] for line in clean_lines for c in line]
+    )[0]
 
 # ============================================================
 # VERIFICATION / MATCHING
 # ============================================================
 
+def similarity_verdict(similarity):
+    if similarity >= MATCH_SIMILARITY:
+        return "MATCH"
+    if similarity >= POSSIBLE_MATCH_SIMILARITY:
+        return "POSSIBLE_MATCH"
+    return "NOT_MATCH"
+
+
 def verify_plate(recognized: str, assigned: str | None = None):
     """
     Compare recognized plate with assigned vehicle number
@@ -81,13 +72,7 @@ def verify_plate(recognized: str, assigned: str | None = None):
     norm_ass = normalize_plate(assigned)
 
     similarity = fuzz.ratio(norm_rec, norm_ass)
-
-    if similarity >= 92:
-        verdict = "MATCH"
-    elif similarity >= 80:
-        verdict = "POSSIBLE_MATCH"
-    else:
-        verdict = "NOT_MATCH"
+    verdict = similarity_verdict(similarity)
 
     return {
         "recognized": recognized,
@@ -96,3 +81,44 @@ def verify_plate(recognized: str, assigned: str | None = None):
         "similarity": similarity,
         "verdict": verdict
     }
+
+# ============================================================
+# BULK VERIFICATION
+# ============================================================
+
+# verify_plates_bulk verdict codes
+VERDICT_CODES = ("NOT_MATCH", "POSSIBLE_MATCH", "MATCH", "NO_REFERENCE")
+NOT_MATCH, POSSIBLE_MATCH, MATCH, NO_REFERENCE = range(4)
+
+
+def verify_plates_bulk(recognized, assigned, workers=-1):
+    """
+    Input:
+        recognized, assigned: equal-length sequences of plate strings
+            (assigned entries may be None / "")
+    Output:
+        (similarity float64 array, verdict code int8 array), element i
+        matching verify_plate(recognized[i], assigned[i]); similarity is
+        NaN where there is no reference. Codes index VERDICT_CODES.
+    """
+    if len(recognized) != len(assigned):
+        raise ValueError("recognized and assigned differ in length")
+
+    has_ref = np.fromiter(
+        (bool(a) for a in assigned), dtype=bool, count=len(assigned)
+    )
+    similarity = process.cpdist(
+        normalize_plates(recognized),
+        normalize_plates([a or "" for a in assigned]),
+        scorer=fuzz.ratio,
+        dtype=np.float64,
+        workers=workers,
+    )
+
+    verdict = np.full(len(similarity), NOT_MATCH, dtype=np.int8)
+    verdict[similarity >= POSSIBLE_MATCH_SIMILARITY] = POSSIBLE_MATCH
+    verdict[similarity >= MATCH_SIMILARITY] = MATCH
+    verdict[~has_ref] = NO_REFERENCE
+    similarity[~has_ref] = np.nan
+
+    return similarity, verdict
@@ -0,0 +1,314 @@
+# src/quantize.py
+#
+# python -m src.export --formats onnx
+# python -m src.quantize --mode dynamic static --images data/scenes --chars data/char_crops
+# VNPR_BACKEND=onnx VNPR_QUANTIZE=static uvicorn api:app
+
+import os
+import json
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from src.archive import is_image_name
+from src.config import OCR_BATCH_SIZE, QUANT_MIN_AGREEMENT, QUANT_REPORT
+from src.models import (
+    agreement_score,
+    backend_paths,
+    file_sha256,
+    quantized_path,
+    registry,
+    OnnxOcrModel,
+)
+from src.utils import pad_plate
+
+MODES = ("dynamic", "static")
+MODELS = ("plate_yolo", "char_yolo", "ocr_model")
+
+# Input size each detector was exported at (see src/export.py)
+YOLO_IMGSZ = {"plate_yolo": 640, "char_yolo": 512}
+
+# ============================================================
+# STORED IMAGES / CHARACTER CROPS
+# ============================================================
+
+def read_image_dir(path, limit=None):
+    names = sorted(n for n in os.listdir(path) if is_image_name(n))[:limit]
+    images = [cv2.imread(os.path.join(path, n)) for n in names]
+    return [img for img in images if img is not None]
+
+
+def collect_char_crops(images, out_dir):
+    """
+    Run the fp32 pipeline on images and store every character crop
+    as a PNG in out_dir. Returns the crops.
+    """
+    from src.pipeline import detect_plates_batch, detect_char_lines_batch, crop_char_lines
+
+    plates = [p for per_image in detect_plates_batch(images) for p in per_image]
+    crops = [
+        crop
+        for plate, lines in zip(plates, detect_char_lines_batch(plates))
+        for crop_line in crop_char_lines(plate, lines)
+        for crop in crop_line
+    ]
+
+    os.makedirs(out_dir, exist_ok=True)
+    for i, crop in enumerate(crops):
+        cv2.imwrite(os.path.join(out_dir, f"{i:06d}.png"), crop)
+    return crops
+
+# ============================================================
+# CALIBRATION INPUTS
+# ============================================================
+
+def letterbox(img, size):
+    """
+    BGR image -> (3, size, size) float32 RGB in [0, 1], aspect kept and
+    padded with grey, as Ultralytics feeds a square ONNX input
+    """
+    h, w = img.shape[:2]
+    r = min(size / h, size / w)
+    nw, nh = round(w * r), round(h * r)
+    out = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - nh) // 2, (size - nw) // 2
+    out[top:top + nh, left:left + nw] = cv2.resize(
+        img, (nw, nh), interpolation=cv2.INTER_LINEAR
+    )
+    return out[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+
+
+def calibration_batches(name, images, crops, batch_size=8):
+    """
+    Model inputs for static calibration: scenes for plate YOLO, padded
+    plate crops for char YOLO, stored character crops for OCR
+    """
+    from src.ocr import preprocess_crops
+
+    if name == "ocr_model":
+        return [
+            preprocess_crops(crops[i:i + OCR_BATCH_SIZE])
+            for i in range(0, len(crops), OCR_BATCH_SIZE)
+        ]
+
+    if name == "char_yolo":
+        from src.pipeline import detect_plates_batch
+        images = [
+            pad_plate(p)[0]
+            for per_image in detect_plates_batch(images)
+            for p in per_image
+        ]
+
+    inputs = [letterbox(img, YOLO_IMGSZ[name]) for img in images]
+    return [
+        np.stack(inputs[i:i + batch_size])
+        for i in range(0, len(inputs), batch_size)
+    ]
+
+
+def _reader(onnx_path, batches):
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import CalibrationDataReader
+
+    input_name = InferenceSession(
+        onnx_path, providers=["CPUExecutionProvider"]
+    ).get_inputs()[0].name
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self._batches = iter(batches)
+
+        def get_next(self):
+            batch = next(self._batches, None)
+            return None if batch is None else {input_name: batch}
+
+    return Reader()
+
+# ============================================================
+# QUANTIZATION (ONNX RUNTIME)
+# ============================================================
+
+def quantize_model(name, mode, batches=None):
+    """
+    fp32 ONNX export -> INT8 ONNX at quantized_path(name, mode).
+    dynamic: INT8 weights, activations quantized per call.
+    static : INT8 weights and activations (QDQ), activation ranges
+             calibrated on batches.
+    """
+    from onnxruntime.quantization import (
+        QuantFormat,
+        QuantType,
+        quantize_dynamic,
+        quantize_static,
+    )
+
+    src = backend_paths("onnx")[name]
+    dst = quantized_path(name, mode)
+
+    if mode == "dynamic":
+        # ConvInteger on CPU takes uint8 weights
+        quantize_dynamic(src, dst, weight_type=QuantType.QUInt8)
+    else:
+        quantize_static(
+            src, dst, _reader(src, batches),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+    return dst
+
+# ============================================================
+# AGREEMENT WITH FP32
+# ============================================================
+
+def ocr_top1_agreement(qpath, crops):
+    from src.ocr import preprocess_crops
+
+    fp32 = OnnxOcrModel(backend_paths("onnx")["ocr_model"])
+    int8 = OnnxOcrModel(qpath)
+    same = 0
+
+    for i in range(0, len(crops), OCR_BATCH_SIZE):
+        x = preprocess_crops(crops[i:i + OCR_BATCH_SIZE])
+        a = fp32.session.run(None, {fp32.input_name: x})[0].argmax(1)
+        b = int8.session.run(None, {int8.input_name: x})[0].argmax(1)
+        same += int((a == b).sum())
+
+    return same / len(crops) if crops else 1.0
+
+
+def read_all(images):
+    """
+    Plate strings per image with the registry's current models, and the
+    wall time it took
+    """
+    from src.pipeline import recognize_plates_batch
+
+    start = time.perf_counter()
+    texts = recognize_plates_batch(images)
+    return texts, time.perf_counter() - start
+
+
+def plate_agreement(ref, texts):
+    same = sum(sorted(a) == sorted(b) for a, b in zip(ref, texts))
+    return same / len(ref) if ref else 1.0
+
+
+def evaluate(mode, names, images, crops):
+    """
+    Swap each INT8 model in alone, then all together, and compare plate
+    strings with the fp32 onnx models. Entries record the SHA-256 of the
+    INT8 files they measured, so the registry can tell a stale report.
+    """
+    registry.use_backend("onnx")
+    registry.warmup()
+    read_all(images[:2])
+    ref, ref_s = read_all(images)
+
+    fp32_paths = dict(registry.paths)
+    report = {}
+
+    for name in names + ["all"]:
+        swapped = names if name == "all" else [name]
+        for n in swapped:
+            registry.swap(n, quantized_path(n, mode))
+        registry.warmup()
+        read_all(images[:2])
+
+        texts, seconds = read_all(images)
+        entry = {
+            "agreement": plate_agreement(ref, texts),
+            "speedup": ref_s / seconds if seconds else 0.0,
+        }
+        if name == "ocr_model":
+            entry["top1_agreement"] = ocr_top1_agreement(
+                quantized_path(name, mode), crops
+            )
+        if name == "all":
+            entry["files"] = {n: file_sha256(quantized_path(n, mode)) for n in names}
+        else:
+            entry["size_mb"] = os.path.getsize(quantized_path(name, mode)) / 2**20
+            entry["sha256"] = file_sha256(quantized_path(name, mode))
+        report[name] = entry
+
+        for n in swapped:
+            registry.swap(n, fp32_paths[n])
+
+    return report
+
+
+def write_report(mode, entries, path=QUANT_REPORT):
+    """
+    Merge one mode's results into the report read by the model registry
+    """
+    try:
+        with open(path) as f:
+            report = json.load(f)
+    except (OSError, ValueError):
+        report = {}
+
+    report.setdefault(mode, {}).update(entries)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+# ============================================================
+# CLI
+# ============================================================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="INT8 quantization + agreement check")
+    parser.add_argument("--mode", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--images", required=True,
+                        help="scene images: detector calibration + plate agreement")
+    parser.add_argument("--chars", default="data/char_crops",
+                        help="stored character crops (collected from --images if empty)")
+    parser.add_argument("--calib-size", type=int, default=512,
+                        help="max images / crops used for static calibration")
+    args = parser.parse_args(argv)
+
+    images = read_image_dir(args.images)
+
+    registry.use_backend("onnx")
+    crops = read_image_dir(args.chars) if os.path.isdir(args.chars) else []
+    if not crops:
+        crops = collect_char_crops(images, args.chars)
+        print(f"stored {len(crops)} character crops in {args.chars}")
+
+    for mode in args.mode:
+        names = []
+        for name in args.models:
+            batches = None
+            if mode == "static":
+                batches = calibration_batches(
+                    name, images[:args.calib_size], crops[:args.calib_size]
+                )
+                if not batches:
+                    print(f"{mode:8} {name:10} skipped: no calibration inputs")
+                    continue
+            print(f"{mode:8} {name:10} -> {quantize_model(name, mode, batches)}")
+            names.append(name)
+
+        if not names:
+            continue
+        report = evaluate(mode, names, images, crops)
+        write_report(mode, report)
+
+        # same rule as the registry (src.models.quant_status): a model is
+        # served as INT8 only if it and "all" both pass
+        all_ok = agreement_score(report["all"]) >= QUANT_MIN_AGREEMENT
+        for name, r in report.items():
+            ok = agreement_score(r) >= QUANT_MIN_AGREEMENT
+            verdict = "ok" if ok and all_ok else "REJECTED" if not ok else "REJECTED (all)"
+            top1 = f"  top-1 {r['top1_agreement']:.4f}" if "top1_agreement" in r else ""
+            print(f"{mode:8} {name:10} plate agree {r['agreement']:.4f}{top1}  "
+                  f"{r['speedup']:5.2f}x  {verdict}")
+
+    print(f"\nwritten: {QUANT_REPORT} (threshold {QUANT_MIN_AGREEMENT})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# src/scheduler.py
+
+import asyncio
+
+from src.executor import QueueFullError
+
+# ============================================================
+# CROSS-REQUEST MICRO-BATCHING
+# ============================================================
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for up to max_wait_ms (or until
+    max_batch requests are waiting) and runs each group as one call
+    to batch_fn on the inference executor.
+
+    batch_fn(items) must return one result per item; an Exception
+    instance in the output fails only that item's request.
+    """
+
+    def __init__(self, executor, batch_fn, max_batch=8, max_wait_ms=5.0,
+                 max_pending=64):
+        self.executor = executor
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_pending = max_pending
+
+        self._queue = None
+        self._task = None
+        self._stopped = False
+        self._dispatches = set()
+
+        self.pending = 0
+        self.batches = 0
+        self.batched_items = 0
+        self.rejected = 0
+
+    # ---------------- lifecycle ----------------
+
+    def start(self):
+        """
+        Start the collector on the running loop (submit() also starts it
+        on first use)
+        """
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if self._task is None:
+            self._stopped = False
+            self._task = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self):
+        """
+        Stop collecting: queued requests fail with QueueFullError (a 503
+        for the client), groups already on the executor finish normally
+        """
+        self._stopped = True
+        if self._task is not None:
+            # sentinel rather than cancel(): wait_for() can swallow a
+            # cancellation that races with a completed get()
+            self._queue.put_nowait(None)
+            await self._task
+            self._task = None
+
+        while self._queue is not None and not self._queue.empty():
+            entry = self._queue.get_nowait()
+            if entry is not None:
+                self._fail([entry[1]], QueueFullError("Server is shutting down"))
+
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+
+    @staticmethod
+    def _fail(futures, error):
+        for future in futures:
+            if not future.done():
+                future.set_exception(error)
+
+    # ---------------- request side ----------------
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its own result
+        """
+        if self._stopped:
+            raise QueueFullError("Server is shutting down")
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise QueueFullError("Batch queue is full")
+        if self._task is None:
+            self.start()
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending += 1
+        self._queue.put_nowait((item, future))
+
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    # ---------------- batching side ----------------
+
+    async def _collect(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            entry = await self._queue.get()
+            if entry is None:
+                return
+            batch = [entry]
+            deadline = loop.time() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if entry is None:
+                    # stopped while this group was forming
+                    self._fail(
+                        [fut for _, fut in batch],
+                        QueueFullError("Server is shutting down")
+                    )
+                    return
+                batch.append(entry)
+
+            # Run without awaiting so the next group can form meanwhile
+            task = loop.create_task(self._dispatch(batch))
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _dispatch(self, batch):
+        batch = [(item, fut) for item, fut in batch if not fut.done()]
+        if not batch:
+            return
+
+        self.batches += 1
+        self.batched_items += len(batch)
+
+        try:
+            results = await self.executor.run(
+                self.batch_fn, [item for item, _ in batch]
+            )
+        except Exception as e:
+            self._fail([fut for _, fut in batch], e)
+            return
+        except asyncio.CancelledError:
+            self._fail([fut for _, fut in batch], QueueFullError("Server is shutting down"))
+            raise
+
+        for (_, fut), result in zip(batch, results):
+            if fut.done():
+                continue
+            if isinstance(result, Exception):
+                fut.set_exception(result)
+            else:
+                fut.set_result(result)
+
+    def stats(self):
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "pending": self.pending,
+            "batches": self.batches,
+            "avg_batch_size": (
+                self.batched_items / self.batches if self.batches else 0.0
+            ),
+            "rejected": self.rejected,
+        }
@@ -16,131 +16,311 @@ def pad_plate(img, ratio=0.18):
     )
     return padded, pad
 
+# ============================================================
+# DETECTIONS (STRUCTURE OF ARRAYS)
+# ============================================================
+
+class Detections:
+    """
+    Boxes of one image / plate / line as parallel arrays:
+      xyxy (N, 4) float64 whole-pixel x1, y1, x2, y2
+      conf (N,)   detector confidence
+      cls  (N,)   detector class id (-1 for synthetic boxes)
+    Indexing with an index array / mask / slice returns a Detections.
+    """
+
+    __slots__ = ("xyxy", "conf", "cls")
+
+    def __init__(self, xyxy=None, conf=None, cls=None):
+        self.xyxy = np.asarray(
+            np.empty((0, 4)) if xyxy is None else xyxy, dtype=np.float64
+        ).reshape(-1, 4)
+        n = len(self.xyxy)
+        self.conf = np.ones(n) if conf is None else np.asarray(conf, dtype=np.float64)
+        self.cls = np.full(n, -1, dtype=np.int64) if cls is None else np.asarray(cls, dtype=np.int64)
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        YOLO result -> Detections in one device -> host copy of
+        boxes.data (x1, y1, x2, y2, [track id,] conf, cls rows).
+        Coordinates are truncated to whole pixels.
+        """
+        data = result.boxes.data.cpu().numpy().astype(np.float64)
+        return cls(np.trunc(data[:, :4]), data[:, -2], data[:, -1])
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        if not parts:
+            return cls()
+        return cls(
+            np.concatenate([d.xyxy for d in parts]),
+            np.concatenate([d.conf for d in parts]),
+            np.concatenate([d.cls for d in parts]),
+        )
+
+    def __len__(self):
+        return len(self.xyxy)
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            index = [index]
+        return Detections(self.xyxy[index], self.conf[index], self.cls[index])
+
+    def __repr__(self):
+        return f"Detections(n={len(self)})"
+
+    @property
+    def ints(self):
+        """
+        (N, 4) int64 coordinates, for slicing images
+        """
+        return self.xyxy.astype(np.int64)
+
+    @property
+    def areas(self):
+        return (self.xyxy[:, 2] - self.xyxy[:, 0]) * (self.xyxy[:, 3] - self.xyxy[:, 1])
+
+    def shifted(self, dx, dy):
+        return Detections(self.xyxy + [dx, dy, dx, dy], self.conf, self.cls)
+
+    def nonempty(self, shape):
+        """
+        Mask of boxes that crop to at least one pixel of an image of this
+        shape (coordinates are >= 0)
+        """
+        h, w = shape[:2]
+        xyxy = self.ints
+        return (
+            (np.minimum(xyxy[:, 2], w) > xyxy[:, 0])
+            & (np.minimum(xyxy[:, 3], h) > xyxy[:, 1])
+        )
+
+    def crops(self, image):
+        """
+        Views of image under every box, empty crops left out
+        """
+        return [
+            image[y1:y2, x1:x2]
+            for x1, y1, x2, y2 in self.ints[self.nonempty(image.shape)].tolist()
+        ]
+
 # ============================================================
 # IOU + BOX CLEANUP
 # ============================================================
 
-def compute_iou(b1, b2):
-    x1 = max(b1["x1"], b2["x1"])
-    y1 = max(b1["y1"], b2["y1"])
-    x2 = min(b1["x2"], b2["x2"])
-    y2 = min(b1["y2"], b2["y2"])
-
-    inter = max(0, x2 - x1) * max(0, y2 - y1)
-    area1 = (b1["x2"] - b1["x1"]) * (b1["y2"] - b1["y1"])
-    area2 = (b2["x2"] - b2["x1"]) * (b2["y2"] - b2["y1"])
-    union = area1 + area2 - inter
-
-    return 0 if union <= 0 else inter / union
-
-
-def remove_duplicate_boxes(boxes, thr=0.42):
-    out = []
-    for b in boxes:
-        keep = True
-        for o in out:
-            if compute_iou(b, o) > thr:
-                keep = False
-                break
-        if keep:
-            out.append(b)
-    return out
+def compute_iou(b1, b2, eps=0.0):
+    """
+    IoU of two x1, y1, x2, y2 boxes (sequences of floats); 0 where the
+    union is empty, as in iou_matrix
+    """
+    w = min(b1[2], b2[2]) - max(b1[0], b2[0])
+    h = min(b1[3], b2[3]) - max(b1[1], b2[1])
+    inter = max(0.0, w) * max(0.0, h)
+    union = (
+        (b1[2] - b1[0]) * (b1[3] - b1[1])
+        + (b2[2] - b2[0]) * (b2[3] - b2[1])
+        - inter + eps
+    )
+    return float(inter / union) if union > 0 else 0.0
+
+
+def remove_duplicate_boxes(dets, thr=0.42):
+    if not len(dets):
+        return dets
+    return dets[nms_keep(dets.xyxy, thr)]
 
 # ============================================================
-# CHARACTER STRUCTURE RECOVERY
+# VECTORIZED BOX OPS ((N, 4) x1, y1, x2, y2 ARRAYS)
 # ============================================================
 
-def group_boxes_into_lines(boxes):
-    if not boxes:
-        return []
 
-    for b in boxes:
-        b["cy"] = (b["y1"] + b["y2"]) / 2
-        b["h"] = b["y2"] - b["y1"]
+def iou_matrix(a, b=None, eps=0.0):
+    """
+    (N, 4), (M, 4) -> (N, M) IoU; 0 where the union is empty.
+    eps is added to the union (remove_duplicate_chars uses 1e-6).
+    """
+    if b is None:
+        b = a
 
-    avg_h = np.mean([b["h"] for b in boxes])
-    thr = avg_h * 0.6
+    w = np.minimum(a[:, None, 2], b[None, :, 2]) - np.maximum(a[:, None, 0], b[None, :, 0])
+    h = np.minimum(a[:, None, 3], b[None, :, 3]) - np.maximum(a[:, None, 1], b[None, :, 1])
+    inter = np.clip(w, 0, None) * np.clip(h, 0, None)
 
-    boxes = sorted(boxes, key=lambda x: x["cy"])
-    lines = [[boxes[0]]]
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter + eps
+
+    out = np.zeros_like(union)
+    np.divide(inter, union, out=out, where=union > 0)
+    return out
 
-    for b in boxes[1:]:
-        if abs(b["cy"] - np.mean([x["cy"] for x in lines[-1]])) <= thr:
-            lines[-1].append(b)
-        else:
-            lines.append([b])
 
-    return [sorted(line, key=lambda x: x["x1"]) for line in lines]
+def nms_keep(arr, thr=0.42):
+    """
+    Greedy in-order de-duplication: a box is kept unless its IoU with an
+    earlier kept box exceeds thr. Returns kept indices.
+    """
+    n = len(arr)
+    iou = iou_matrix(arr)
+    keep = np.ones(n, dtype=bool)
 
+    for i in range(n):
+        if keep[i]:
+            keep[i + 1:] &= iou[i, i + 1:] <= thr
 
-def remove_duplicate_chars(dets, iou_thresh=0.6):
-    if not dets:
+    return np.flatnonzero(keep)
+
+
+def tile_windows(h, w, size, overlap):
+    """
+    Overlapping size x size windows covering an h x w image, as a (K, 4)
+    int array of x1, y1, x2, y2. Neighbours share at least
+    overlap * size pixels; the last window on each axis ends at the
+    image edge.
+    """
+    def starts(length):
+        if length <= size:
+            return np.zeros(1, dtype=np.int64)
+        step = size * (1 - overlap)
+        n = int(np.ceil((length - size) / step)) + 1
+        return np.linspace(0, length - size, n).round().astype(np.int64)
+
+    ys, xs = np.meshgrid(starts(h), starts(w), indexing="ij")
+    x1, y1 = xs.ravel(), ys.ravel()
+    return np.stack([
+        x1, y1,
+        np.minimum(x1 + size, w), np.minimum(y1 + size, h),
+    ], axis=1)
+
+
+def merge_boxes(arr, conf, thr=0.42):
+    """
+    nms_keep in descending confidence order, for boxes gathered from
+    several passes (tiles + full frame). Returns kept indices.
+    """
+    if not len(arr):
+        return np.empty(0, dtype=np.intp)
+    order = np.argsort(-conf, kind="stable")
+    return order[nms_keep(arr[order], thr)]
+
+
+def group_lines_array(arr, ratio=0.6):
+    """
+    (N, 4) -> list of index arrays, one per text line (top to bottom),
+    each sorted left to right. A box joins the current line when its
+    center is within ratio * mean box height of the line's running mean.
+    """
+    if not len(arr):
         return []
 
-    out = [dets[0]]
+    cy = (arr[:, 1] + arr[:, 3]) / 2
+    thr = np.mean(arr[:, 3] - arr[:, 1]) * ratio
+
+    order = np.argsort(cy, kind="stable")
+    cy_sorted = cy[order].tolist()
+
+    lines = [[order[0]]]
+    line_sum, line_n = cy_sorted[0], 1
+
+    for i, c in zip(order[1:].tolist(), cy_sorted[1:]):
+        if abs(c - line_sum / line_n) <= thr:
+            lines[-1].append(i)
+            line_sum += c
+            line_n += 1
+        else:
+            lines.append([i])
+            line_sum, line_n = c, 1
+
+    x1 = arr[:, 0]
+    return [
+        np.asarray(line)[np.argsort(x1[line], kind="stable")]
+        for line in lines
+    ]
 
-    for c in dets[1:]:
-        p = out[-1]
 
-        xa = max(c["x1"], p["x1"])
-        ya = max(c["y1"], p["y1"])
-        xb = min(c["x2"], p["x2"])
-        yb = min(c["y2"], p["y2"])
+def dedup_chars_array(arr, labels, iou_thresh=0.6):
+    """
+    Drop a char box that has the same top-1 label as the last kept box
+    and overlaps it by more than iou_thresh. Returns kept indices.
+    """
+    n = len(arr)
+    if not n:
+        return np.empty(0, dtype=np.intp)
 
-        inter = max(0, xb - xa) * max(0, yb - ya)
-        a1 = (c["x2"] - c["x1"]) * (c["y2"] - c["y1"])
-        a2 = (p["x2"] - p["x1"]) * (p["y2"] - p["y1"])
-        iou = inter / (a1 + a2 - inter + 1e-6)
+    # only (box, last kept box) pairs with equal labels are ever compared
+    boxes = arr.tolist()
+    keep = [0]
 
-        if c["topk"][0][0] == p["topk"][0][0] and iou > iou_thresh:
+    for i in range(1, n):
+        p = keep[-1]
+        if (labels[i] == labels[p]
+                and compute_iou(boxes[i], boxes[p], eps=1e-6) > iou_thresh):
             continue
+        keep.append(i)
 
-        out.append(c)
+    return np.asarray(keep)
+
+# ============================================================
+# CHARACTER STRUCTURE RECOVERY
+# ============================================================
+
+def group_boxes_into_lines(dets):
+    """
+    Detections -> one Detections per text line, top to bottom, each
+    left to right
+    """
+    return [dets[line] for line in group_lines_array(dets.xyxy)]
 
-    return out
+
+def remove_duplicate_chars(dets, labels, iou_thresh=0.6):
+    """
+    labels: top-1 character per box
+    """
+    if not len(dets):
+        return dets
+    return dets[dedup_chars_array(dets.xyxy, labels, iou_thresh)]
 
 
 def recover_line_to_length(dets, plate_img, target_len=5):
-    recovered = 0
-    if not dets:
-        return dets, recovered
-
-    widths = [d["x2"] - d["x1"] for d in dets]
-    avg_w = np.mean(widths)
-
-    if len(dets) < target_len:
-        first = dets[0]
-        if first["x1"] > avg_w * 1.2:
-            center = first["x1"] - avg_w * 0.5
-            half = avg_w * 0.8
-            x1 = int(max(0, center - half))
-            x2 = int(min(plate_img.shape[1], center + half))
-            crop = plate_img[first["y1"]:first["y2"], x1:x2]
-            if crop.size:
-                dets.insert(0, {
-                    "x1": x1, "x2": x2,
-                    "y1": first["y1"], "y2": first["y2"],
-                    "topk": None,
-                    "synthetic": True
-                })
-                recovered += 1
-
-    if len(dets) < target_len:
-        last = dets[-1]
-        right_gap = plate_img.shape[1] - last["x2"]
-        if right_gap > avg_w * 1.2:
-            center = last["x2"] + avg_w * 0.5
-            half = avg_w * 0.8
-            x1 = int(max(0, center - half))
-            x2 = int(min(plate_img.shape[1], center + half))
-            crop = plate_img[last["y1"]:last["y2"], x1:x2]
-            if crop.size:
-                dets.append({
-                    "x1": x1, "x2": x2,
-                    "y1": last["y1"], "y2": last["y2"],
-                    "topk": None,
-                    "synthetic": True
-                })
-                recovered += 1
-
-    return dets, recovered
+    """
+    Add a synthetic box (cls -1, conf 0) before the first / after the
+    last box of a short line when the plate leaves a character-wide gap
+    there. Returns (Detections, boxes added).
+    """
+    if not len(dets):
+        return dets, 0
+
+    avg_w = float(np.mean(dets.xyxy[:, 2] - dets.xyxy[:, 0]))
+    plate_w = plate_img.shape[1]
+    before, after = [], []
+
+    def synthetic(center, y1, y2):
+        half = avg_w * 0.8
+        x1 = int(max(0, center - half))
+        x2 = int(min(plate_w, center + half))
+        if plate_img[int(y1):int(y2), x1:x2].size:
+            return [x1, y1, x2, y2]
+        return None
+
+    x1, y1, _, y2 = dets.xyxy[0]
+    if len(dets) < target_len and x1 > avg_w * 1.2:
+        box = synthetic(x1 - avg_w * 0.5, y1, y2)
+        if box:
+            before.append(box)
+
+    _, y1, x2, y2 = dets.xyxy[-1]
+    if len(dets) + len(before) < target_len and plate_w - x2 > avg_w * 1.2:
+        box = synthetic(x2 + avg_w * 0.5, y1, y2)
+        if box:
+            after.append(box)
+
+    added = len(before) + len(after)
+    if added:
+        dets = Detections.concat([
+            Detections(before, np.zeros(len(before))),
+            dets,
+            Detections(after, np.zeros(len(after))),
+        ])
+    return dets, added
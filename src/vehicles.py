@@ -0,0 +1,236 @@
+# src/vehicles.py
+
+import os
+import csv
+import sqlite3
+import threading
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+from src.postprocess import normalize_plate, similarity_verdict
+
+# ============================================================
+# KEYS + TRIGRAMS
+# ============================================================
+
+def plate_key(text):
+    """
+    Registry / query text -> lookup key: alphanumerics only, upper-cased,
+    then normalize_plate (the same confusion map verify_plate applies)
+    """
+    return normalize_plate("".join(c for c in text.upper() if c.isalnum()))
+
+
+def trigrams(key):
+    """
+    Character trigrams of a key, padded with "$" so the first and last
+    characters carry their position
+    """
+    padded = f"${key}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# ============================================================
+# VEHICLE INDEX
+# ============================================================
+
+class VehicleIndex:
+    """
+    Registered vehicle numbers, normalized once, for "which vehicle is
+    this?" lookups:
+      1. exact hash lookup on the normalized key
+      2. trigram inverted index -> candidates sharing the most trigrams
+      3. fuzz.ratio on the candidates only -> top-k with verdicts
+    Vehicles can be added / removed without a rebuild.
+    """
+
+    def __init__(self, max_candidates=256, max_posting=5000):
+        # Trigrams on more than max_posting plates (state codes, common
+        # district prefixes) do not narrow the search; they are skipped
+        self.max_candidates = max_candidates
+        self.max_posting = max_posting
+
+        self._lock = threading.RLock()
+        self._plates = []     # id -> registered text (None once removed)
+        self._keys = []       # id -> normalized key
+        self._records = []    # id -> extra columns
+        self._free = []       # ids of removed vehicles, reused by add()
+        self._by_key = {}     # key -> {ids}
+        self._postings = {}   # trigram -> {ids}
+        self._arrays = {}     # trigram -> id array, rebuilt after updates
+
+    # ---------------- loading ----------------
+
+    @classmethod
+    def from_csv(cls, path, column="vehicle_number", **kwargs):
+        """
+        CSV with a header row; column holds the vehicle number (first
+        column if absent), the other columns are kept as the record
+        """
+        index = cls(**kwargs)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if column not in (reader.fieldnames or []):
+                column = reader.fieldnames[0]
+            index.add_many((row.pop(column), row) for row in reader)
+        return index
+
+    @classmethod
+    def from_sqlite(cls, path, table="vehicles", column="vehicle_number", **kwargs):
+        index = cls(**kwargs)
+        db = sqlite3.connect(path)
+        db.row_factory = sqlite3.Row
+        try:
+            index.add_many(
+                (record.pop(column), record)
+                for record in map(dict, db.execute(f'SELECT * FROM "{table}"'))
+            )
+        finally:
+            db.close()
+        return index
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        if os.path.splitext(path)[1].lower() == ".csv":
+            return cls.from_csv(path, **kwargs)
+        return cls.from_sqlite(path, **kwargs)
+
+    # ---------------- updates ----------------
+
+    def add(self, plate, record=None):
+        """
+        Register one vehicle; returns its id
+        """
+        with self._lock:
+            return self._insert(plate, record or {})
+
+    def add_many(self, items):
+        """
+        Register (plate, record) pairs under one lock; empty plates are
+        skipped
+        """
+        with self._lock:
+            for plate, record in items:
+                if plate:
+                    self._insert(plate, record)
+
+    def _insert(self, plate, record):
+        key = plate_key(plate)
+
+        if self._free:
+            vid = self._free.pop()
+            self._plates[vid] = plate
+            self._keys[vid] = key
+            self._records[vid] = record
+        else:
+            vid = len(self._plates)
+            self._plates.append(plate)
+            self._keys.append(key)
+            self._records.append(record)
+
+        self._by_key.setdefault(key, set()).add(vid)
+        for gram in trigrams(key):
+            posting = self._postings.get(gram)
+            if posting is None:
+                posting = self._postings[gram] = set()
+            posting.add(vid)
+            self._arrays.pop(gram, None)
+
+        return vid
+
+    def remove(self, plate):
+        """
+        Unregister every vehicle whose number normalizes like plate;
+        returns how many were removed
+        """
+        key = plate_key(plate)
+
+        with self._lock:
+            ids = self._by_key.pop(key, set())
+            for gram in trigrams(key):
+                posting = self._postings.get(gram)
+                if posting is None:
+                    continue
+                posting -= ids
+                self._arrays.pop(gram, None)
+                if not posting:
+                    del self._postings[gram]
+
+            for vid in ids:
+                self._plates[vid] = None
+                self._keys[vid] = None
+                self._records[vid] = None
+                self._free.append(vid)
+
+        return len(ids)
+
+    def __len__(self):
+        return len(self._plates) - len(self._free)
+
+    def __contains__(self, plate):
+        return plate_key(plate) in self._by_key
+
+    # ---------------- lookup ----------------
+
+    def _result(self, vid, similarity):
+        return {
+            "vehicle_number": self._plates[vid],
+            "normalized": self._keys[vid],
+            "similarity": similarity,
+            "verdict": similarity_verdict(similarity),
+            "record": self._records[vid],
+        }
+
+    def _posting_array(self, gram):
+        arr = self._arrays.get(gram)
+        if arr is None:
+            posting = self._postings[gram]
+            arr = self._arrays[gram] = np.fromiter(
+                posting, dtype=np.int64, count=len(posting)
+            )
+        return arr
+
+    def _candidates(self, key):
+        """
+        Ids sharing the most trigrams with key, at most max_candidates
+        """
+        grams = sorted(
+            (g for g in trigrams(key) if g in self._postings),
+            key=lambda g: len(self._postings[g])
+        )
+        selective = [g for g in grams if len(self._postings[g]) <= self.max_posting]
+        grams = selective or grams[:1]
+        if not grams:
+            return []
+
+        ids, counts = np.unique(
+            np.concatenate([self._posting_array(g) for g in grams]),
+            return_counts=True
+        )
+        if len(ids) > self.max_candidates:
+            top = np.argpartition(-counts, self.max_candidates)[:self.max_candidates]
+            ids = ids[top]
+        return ids.tolist()
+
+    def match(self, recognized, k=5, min_similarity=0):
+        """
+        Recognized plate -> up to k registered vehicles, best first, each
+        with similarity (fuzz.ratio on normalized text) and verdict
+        """
+        key = plate_key(recognized)
+        if not key:
+            return []
+
+        with self._lock:
+            exact = self._by_key.get(key)
+            if exact:
+                return [self._result(vid, 100.0) for vid in sorted(exact)[:k]]
+
+            choices = {vid: self._keys[vid] for vid in self._candidates(key)}
+            scored = process.extract(
+                key, choices,
+                scorer=fuzz.ratio,
+                limit=k,
+                score_cutoff=min_similarity
+            )
+            return [self._result(vid, score) for _, score, vid in scored]
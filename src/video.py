@@ -0,0 +1,267 @@
+# src/video.py
+
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from src.config import (
+    PLATE_YOLO_BATCH_SIZE,
+    VIDEO_FRAME_STRIDE,
+    VIDEO_TRACK_IOU,
+    VIDEO_TRACK_MAX_MISSED,
+    VIDEO_TRACK_MIN_HITS,
+    VIDEO_READS_PER_TRACK,
+)
+from src.pipeline import detect_plate_boxes_batch, recognize_plates_text
+from src.postprocess import verify_plate
+from src.utils import iou_matrix
+
+# ============================================================
+# CROP SHARPNESS
+# ============================================================
+
+def sharpness(img):
+    """
+    Variance of the Laplacian (higher = sharper)
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+# ============================================================
+# PLATE TRACKING (IOU + CENTROID ASSOCIATION)
+# ============================================================
+
+class PlateTrack:
+    """
+    One vehicle's plate across frames; keeps only its sharpest crops
+    """
+
+    def __init__(self, track_id, box, frame_idx, ts, max_crops):
+        self.track_id = track_id
+        self.box = box
+        self.first_frame = self.last_frame = frame_idx
+        self.first_ts = self.last_ts = ts
+        self.hits = 1
+        self.missed = 0
+        self.max_crops = max_crops
+        self.crops = []   # [(sharpness, crop), ...], sharpest first
+
+    def update(self, box, frame_idx, ts):
+        self.box = box
+        self.last_frame = frame_idx
+        self.last_ts = ts
+        self.hits += 1
+        self.missed = 0
+
+    def offer_crop(self, crop):
+        score = sharpness(crop)
+        if len(self.crops) < self.max_crops or score > self.crops[-1][0]:
+            self.crops.append((score, crop.copy()))
+            self.crops.sort(key=lambda c: -c[0])
+            del self.crops[self.max_crops:]
+
+
+def _center_close(a, b):
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+    # within one plate width of the previous position
+    return (
+        abs((ax1 + ax2) / 2 - (bx1 + bx2) / 2) <= ax2 - ax1
+        and abs((ay1 + ay2) / 2 - (by1 + by2) / 2) <= ay2 - ay1
+    )
+
+
+class PlateTracker:
+    """
+    Greedy frame-to-frame association: highest IoU first, then centroid
+    distance for fast movers whose boxes no longer overlap
+    """
+
+    def __init__(self, iou_thr=0.3, max_missed=5, max_crops=3):
+        self.iou_thr = iou_thr
+        self.max_missed = max_missed
+        self.max_crops = max_crops
+        self.active = []
+        self._next_id = 1
+
+    def update(self, image, boxes, frame_idx, ts):
+        """
+        Associate this frame's boxes (Detections) with tracks; a track's
+        box is an x1, y1, x2, y2 row.
+        Returns tracks that ended (missed too many sampled frames).
+        """
+        boxes = boxes.xyxy.tolist()
+        iou = iou_matrix(
+            np.array([t.box for t in self.active], dtype=np.float64).reshape(-1, 4),
+            np.array(boxes, dtype=np.float64).reshape(-1, 4)
+        )
+        order = np.argsort(-iou, axis=None, kind="stable")
+        pairs = zip(
+            iou.ravel()[order].tolist(),
+            *(i.tolist() for i in np.unravel_index(order, iou.shape))
+        )
+
+        used_t, used_b = set(), set()
+        for iou, ti, bi in pairs:
+            if iou < self.iou_thr:
+                break
+            if ti in used_t or bi in used_b:
+                continue
+            used_t.add(ti)
+            used_b.add(bi)
+            self.active[ti].update(boxes[bi], frame_idx, ts)
+
+        for ti, t in enumerate(self.active):
+            if ti in used_t:
+                continue
+            for bi, b in enumerate(boxes):
+                if bi not in used_b and _center_close(t.box, b):
+                    used_t.add(ti)
+                    used_b.add(bi)
+                    t.update(b, frame_idx, ts)
+                    break
+
+        for bi, b in enumerate(boxes):
+            if bi not in used_b:
+                self.active.append(
+                    PlateTrack(self._next_id, b, frame_idx, ts, self.max_crops)
+                )
+                used_t.add(len(self.active) - 1)
+                self._next_id += 1
+
+        for ti, t in enumerate(self.active):
+            if ti in used_t:
+                x1, y1, x2, y2 = map(int, t.box)
+                crop = image[y1:y2, x1:x2]
+                if crop.size:
+                    t.offer_crop(crop)
+            else:
+                t.missed += 1
+
+        ended = [t for t in self.active if t.missed > self.max_missed]
+        self.active = [t for t in self.active if t.missed <= self.max_missed]
+        return ended
+
+    def flush(self):
+        ended, self.active = self.active, []
+        return ended
+
+# ============================================================
+# PER-TRACK VOTING
+# ============================================================
+
+def vote_plate(reads):
+    """
+    Plate strings read from one track -> (plate, votes).
+    Majority string wins; on a tie, vote per character position among
+    reads of the most common length.
+    """
+    reads = [r for r in reads if r]
+    if not reads:
+        return "", 0
+
+    counts = Counter(reads).most_common()
+    if len(counts) == 1 or counts[0][1] > counts[1][1]:
+        return counts[0]
+
+    length = Counter(len(r) for r in reads).most_common(1)[0][0]
+    same = [r for r in reads if len(r) == length]
+    plate = "".join(
+        Counter(r[i] for r in same).most_common(1)[0][0]
+        for i in range(length)
+    )
+    return plate, sum(r == plate for r in reads)
+
+
+def _finish_tracks(tracks, assigned_vehicle_number):
+    tracks = [t for t in tracks if t.crops]
+    crops = [crop for t in tracks for _, crop in t.crops]
+    texts = iter(recognize_plates_text(crops))
+
+    results = []
+    for t in tracks:
+        reads = [next(texts) for _ in t.crops]
+        plate, votes = vote_plate(reads)
+        result = verify_plate(plate, assigned_vehicle_number)
+        result.update({
+            "track_id": t.track_id,
+            "reads": reads,
+            "votes": votes,
+            "first_frame": t.first_frame,
+            "last_frame": t.last_frame,
+            "first_ts": round(t.first_ts, 3),
+            "last_ts": round(t.last_ts, 3),
+            "frames_seen": t.hits,
+        })
+        results.append(result)
+    return results
+
+# ============================================================
+# VIDEO PIPELINE (PUBLIC API)
+# ============================================================
+
+def _sampled_frames(cap, stride):
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    frame_idx = 0
+    while True:
+        ok = cap.grab()
+        if not ok:
+            break
+        if frame_idx % stride == 0:
+            ok, frame = cap.retrieve()
+            if not ok:
+                break
+            yield frame_idx, frame_idx / fps, frame
+        frame_idx += 1
+
+
+def run_anpr_video(video_path, assigned_vehicle_number=None,
+                   stride=VIDEO_FRAME_STRIDE, min_hits=VIDEO_TRACK_MIN_HITS):
+    """
+    Video file -> one result per tracked vehicle, in order of appearance.
+    Plates are detected on every `stride`-th frame; character OCR runs
+    only on each track's sharpest crops, then reads are voted.
+    """
+    if stride < 1:
+        raise ValueError(f"stride must be >= 1, got {stride}")
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Cannot open video: {video_path}")
+
+    tracker = PlateTracker(
+        iou_thr=VIDEO_TRACK_IOU,
+        max_missed=VIDEO_TRACK_MAX_MISSED,
+        max_crops=VIDEO_READS_PER_TRACK,
+    )
+    results = []
+    frames = []
+
+    def process(frames):
+        ended = []
+        boxes = detect_plate_boxes_batch([f for _, _, f in frames])
+        for (frame_idx, ts, frame), frame_boxes in zip(frames, boxes):
+            ended += tracker.update(frame, frame_boxes, frame_idx, ts)
+        return ended
+
+    try:
+        for sample in _sampled_frames(cap, stride):
+            frames.append(sample)
+            if len(frames) == PLATE_YOLO_BATCH_SIZE:
+                ended = process(frames)
+                frames = []
+                results += _finish_tracks(
+                    [t for t in ended if t.hits >= min_hits],
+                    assigned_vehicle_number
+                )
+
+        ended = (process(frames) if frames else []) + tracker.flush()
+        results += _finish_tracks(
+            [t for t in ended if t.hits >= min_hits],
+            assigned_vehicle_number
+        )
+    finally:
+        cap.release()
+
+    return sorted(results, key=lambda r: r["first_frame"])
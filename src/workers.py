@@ -0,0 +1,309 @@
+# src/workers.py
+
+import os
+import time
+import queue
+import itertools
+import threading
+import multiprocessing as mp
+from concurrent.futures import Future
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# ============================================================
+# ERRORS
+# ============================================================
+
+class WorkerCrashedError(RuntimeError):
+    """
+    Raised for tasks that were assigned to a worker that died
+    """
+
+# ============================================================
+# WORKER PROCESS
+# ============================================================
+
+def _heartbeat(worker_id, result_q, interval):
+    # carries this process's buffer pool / RSS stats to WorkerPool.stats()
+    from src.buffers import buffer_pool
+
+    while True:
+        time.sleep(interval)
+        result_q.put(("heartbeat", worker_id, time.time(), buffer_pool.stats()))
+
+
+def _worker_main(worker_id, task_q, result_q, torch_threads, heartbeat_s):
+    """
+    Inference process: loads the models once, then recognizes batches
+    of images handed over as shared-memory blocks
+    """
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+
+    # beats during model loading too, so a slow warmup is not "hung"
+    threading.Thread(
+        target=_heartbeat,
+        args=(worker_id, result_q, heartbeat_s),
+        daemon=True
+    ).start()
+
+    from src.models import registry
+    from src.pipeline import recognize_plates_batch
+
+    try:
+        registry.warmup()
+    except Exception:
+        pass
+
+    result_q.put(("ready", worker_id, {
+        "pid": os.getpid(),
+        "ready": registry.ready,
+        "error": registry.error,
+    }))
+
+    while True:
+        task = task_q.get()
+        if task is None:
+            break
+
+        task_id, specs, tiled = task
+        handles = []
+        images = []
+        try:
+            for name, shape, dtype in specs:
+                shm = shared_memory.SharedMemory(name=name)
+                handles.append(shm)
+                images.append(np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+            results = recognize_plates_batch(images, tiled)
+            result_q.put(("result", worker_id, task_id, results, None))
+        except Exception as e:
+            result_q.put(("result", worker_id, task_id, None, str(e)))
+        finally:
+            # Views must be gone before the blocks can be closed
+            images.clear()
+            for shm in handles:
+                shm.close()
+
+# ============================================================
+# WORKER POOL (FRONT-END SIDE)
+# ============================================================
+
+class WorkerPool:
+    """
+    N inference processes, each holding its own models.
+    Images go to workers through multiprocessing.shared_memory;
+    results and health come back over one queue. Dead workers, and
+    live ones silent for stale_s (no heartbeat or result), are
+    restarted and their in-flight tasks failed with WorkerCrashedError.
+    """
+
+    def __init__(self, num_workers=2, torch_threads=1, start_method="spawn",
+                 heartbeat_s=5.0, monitor_s=1.0, stale_s=30.0):
+        self.num_workers = num_workers
+        self.torch_threads = torch_threads
+        self.heartbeat_s = heartbeat_s
+        self.stale_s = max(stale_s, 2 * heartbeat_s)
+        self.monitor_s = monitor_s
+
+        self._ctx = mp.get_context(start_method)
+        self._result_q = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+        self._procs = [None] * num_workers
+        self._task_qs = [None] * num_workers
+        self._health = [{} for _ in range(num_workers)]
+        self._assigned = [set() for _ in range(num_workers)]
+        self._tasks = {}   # task_id -> (future, worker_id, shm blocks)
+
+        self.restarts = 0
+        self._running = False
+
+    # ---------------- lifecycle ----------------
+
+    def _spawn(self, worker_id):
+        task_q = self._ctx.Queue()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, task_q, self._result_q,
+                  self.torch_threads, self.heartbeat_s),
+            name=f"anpr-worker-{worker_id}",
+            daemon=True
+        )
+        proc.start()
+        self._task_qs[worker_id] = task_q
+        self._procs[worker_id] = proc
+        self._health[worker_id] = {
+            "pid": proc.pid,
+            "ready": False,
+            "started": time.time(),
+            "last_seen": time.time(),
+            "tasks_done": 0,
+        }
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        threading.Thread(target=self._collect, daemon=True).start()
+        threading.Thread(target=self._monitor, daemon=True).start()
+
+    def shutdown(self):
+        self._running = False
+        for task_q in self._task_qs:
+            if task_q is not None:
+                task_q.put(None)
+        for proc in self._procs:
+            if proc is not None:
+                proc.join(timeout=5)
+                if proc.is_alive():
+                    proc.terminate()
+        with self._lock:
+            for task_id in list(self._tasks):
+                self._finish(task_id, error=WorkerCrashedError("Pool shut down"))
+
+    # ---------------- submit ----------------
+
+    def submit(self, images, tiled=False):
+        """
+        Decoded BGR images -> Future of recognize_plates_batch output
+        """
+        blocks, specs = [], []
+        try:
+            for img in images:
+                img = np.ascontiguousarray(img)
+                shm = shared_memory.SharedMemory(create=True, size=img.nbytes)
+                blocks.append(shm)
+                np.ndarray(img.shape, dtype=img.dtype, buffer=shm.buf)[:] = img
+                specs.append((shm.name, img.shape, img.dtype.str))
+        except Exception:
+            _release_blocks(blocks)
+            raise
+
+        future = Future()
+        with self._lock:
+            task_id = next(self._ids)
+            worker_id = min(
+                range(self.num_workers),
+                key=lambda w: len(self._assigned[w])
+            )
+            self._tasks[task_id] = (future, worker_id, blocks)
+            self._assigned[worker_id].add(task_id)
+            task_q = self._task_qs[worker_id]
+
+        task_q.put((task_id, specs, tiled))
+        return future
+
+    # ---------------- result / health side ----------------
+
+    def _finish(self, task_id, results=None, error=None):
+        # caller holds self._lock
+        future, worker_id, blocks = self._tasks.pop(task_id)
+        self._assigned[worker_id].discard(task_id)
+        _release_blocks(blocks)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(results)
+
+    def _collect(self):
+        while self._running:
+            try:
+                msg = self._result_q.get(timeout=self.monitor_s)
+            except queue.Empty:
+                continue
+            kind, worker_id = msg[0], msg[1]
+
+            with self._lock:
+                health = self._health[worker_id]
+                health["last_seen"] = time.time()
+
+                if kind == "ready":
+                    health.update(msg[2])
+                elif kind == "heartbeat":
+                    health["buffers"] = msg[3]
+                elif kind == "result":
+                    _, _, task_id, results, error = msg
+                    health["tasks_done"] += 1
+                    if task_id in self._tasks:
+                        self._finish(
+                            task_id,
+                            results=results,
+                            error=RuntimeError(error) if error else None
+                        )
+
+    def _monitor(self):
+        while self._running:
+            time.sleep(self.monitor_s)
+            for worker_id, proc in enumerate(self._procs):
+                if not self._running:
+                    break
+
+                if proc.is_alive():
+                    with self._lock:
+                        silent = time.time() - self._health[worker_id]["last_seen"]
+                    if silent <= self.stale_s:
+                        continue
+                    # alive but hung: no heartbeat for stale_s
+                    proc.kill()
+                    proc.join(timeout=5)
+                    reason = f"Worker {worker_id} hung ({silent:.0f} s without heartbeat)"
+                else:
+                    reason = f"Worker {worker_id} exited with code {proc.exitcode}"
+
+                with self._lock:
+                    for task_id in list(self._assigned[worker_id]):
+                        self._finish(task_id, error=WorkerCrashedError(reason))
+                    self.restarts += 1
+                    self._spawn(worker_id)
+
+    # ---------------- monitoring ----------------
+
+    @property
+    def ready(self):
+        return self._running and all(h.get("ready") for h in self._health)
+
+    @property
+    def error(self):
+        errors = [h.get("error") for h in self._health if h.get("error")]
+        return errors[0] if errors else None
+
+    def stats(self):
+        now = time.time()
+        with self._lock:
+            workers = [
+                {
+                    "worker": worker_id,
+                    "pid": h.get("pid"),
+                    "alive": self._procs[worker_id] is not None
+                             and self._procs[worker_id].is_alive(),
+                    "ready": h.get("ready", False),
+                    "in_flight": len(self._assigned[worker_id]),
+                    "tasks_done": h.get("tasks_done", 0),
+                    "last_seen_s": round(now - h.get("last_seen", now), 3),
+                    # as of the last heartbeat; None before the first one
+                    "buffers": h.get("buffers"),
+                }
+                for worker_id, h in enumerate(self._health)
+            ]
+        return {
+            "workers": workers,
+            "rss_bytes": sum(
+                (w["buffers"] or {}).get("process", {}).get("rss_bytes") or 0
+                for w in workers
+            ),
+            "torch_threads": self.torch_threads,
+            "restarts": self.restarts,
+        }
+
+
+def _release_blocks(blocks):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
@@ -0,0 +1,62 @@
+# tests/test_archive.py
+
+import io
+import tarfile
+import zipfile
+
+import pytest
+
+from src.archive import BatchLimitError, read_archive
+
+JPEG = bytes(range(256)) * 40
+
+
+def zip_bytes(compression=zipfile.ZIP_DEFLATED):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression) as zf:
+        zf.writestr("a.jpg", JPEG)
+        zf.writestr("b.jpg", JPEG[::-1])
+        zf.writestr("manifest.csv", "filename,assigned\na.jpg,KA03AN6757\n")
+    return buf.getvalue()
+
+
+def tar_bytes():
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tf:
+        info = tarfile.TarInfo("a.jpg")
+        info.size = len(JPEG)
+        tf.addfile(info, io.BytesIO(JPEG))
+    return buf.getvalue()
+
+
+def test_reads_zip_with_manifest():
+    members, manifest = read_archive(zip_bytes(), max_items=10, max_bytes=10**6)
+    assert [name for name, _ in members] == ["a.jpg", "b.jpg"]
+    assert members[0][1] == JPEG
+    assert manifest == {"a.jpg": "KA03AN6757"}
+
+
+def test_limits():
+    with pytest.raises(BatchLimitError):
+        read_archive(zip_bytes(), max_items=1, max_bytes=10**6)
+
+
+def test_corrupt_zip_member_is_value_error():
+    data = bytearray(zip_bytes())
+    data[40:60] = b"\xff" * 20          # inside a.jpg's deflate stream
+    with pytest.raises(ValueError):
+        read_archive(bytes(data), max_items=10, max_bytes=10**6)
+
+
+def test_bad_crc_is_value_error():
+    data = zip_bytes(zipfile.ZIP_STORED)
+    data = data.replace(JPEG[100:120], b"\x00" * 20, 1)
+    with pytest.raises(ValueError):
+        read_archive(data, max_items=10, max_bytes=10**6)
+
+
+@pytest.mark.parametrize("cut", [0.5, 0.1])
+def test_truncated_tar_is_value_error(cut):
+    data = tar_bytes()
+    with pytest.raises(ValueError):
+        read_archive(data[:int(len(data) * cut)], max_items=10, max_bytes=10**6)
@@ -0,0 +1,91 @@
+# tests/test_batch.py
+
+import json
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+import pytest
+
+import src.batch as batch
+from src.batch import iter_inputs, run_batch
+
+
+class FakeEngine:
+    """
+    One plate "KA03AN6757" per image; batch number fail_at raises
+    """
+
+    def __init__(self, fail_at=None):
+        self.fail_at = fail_at
+        self.calls = 0
+
+    def submit(self, images, tiled=False):
+        future = Future()
+        if self.calls == self.fail_at:
+            future.set_exception(RuntimeError("Worker 0 crashed"))
+        else:
+            future.set_result([["KA03AN6757"] for _ in images])
+        self.calls += 1
+        return future
+
+    def shutdown(self):
+        pass
+
+
+@pytest.fixture
+def images(tmp_path):
+    src = tmp_path / "images"
+    src.mkdir()
+    img = np.full((32, 48, 3), 128, np.uint8)
+    for i in range(10):
+        cv2.imwrite(str(src / f"{i:02d}.jpg"), img)
+    return src
+
+
+def run(monkeypatch, images, out, engine, **kwargs):
+    monkeypatch.setattr(batch, "start_engine", lambda workers, torch_threads: engine)
+    return run_batch(str(images), str(out), batch_size=2, readers=1, **kwargs)
+
+
+def test_failed_batch_is_not_written_and_resume_retries_it(images, tmp_path, monkeypatch):
+    out = tmp_path / "out.jsonl"
+
+    summary = run(monkeypatch, images, out, FakeEngine(fail_at=2))
+    assert summary["failed"] and "04.jpg" in summary["failed"]
+    assert summary["done"] == 4 and summary["errors"] == 0
+    assert len(out.read_text().splitlines()) == 4
+
+    summary = run(monkeypatch, images, out, FakeEngine(), resume=True)
+    assert summary["failed"] is None and summary["done"] == 10
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert [r["image"][-6:] for r in rows] == [f"{i:02d}.jpg" for i in range(10)]
+    assert all(r["error"] is None and r["plates"] for r in rows)
+
+
+def test_unreadable_image_is_an_error_row(images, tmp_path, monkeypatch):
+    (images / "05.jpg").write_bytes(b"not a jpeg")
+    out = tmp_path / "out.jsonl"
+
+    summary = run(monkeypatch, images, out, FakeEngine())
+    assert summary["done"] == 10 and summary["errors"] == 1
+    rows = [json.loads(line) for line in out.read_text().splitlines()]
+    assert rows[5]["error"] == "Invalid image file" and not rows[5]["plates"]
+    assert rows[6]["plates"]
+
+
+def test_missing_manifest_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        iter_inputs(str(tmp_path / "manifest.csv"))
+
+
+def test_missing_manifest_writes_nothing(tmp_path):
+    out = tmp_path / "out.jsonl"
+    with pytest.raises(FileNotFoundError):
+        run_batch(str(tmp_path / "manifest.csv"), str(out))
+    assert not out.exists()
+    assert not (tmp_path / "out.jsonl.ckpt.json").exists()
+
+
+def test_csv_glob_is_still_a_glob(tmp_path):
+    assert list(iter_inputs(str(tmp_path / "*.csv"))) == []
@@ -0,0 +1,33 @@
+# tests/test_cache_key.py
+
+import src.pipeline as pipeline
+from src.grammar import PlateGrammar
+from src.models import ModelRegistry
+
+
+def test_registry_fingerprint_follows_weights(tmp_path):
+    weights = tmp_path / "ocr.pth"
+    weights.write_bytes(b"v1")
+    registry = ModelRegistry(backend="eager", quantize="")
+    registry.swap("ocr_model", str(weights))
+    first = registry.fingerprint()
+    assert registry.fingerprint() == first
+
+    weights.write_bytes(b"v2")
+    registry.swap("ocr_model", str(weights))
+    assert registry.fingerprint() != first
+
+    registry.use_backend("onnx")
+    assert registry.fingerprint() != first
+
+
+def test_grammar_fingerprint_follows_formats():
+    base = PlateGrammar({"standard": (1.0, "S D2 L2 D4")})
+    assert PlateGrammar({"standard": (1.0, "S D2 L2 D4")}).fingerprint == base.fingerprint
+    assert PlateGrammar({"standard": (1.0, "S D2 L1 D4")}).fingerprint != base.fingerprint
+
+
+def test_pipeline_fingerprint_follows_cascade_threshold(monkeypatch):
+    before = pipeline.pipeline_fingerprint()
+    monkeypatch.setattr(pipeline, "CASCADE_MIN_CONF", pipeline.CASCADE_MIN_CONF + 0.01)
+    assert pipeline.pipeline_fingerprint() != before
@@ -0,0 +1,69 @@
+# tests/test_cascade.py
+
+import numpy as np
+import pytest
+
+import src.pipeline as pipeline
+from src.config import CLASSES
+from src.grammar import CLASS_INDEX, plate_grammar
+from src.utils import Detections
+
+CLASS_IDS = {c: i for i, c in enumerate(CLASSES)}
+
+
+def as_topk(text, conf=0.9):
+    return [[(ch, conf)] for ch in text]
+
+
+@pytest.mark.parametrize("text", ["KA03AN6757", "KA03N6757", "22BH1234AB", "77CD12"])
+def test_best_masks_allow_every_character(text):
+    (masks,) = plate_grammar.best_masks([as_topk(text)])
+    assert masks.shape == (len(text), len(CLASSES))
+    assert all(masks[pos, CLASS_INDEX[ch]] for pos, ch in enumerate(text))
+
+
+def test_best_masks_none_without_format():
+    assert plate_grammar.best_masks([as_topk("AB")]) == [None]
+
+
+def char_lines(text, confs):
+    """
+    Two-line char YOLO boxes (class id = position in CLASSES)
+    """
+    xyxy = [[10 * i, 0, 10 * i + 8, 20] for i in range(len(text))]
+    cls = [CLASS_IDS[ch] for ch in text]
+    dets = Detections(xyxy, confs, cls)
+    half = len(text) // 2
+    return [dets[np.arange(half)], dets[np.arange(half, len(text))]]
+
+
+@pytest.fixture
+def cascade(monkeypatch):
+    monkeypatch.setattr(pipeline, "CASCADE_MIN_CONF", 0.5)
+    monkeypatch.setattr(
+        pipeline, "_char_classes", lambda: {i: c for c, i in CLASS_IDS.items()}
+    )
+
+
+@pytest.mark.parametrize("text", ["KA03AN6757", "22BH1234AB"])
+def test_cascade_accepts_confident_reads_of_ten_char_plates(cascade, text):
+    # length 10 is shared by standard and bh_series, whose slots disagree
+    lines = char_lines(text, [0.9] * len(text))
+    (reads,) = pipeline._cascade_reads([[[None] * 5, [None] * 5]], [lines])
+    assert "".join(reads) == text
+
+
+def test_cascade_rejects_low_conf_and_misfit(cascade):
+    confs = [0.9] * 10
+    confs[7] = 0.3
+    # "0" in a series-letter slot: the standard format still fits best
+    lines = char_lines("KA030N6757", confs)
+    (reads,) = pipeline._cascade_reads([[[None] * 5, [None] * 5]], [lines])
+    assert reads[4] is None and reads[7] is None
+    assert [r for i, r in enumerate(reads) if i not in (4, 7)] == list("KA03N657")
+
+
+def test_cascade_off(monkeypatch):
+    monkeypatch.setattr(pipeline, "CASCADE_MIN_CONF", 0.0)
+    (reads,) = pipeline._cascade_reads([[[None] * 3, [None] * 2]], None)
+    assert reads == [None] * 5
@@ -0,0 +1,53 @@
+# tests/test_decode.py
+
+import cv2
+import numpy as np
+import pytest
+
+import src.decode as decode
+from src.decode import DecodePolicy, ReducedImage, decode_for_detection
+from src.utils import Detections
+
+
+@pytest.fixture
+def jpeg():
+    rng = np.random.default_rng(0)
+    img = cv2.resize(
+        (rng.random((60, 100, 3)) * 255).astype(np.uint8), (2400, 1440)
+    )
+    return cv2.imencode(".jpg", img)[1].tobytes()
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = DecodePolicy(max_plate_rate=0.3, alpha=0.2)
+    monkeypatch.setattr(decode, "decode_policy", policy)
+    return policy
+
+
+def test_single_full_decode_by_default(jpeg, policy):
+    img = decode_for_detection(jpeg, min_side=600)
+    assert isinstance(img, np.ndarray) and img.shape == (1440, 2400, 3)
+
+
+def test_reduced_only_while_few_frames_have_plates(jpeg, policy):
+    for _ in range(20):
+        policy.observe(False)
+    img = decode_for_detection(jpeg, min_side=600)
+    assert isinstance(img, ReducedImage) and img.preview.shape == (360, 600, 3)
+
+    for _ in range(20):
+        policy.observe(True)
+    assert isinstance(decode_for_detection(jpeg, min_side=600), np.ndarray)
+
+
+def test_forced_and_disabled(jpeg, policy):
+    assert isinstance(decode_for_detection(jpeg, min_side=600, reduced=True), ReducedImage)
+    assert isinstance(decode_for_detection(jpeg, min_side=0, reduced=True), np.ndarray)
+    assert decode_for_detection(b"not an image", reduced=True) is None
+
+
+def test_boxes_map_to_full_resolution(jpeg):
+    img = decode_for_detection(jpeg, min_side=600, reduced=True)
+    full = img.boxes_to_full(Detections([[10.5, 20, 110, 60.2]]))
+    np.testing.assert_array_equal(full.xyxy, [[42, 80, 440, 241]])
@@ -0,0 +1,57 @@
+# tests/test_grammar.py
+
+import numpy as np
+import pytest
+
+from src.config import DIGIT_FALLBACK, DIGIT_TO_LETTER, LETTER_FALLBACK, LETTER_TO_DIGIT
+from src.grammar import CLASS_INDEX, SWAP, plate_grammar
+
+
+def decode(text):
+    return plate_grammar.decode([[(ch, 1.0)] for ch in text])
+
+
+def test_swaps_are_only_the_listed_ones():
+    listed = {(a, a) for a in CLASS_INDEX}
+    listed |= set(DIGIT_TO_LETTER.items()) | set(LETTER_TO_DIGIT.items())
+    for table in (LETTER_FALLBACK, DIGIT_FALLBACK):
+        listed |= {(a, b) for a, targets in table.items() for b in targets}
+
+    rows, cols = np.nonzero(SWAP)
+    chars = list(CLASS_INDEX)
+    assert {(chars[i], chars[j]) for i, j in zip(rows, cols)} <= listed
+
+
+@pytest.mark.parametrize("text, pos", [("KAK3AN6757", 2), ("KA03AN67K7", 8)])
+def test_no_chained_swaps(text, pos):
+    # no table maps K to a digit; K -> X -> 7 would take two swaps
+    assert decode(text)[0][pos] == "K"
+
+
+@pytest.mark.parametrize("text, expected", [
+    # one unfixable slot; the O -> 0 corrections elsewhere still apply
+    ("KAK3ANO757", "KAK3AN0757"),
+    ("KAO3AN67K7", "KA03AN67K7"),
+    ("KAO3AN67%7", "KA03AN67%7"),
+    # unknown state pair kept, district / series / number corrected
+    ("K#O3A8O7S7", "K#03AB0757"),
+])
+def test_near_miss_keeps_raw_only_where_no_format_fits(text, expected):
+    assert decode(text) == (expected, None)
+
+
+def test_exact_fit_reports_format():
+    assert decode("KAO3AN6757") == ("KA03AN6757", "standard")
+    assert decode("22BHI234AB") == ("22BH1234AB", "bh_series")
+
+
+def test_length_without_formats_is_raw():
+    assert decode("AB") == ("AB", None)
+    assert plate_grammar.best_masks([[[("A", 1.0)], [("B", 1.0)]]]) == [None]
+
+
+def test_near_miss_masks_reject_only_the_missed_slot():
+    plate = [[(ch, 1.0)] for ch in "KAK3AN6757"]
+    (masks,) = plate_grammar.best_masks([plate])
+    allowed = [masks[pos, CLASS_INDEX[ch]] for pos, ((ch, _),) in enumerate(plate)]
+    assert allowed == [True, True, False] + [True] * 7
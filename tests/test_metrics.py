@@ -0,0 +1,21 @@
+# tests/test_metrics.py
+
+from src.buffers import BufferPool
+from src.metrics import render_metrics
+
+
+def test_buffer_stats_are_labelled_per_process():
+    pool = BufferPool()
+    pool.register("ocr_host", (1, 64, 64), rows=8)
+    pool.reserve("ocr_host")
+
+    text = render_metrics(buffer_stats={
+        "api": pool.stats(),
+        "worker-0": pool.stats(),
+        "worker-1": None,  # no heartbeat yet
+    }).decode()
+
+    lines = [l for l in text.splitlines() if l.startswith("vnpr_buffer_pool{")]
+    for process in ("api", "worker-0"):
+        assert any(f'process="{process}"' in l and 'field="bytes"' in l for l in lines)
+    assert not any('process="worker-1"' in l for l in lines)
@@ -0,0 +1,73 @@
+# tests/test_ocr_preprocess.py
+
+import cv2
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
+from src.config import OCR_INPUT_SIZE
+from src.ocr import preprocess_crops, transform
+
+# One gray level after Normalize([0.5], [0.5])
+ONE_LEVEL = 2 / 255 + 1e-6
+
+SIZES = [
+    (10, 8), (24, 16), (38, 26), (64, 64), (63, 65),
+    (90, 40), (40, 90), (16, 100), (100, 16), (200, 150), (300, 7),
+]
+
+
+def char_crop(h, w, ch, rng):
+    """
+    Plate-like BGR character crop: tinted background, dark glyph, blur
+    and sensor noise
+    """
+    bg = rng.integers(150, 255, size=3)
+    crop = np.empty((h, w, 3), dtype=np.uint8)
+    crop[:] = bg
+    scale = max(h / 40, 0.2)
+    cv2.putText(
+        crop, ch, (w // 8, h * 7 // 8), cv2.FONT_HERSHEY_SIMPLEX,
+        scale, tuple(int(c) for c in rng.integers(0, 80, size=3)),
+        max(1, h // 14)
+    )
+    crop = cv2.GaussianBlur(crop, (3, 3), 0)
+    noise = rng.normal(0, 8, crop.shape)
+    return np.clip(crop + noise, 0, 255).astype(np.uint8)
+
+
+def reference(crops):
+    return torch.stack([
+        transform(Image.fromarray(cv2.cvtColor(c, cv2.COLOR_BGR2RGB)))
+        for c in crops
+    ]).numpy()
+
+
+@pytest.mark.parametrize("h,w", SIZES)
+def test_matches_transform_per_size(h, w):
+    rng = np.random.default_rng(h * 1000 + w)
+    crops = [char_crop(h, w, ch, rng) for ch in "08BKM7"]
+
+    got = preprocess_crops(crops)
+    want = reference(crops)
+
+    assert got.shape == want.shape == (len(crops), 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE)
+    diff = np.abs(got - want)
+    assert diff.max() <= ONE_LEVEL
+    assert diff.mean() < 1e-3
+
+
+def test_mixed_batch_into_buffer():
+    rng = np.random.default_rng(0)
+    crops = [
+        char_crop(h, w, "KA03AN6757"[i % 10], rng)
+        for i, (h, w) in enumerate(SIZES)
+    ]
+    out = np.full((len(crops) + 3, 1, OCR_INPUT_SIZE, OCR_INPUT_SIZE), 7, np.float32)
+
+    got = preprocess_crops(crops, out=out)
+
+    assert np.shares_memory(got, out)
+    assert np.abs(got - reference(crops)).max() <= ONE_LEVEL
+    assert (out[len(crops):] == 7).all()
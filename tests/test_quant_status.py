@@ -0,0 +1,71 @@
+# tests/test_quant_status.py
+
+import json
+
+import pytest
+
+import src.models as models
+from src.config import QUANT_MIN_AGREEMENT
+
+GOOD = QUANT_MIN_AGREEMENT
+BAD = QUANT_MIN_AGREEMENT - 0.01
+
+
+@pytest.fixture
+def int8_files(tmp_path, monkeypatch):
+    paths = {}
+    for name in ("plate_yolo", "ocr_model"):
+        path = tmp_path / f"{name}.int8-static.onnx"
+        path.write_bytes(name.encode() * 100)
+        paths[name] = str(path)
+    monkeypatch.setattr(models, "quantized_path", lambda name, mode: paths[name])
+    return paths
+
+
+def write_report(tmp_path, paths, solo=GOOD, combined=GOOD, top1=GOOD):
+    digest = {n: models.file_sha256(p) for n, p in paths.items()}
+    report = {"static": {
+        "plate_yolo": {"agreement": solo, "sha256": digest["plate_yolo"]},
+        "ocr_model": {"agreement": GOOD, "top1_agreement": top1,
+                      "sha256": digest["ocr_model"]},
+        "all": {"agreement": combined, "files": digest},
+    }}
+    path = tmp_path / "quant_report.json"
+    path.write_text(json.dumps(report))
+    return str(path)
+
+
+def test_passes(tmp_path, int8_files):
+    report = write_report(tmp_path, int8_files)
+    for name in int8_files:
+        assert models.quant_status(name, "static", report)["ok"]
+
+
+def test_all_entry_gates_every_model(tmp_path, int8_files):
+    report = write_report(tmp_path, int8_files, combined=BAD)
+    for name in int8_files:
+        status = models.quant_status(name, "static", report)
+        assert not status["ok"] and status["agreement"] == GOOD
+
+
+def test_top1_counts(tmp_path, int8_files):
+    report = write_report(tmp_path, int8_files, top1=BAD)
+    assert not models.quant_status("ocr_model", "static", report)["ok"]
+    assert models.quant_status("plate_yolo", "static", report)["ok"]
+
+
+def test_requantized_file_is_stale(tmp_path, int8_files):
+    report = write_report(tmp_path, int8_files)
+    with open(int8_files["ocr_model"], "ab") as f:
+        f.write(b"re-quantized")
+    status = models.quant_status("ocr_model", "static", report)
+    assert not status["ok"] and "changed" in status["reason"]
+
+
+def test_missing_from_all_entry(tmp_path, int8_files):
+    report = write_report(tmp_path, int8_files)
+    data = json.loads(open(report).read())
+    del data["static"]["all"]["files"]["plate_yolo"]
+    open(report, "w").write(json.dumps(data))
+    assert not models.quant_status("plate_yolo", "static", report)["ok"]
+    assert not models.quant_status("plate_yolo", "dynamic", report)["ok"]
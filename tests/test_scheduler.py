@@ -0,0 +1,64 @@
+# tests/test_scheduler.py
+
+import asyncio
+
+import pytest
+
+from src.executor import QueueFullError
+from src.scheduler import MicroBatcher
+
+
+class InlineExecutor:
+    """
+    executor.run() stand-in; blocks every call until release is set
+    """
+
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def run(self, fn, *args):
+        await self.release.wait()
+        return fn(*args)
+
+
+def double(items):
+    return [2 * x for x in items]
+
+
+def test_submit_before_start():
+    async def main():
+        batcher = MicroBatcher(InlineExecutor(), double, max_wait_ms=1)
+        results = await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == [0, 2, 4, 6, 8]
+
+
+def test_stop_fails_forming_group_and_finishes_in_flight():
+    async def main():
+        executor = InlineExecutor()
+        executor.release.clear()
+        batcher = MicroBatcher(executor, double, max_batch=2, max_wait_ms=10_000)
+        batcher.start()
+
+        tasks = [asyncio.create_task(batcher.submit(i)) for i in range(2)]
+        await asyncio.sleep(0.05)           # full group is on the executor
+        tasks.append(asyncio.create_task(batcher.submit(2)))
+        await asyncio.sleep(0.05)           # next group is still forming
+
+        stopping = asyncio.create_task(batcher.stop())
+        await asyncio.sleep(0.05)
+        executor.release.set()
+        await asyncio.wait_for(stopping, 1)
+
+        with pytest.raises(QueueFullError):
+            await batcher.submit(9)
+        return await asyncio.wait_for(
+            asyncio.gather(*tasks, return_exceptions=True), 1
+        )
+
+    results = asyncio.run(main())
+    assert results[:2] == [0, 2]
+    assert isinstance(results[2], QueueFullError)
@@ -0,0 +1,249 @@
+# tests/test_utils_boxes.py
+#
+# Array box ops vs the dict-loop implementations they replaced
+
+import numpy as np
+import pytest
+
+from src.utils import (
+    Detections,
+    compute_iou,
+    dedup_chars_array,
+    group_boxes_into_lines,
+    group_lines_array,
+    iou_matrix,
+    nms_keep,
+    remove_duplicate_boxes,
+    remove_duplicate_chars,
+)
+
+# ============================================================
+# REFERENCE (PREVIOUS DICT IMPLEMENTATIONS)
+# ============================================================
+
+def ref_compute_iou(b1, b2):
+    x1 = max(b1["x1"], b2["x1"])
+    y1 = max(b1["y1"], b2["y1"])
+    x2 = min(b1["x2"], b2["x2"])
+    y2 = min(b1["y2"], b2["y2"])
+
+    inter = max(0, x2 - x1) * max(0, y2 - y1)
+    area1 = (b1["x2"] - b1["x1"]) * (b1["y2"] - b1["y1"])
+    area2 = (b2["x2"] - b2["x1"]) * (b2["y2"] - b2["y1"])
+    union = area1 + area2 - inter
+
+    return 0 if union <= 0 else inter / union
+
+
+def ref_remove_duplicate_boxes(boxes, thr=0.42):
+    out = []
+    for b in boxes:
+        keep = True
+        for o in out:
+            if ref_compute_iou(b, o) > thr:
+                keep = False
+                break
+        if keep:
+            out.append(b)
+    return out
+
+
+def ref_group_boxes_into_lines(boxes):
+    if not boxes:
+        return []
+
+    for b in boxes:
+        b["cy"] = (b["y1"] + b["y2"]) / 2
+        b["h"] = b["y2"] - b["y1"]
+
+    avg_h = np.mean([b["h"] for b in boxes])
+    thr = avg_h * 0.6
+
+    boxes = sorted(boxes, key=lambda x: x["cy"])
+    lines = [[boxes[0]]]
+
+    for b in boxes[1:]:
+        if abs(b["cy"] - np.mean([x["cy"] for x in lines[-1]])) <= thr:
+            lines[-1].append(b)
+        else:
+            lines.append([b])
+
+    return [sorted(line, key=lambda x: x["x1"]) for line in lines]
+
+
+def ref_remove_duplicate_chars(dets, iou_thresh=0.6):
+    if not dets:
+        return []
+
+    out = [dets[0]]
+
+    for c in dets[1:]:
+        p = out[-1]
+
+        xa = max(c["x1"], p["x1"])
+        ya = max(c["y1"], p["y1"])
+        xb = min(c["x2"], p["x2"])
+        yb = min(c["y2"], p["y2"])
+
+        inter = max(0, xb - xa) * max(0, yb - ya)
+        a1 = (c["x2"] - c["x1"]) * (c["y2"] - c["y1"])
+        a2 = (p["x2"] - p["x1"]) * (p["y2"] - p["y1"])
+        iou = inter / (a1 + a2 - inter + 1e-6)
+
+        if c["topk"][0][0] == p["topk"][0][0] and iou > iou_thresh:
+            continue
+
+        out.append(c)
+
+    return out
+
+# ============================================================
+# BOX SETS
+# ============================================================
+
+def two_line_boxes(rng, n_chars=(3, 7), dup_rate=0.35, jitter=3, label_set="0O8B"):
+    """
+    Noisy two-line plate characters (whole-pixel, like YOLO output) with
+    near-duplicate boxes, shuffled. Returns ((N, 4) array, labels).
+    """
+    h = int(rng.integers(18, 40))
+    w = int(h * 0.6)
+    rows = []
+    for line_y in (10, 10 + int(h * rng.uniform(1.1, 1.6))):
+        for k in range(int(rng.integers(*n_chars))):
+            x1 = 8 + k * (w + int(rng.integers(0, 5)))
+            y1 = line_y + int(rng.integers(-jitter, jitter + 1))
+            box = [x1, y1, x1 + w + int(rng.integers(-2, 3)), y1 + h + int(rng.integers(-2, 3))]
+            rows.append(box)
+            while rng.random() < dup_rate:
+                rows.append([c + int(rng.integers(-jitter, jitter + 1)) for c in box])
+
+    arr = np.array(rows, dtype=np.float64)
+    arr = arr[rng.permutation(len(arr))]
+    labels = [label_set[i] for i in rng.integers(0, len(label_set), len(arr))]
+    return arr, labels
+
+
+def as_dicts(arr, labels=None):
+    return [
+        {"i": i, "x1": x1, "y1": y1, "x2": x2, "y2": y2,
+         "topk": [(labels[i], 1.0)] if labels else None}
+        for i, (x1, y1, x2, y2) in enumerate(arr.tolist())
+    ]
+
+
+# seeds are looped inside each test: one case per check, not per box set
+SEEDS = range(200)
+
+
+def ref_ids(boxes):
+    return [b["i"] for b in boxes]
+
+# ============================================================
+# EQUIVALENCE (RANDOM BOX SETS)
+# ============================================================
+
+def test_iou_matrix():
+    for seed in SEEDS[:50]:
+        arr, _ = two_line_boxes(np.random.default_rng(seed))
+        boxes = as_dicts(arr)
+        want = np.array([[ref_compute_iou(a, b) for b in boxes] for a in boxes])
+
+        np.testing.assert_allclose(iou_matrix(arr), want, rtol=0, atol=1e-12)
+        for a, b in zip(boxes[:5], boxes[-5:]):
+            xyxy = lambda d: [d["x1"], d["y1"], d["x2"], d["y2"]]
+            assert compute_iou(xyxy(a), xyxy(b)) == pytest.approx(ref_compute_iou(a, b), abs=1e-12)
+
+
+@pytest.mark.parametrize("thr", [0.2, 0.42, 0.7])
+def test_nms_keep(thr):
+    for seed in SEEDS:
+        arr, _ = two_line_boxes(np.random.default_rng(seed))
+        want = ref_ids(ref_remove_duplicate_boxes(as_dicts(arr), thr))
+
+        assert nms_keep(arr, thr).tolist() == want, seed
+        dets = remove_duplicate_boxes(Detections(arr), thr)
+        np.testing.assert_array_equal(dets.xyxy, arr[want])
+
+
+def test_group_lines():
+    for seed in SEEDS:
+        rng = np.random.default_rng(seed)
+        arr, _ = two_line_boxes(rng, jitter=int(rng.integers(1, 12)))
+        want = [ref_ids(line) for line in ref_group_boxes_into_lines(as_dicts(arr))]
+
+        assert [line.tolist() for line in group_lines_array(arr)] == want, seed
+        lines = group_boxes_into_lines(Detections(arr))
+        assert [line.xyxy.tolist() for line in lines] == [arr[line].tolist() for line in want]
+
+
+@pytest.mark.parametrize("iou_thresh", [0.3, 0.6])
+def test_dedup_chars(iou_thresh):
+    for seed in SEEDS:
+        rng = np.random.default_rng(seed)
+        arr, labels = two_line_boxes(rng, label_set="08" if seed % 2 else "0")
+        # in reading order, as the pipeline calls it (per line, left to right)
+        for line in group_lines_array(arr):
+            line_arr = arr[line]
+            line_labels = [labels[i] for i in line]
+            want = ref_ids(ref_remove_duplicate_chars(as_dicts(line_arr, line_labels), iou_thresh))
+
+            assert dedup_chars_array(line_arr, line_labels, iou_thresh).tolist() == want, seed
+            dets = remove_duplicate_chars(Detections(line_arr), line_labels, iou_thresh)
+            np.testing.assert_array_equal(dets.xyxy, line_arr[want])
+
+# ============================================================
+# EDGE CASES
+# ============================================================
+
+def test_empty():
+    empty = np.empty((0, 4))
+    assert iou_matrix(empty).shape == (0, 0)
+    assert nms_keep(empty).tolist() == []
+    assert group_lines_array(empty) == []
+    assert dedup_chars_array(empty, []).tolist() == []
+    assert len(remove_duplicate_boxes(Detections())) == 0
+
+
+def test_zero_area_boxes():
+    arr = np.array([[5, 5, 5, 5], [5, 5, 5, 5], [0, 0, 10, 10]], dtype=np.float64)
+    boxes = as_dicts(arr)
+    want = np.array([[ref_compute_iou(a, b) for b in boxes] for a in boxes])
+
+    np.testing.assert_array_equal(iou_matrix(arr), want)
+    assert compute_iou(arr[0].tolist(), arr[1].tolist()) == 0
+    # IoU 0 with everything: nothing is suppressed
+    assert nms_keep(arr).tolist() == ref_ids(ref_remove_duplicate_boxes(boxes)) == [0, 1, 2]
+
+
+def test_identical_boxes():
+    arr = np.array([[0, 0, 10, 20]] * 3, dtype=np.float64)
+    boxes = as_dicts(arr, ["8", "8", "B"])
+
+    assert nms_keep(arr).tolist() == ref_ids(ref_remove_duplicate_boxes(boxes)) == [0]
+    # same label dropped, a different label kept
+    assert dedup_chars_array(arr, ["8", "8", "B"]).tolist() == \
+        ref_ids(ref_remove_duplicate_chars(boxes)) == [0, 2]
+    assert [line.tolist() for line in group_lines_array(arr)] == \
+        [ref_ids(line) for line in ref_group_boxes_into_lines(as_dicts(arr))] == [[0, 1, 2]]
+
+
+@pytest.mark.parametrize("thr, kept", [(0.5, [0, 1]), (0.49, [0])])
+def test_nms_threshold_tie(thr, kept):
+    # IoU exactly 0.5: only strictly greater suppresses
+    arr = np.array([[0, 0, 10, 10], [0, 0, 10, 5]], dtype=np.float64)
+    assert nms_keep(arr, thr).tolist() == ref_ids(ref_remove_duplicate_boxes(as_dicts(arr), thr)) == kept
+
+
+def test_dedup_chars_threshold_tie():
+    # IoU exactly 0.6 (60 / 100) is not a duplicate
+    arr = np.array([[0, 0, 10, 10], [0, 0, 10, 6]], dtype=np.float64)
+    want = ref_ids(ref_remove_duplicate_chars(as_dicts(arr, ["0", "0"]), 0.6))
+    assert dedup_chars_array(arr, ["0", "0"], 0.6).tolist() == want == [0, 1]
+
+
+def test_group_lines_threshold_tie():
+    # centre offset exactly 0.6 * mean height stays on the same line
+    arr = np.array([[0, 0, 10, 10], [12, 6, 22, 16]], dtype=np.float64)
+    want = [ref_ids(line) for line in ref_group_boxes_into_lines(as_dicts(arr))]
+    assert [line.tolist() for line in group_lines_array(arr)] == want == [[0, 1]]
@@ -1,40 +1,130 @@
 # vnpr.py
 
+import sys
+import argparse
+
 import cv2
+from src.config import VIDEO_FRAME_STRIDE
 from src.pipeline import run_anpr
+from src.batch import print_summary, run_batch
+from src.video import run_anpr_video
 
 # ============================================================
-# CONFIG (LOCAL TEST ONLY)
+# CLI
 # ============================================================
 
-IMAGE_PATH = r"C:\Users\SPURGE\Downloads\WhatsApp Image 2026-01-15 at 9.40.54 AM.jpeg"
-ASSIGNED_VEHICLE_NUMBER = "KA03AN6757"  # optional
+def positive_int(value):
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be >= 1, got {n}")
+    return n
 
-# ============================================================
-# RUN
-# ============================================================
 
-if __name__ == "__main__":
+def parse_args():
+    parser = argparse.ArgumentParser(description="VNPR local runner")
+    parser.add_argument(
+        "image", nargs="?",
+        help="image to process"
+    )
+    parser.add_argument(
+        "--assigned",
+        help="assigned vehicle number to verify against (optional)"
+    )
+    parser.add_argument(
+        "--video",
+        help="process a video file instead, one result per vehicle"
+    )
+    parser.add_argument(
+        "--stride", type=positive_int, default=VIDEO_FRAME_STRIDE,
+        help="video: run plate detection on every Nth frame"
+    )
 
-    img = cv2.imread(IMAGE_PATH)
+    batch = parser.add_argument_group("batch")
+    batch.add_argument(
+        "--batch", metavar="SOURCE",
+        help="process a directory, glob or CSV manifest of (image, assigned number)"
+    )
+    batch.add_argument("--out", help="batch: output file (.jsonl / .csv / .parquet)")
+    batch.add_argument("--format", choices=("jsonl", "csv", "parquet"),
+                       help="batch: output format (default: from --out)")
+    batch.add_argument("--workers", type=int, default=0,
+                       help="batch: inference worker processes (0: in-process)")
+    batch.add_argument("--readers", type=positive_int, default=4,
+                       help="batch: image reading / decoding threads")
+    batch.add_argument("--batch-size", type=positive_int, default=8,
+                       help="batch: images per inference call")
+    batch.add_argument("--checkpoint-every", type=positive_int, default=1000,
+                       help="batch: images between checkpoints")
+    batch.add_argument("--resume", action="store_true",
+                       help="batch: continue from <out>.ckpt.json")
+    batch.add_argument("--tiled", action="store_true",
+                       help="batch: tiled plate detection (small plates)")
+    batch.add_argument("--torch-threads", type=positive_int, default=1,
+                       help="batch: torch threads per worker process")
 
-    if img is None:
-        raise ValueError("Image not found or unreadable")
+    args = parser.parse_args()
+    if not (args.image or args.video or args.batch):
+        parser.error("give an image, --video FILE or --batch SOURCE")
+    if args.batch and not args.out:
+        parser.error("--batch needs --out")
+    return args
 
-    results = run_anpr(
-        image=img,
-        assigned_vehicle_number=ASSIGNED_VEHICLE_NUMBER
-    )
 
+def print_results(results, label):
     print("\n================ ANPR RESULT ================\n")
 
     if not results:
         print("No plates detected")
     else:
         for i, r in enumerate(results, 1):
-            print(f"[Plate {i}]")
+            print(f"[{label} {i}]")
             for k, v in r.items():
                 print(f"{k:12}: {v}")
             print()
 
     print("============================================\n")
+
+# ============================================================
+# RUN
+# ============================================================
+
+if __name__ == "__main__":
+
+    args = parse_args()
+
+    if args.batch:
+        summary = run_batch(
+            args.batch,
+            args.out,
+            fmt=args.format,
+            workers=args.workers,
+            readers=args.readers,
+            batch_size=args.batch_size,
+            tiled=args.tiled,
+            checkpoint_every=args.checkpoint_every,
+            resume=args.resume,
+            torch_threads=args.torch_threads
+        )
+        print_summary(summary)
+        if summary["failed"]:
+            sys.exit(1)
+
+    elif args.video:
+        results = run_anpr_video(
+            args.video,
+            assigned_vehicle_number=args.assigned,
+            stride=args.stride
+        )
+        print_results(results, "Vehicle")
+
+    else:
+        img = cv2.imread(args.image)
+
+        if img is None:
+            raise ValueError("Image not found or unreadable")
+
+        results = run_anpr(
+            image=img,
+            assigned_vehicle_number=args.assigned
+        )
+        print_results(results, "Plate")